@@ -0,0 +1,3 @@
+"""
+Package for analytics computed over fetched datasets (graphs, risk statistics, distributions).
+"""
@@ -0,0 +1,186 @@
+"""
+Full counterparty graph of a wallet.
+
+Every counterparty becomes a node with volume-weighted edges to and from the wallet, held
+as a sparse adjacency matrix (A[i, j] = USD volume sent from node i to node j, node 0 being
+the wallet). Counterparties below a volume share, or beyond the node cap, are collapsed
+into one super-node per label so the graph stays drawable for wallets with 10k+
+counterparties. PageRank and each node's share of the wallet's in/outflow are computed
+with sparse matrix products; PageRank stops at the tolerance, the iteration cap or the
+time budget, whichever comes first.
+"""
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from components.pfl_network_graph import EgoGraph, first_label, short_addr
+
+
+MAX_NODES = 300          # individual counterparties kept before collapsing the rest
+MIN_VOLUME_SHARE = 0.001  # counterparties below this share of total volume are collapsed
+TIME_BUDGET_S = 2.0
+PAGERANK_TOL = 1e-6       # L1 change between iterations; damping 0.85 reaches it in ~90 iterations
+PAGERANK_MAX_ITER = 200
+UNLABELED = "Unlabeled"
+
+_ADDRESS_SUFFIX = re.compile(r"\s*\[[^\]]*\]\s*$")
+
+
+def _group_label(label) -> str:
+    # "Binance 14 [0xabc…]" and "Binance 15 [0xdef…]" should not end up in separate groups,
+    # so drop the bracketed address and trailing numbering.
+    label = first_label(label)
+    if not label:
+        return UNLABELED
+    return re.sub(r"\s+\d+$", "", _ADDRESS_SUFFIX.sub("", label)) or UNLABELED
+
+
+def pagerank(adjacency: sp.csr_matrix, alpha: float = 0.85, tol: float = PAGERANK_TOL,
+             max_iter: int = PAGERANK_MAX_ITER, deadline: Optional[float] = None) -> Tuple[np.ndarray, int, str]:
+    """
+    Volume-weighted PageRank by power iteration. Returns (scores, iterations, stop reason),
+    the reason being "converged" (L1 change below tol), "max_iter" or "deadline"; in the
+    last two cases the current (unconverged) scores are returned.
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.empty(0), 0, "converged"
+    out_weight = np.asarray(adjacency.sum(axis=1)).ravel()
+    inv = np.divide(1.0, out_weight, out=np.zeros(n), where=out_weight > 0)
+    transition_t = (sp.diags(inv) @ adjacency).T.tocsr()
+    dangling = out_weight == 0
+
+    x = np.full(n, 1.0 / n)
+    for iteration in range(1, max_iter + 1):
+        x_next = alpha * (transition_t @ x + x[dangling].sum() / n) + (1 - alpha) / n
+        err = np.abs(x_next - x).sum()
+        x = x_next
+        if err < tol:
+            return x, iteration, "converged"
+        if deadline is not None and time.perf_counter() > deadline:
+            return x, iteration, "deadline"
+    return x, iteration, "max_iter"
+
+
+@dataclass(frozen=True)
+class CounterpartyGraph:
+    # One row per node (row 0 = wallet): id, label, kind (wallet/counterparty/group),
+    # members, total_volume_usd, interaction_count, pagerank, inflow_share, outflow_share
+    nodes: pd.DataFrame
+    adjacency: sp.csr_matrix
+    counterparties: int   # counterparties in the source data
+    collapsed: int        # of which folded into group nodes
+    iterations: int
+    stopped: str          # PageRank stop reason: "converged", "max_iter" or "deadline"
+    elapsed_s: float
+    fetch_stopped: Optional[str] = None   # why counterparty paging stopped early ("max_pages"/"time_budget")
+
+    @property
+    def converged(self) -> bool:
+        return self.stopped == "converged"
+
+    @property
+    def groups(self) -> int:
+        return int((self.nodes["kind"] == "group").sum())
+
+    def ranked(self, n: int = 20) -> pd.DataFrame:
+        """Counterparty and group nodes by descending PageRank."""
+        return self.nodes.iloc[1:].sort_values("pagerank", ascending=False).head(n)
+
+    def to_ego_graph(self) -> EgoGraph:
+        edges = self.adjacency.tocoo()
+        return EgoGraph(
+            center=self.nodes.at[0, "id"],
+            center_label=self.nodes.at[0, "label"],
+            nodes=self.nodes["id"].to_numpy(dtype=object)[1:],
+            labels=self.nodes["label"].to_numpy(dtype=object)[1:],
+            weights=self.nodes["total_volume_usd"].to_numpy(dtype="float64")[1:],
+            src=edges.row.astype("int64"),
+            dst=edges.col.astype("int64"),
+            edge_weights=edges.data,
+            edge_cats=np.where(edges.row == 0, "out", "in").astype(object),
+        )
+
+
+def build_counterparty_graph(df: pd.DataFrame, wallet: str, *, max_nodes: int = MAX_NODES,
+                             min_share: float = MIN_VOLUME_SHARE,
+                             time_budget_s: float = TIME_BUDGET_S,
+                             fetch_stopped: Optional[str] = None) -> CounterpartyGraph:
+    """
+    Aggregate a counterparties frame (counterparties_to_dataframe) into a CounterpartyGraph.
+    fetch_stopped marks a frame whose paging stopped early, i.e. a partial graph.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget_s
+
+    cols = ["total_volume_usd", "volume_in_usd", "volume_out_usd", "interaction_count"]
+    frame = pd.DataFrame({c: pd.to_numeric(df[c], errors="coerce").fillna(0) for c in cols})
+    frame["id"] = df["counterparty_address"].astype(str)
+    frame["label"] = df["counterparty_address_label"].apply(first_label)
+    frame["group"] = df["counterparty_address_label"].apply(_group_label)
+
+    # Keep the largest counterparties; collapse the long tail per label
+    total = frame["total_volume_usd"].sum()
+    frame = frame.sort_values("total_volume_usd", ascending=False, kind="stable").reset_index(drop=True)
+    share = frame["total_volume_usd"] / total if total > 0 else pd.Series(0.0, index=frame.index)
+    keep = ((frame.index < max_nodes) & (share >= min_share)).to_numpy()
+
+    kept = frame[keep].drop(columns="group").assign(kind="counterparty", members=1)
+    kept["label"] = kept["label"].where(kept["label"].notna(), kept["id"].map(short_addr))
+
+    grouped = (
+        frame[~keep]
+        .groupby("group", sort=False)
+        .agg(**{c: (c, "sum") for c in cols}, members=("id", "size"))
+        .reset_index()
+    )
+    grouped = grouped.assign(
+        id="group:" + grouped["group"].astype(str),
+        label=grouped["group"].astype(str) + " (" + grouped["members"].astype(str) + " wallets)",
+        kind="group",
+    ).drop(columns="group")
+
+    wallet_row = pd.DataFrame([{
+        "id": wallet, "label": short_addr(wallet), "kind": "wallet", "members": 1,
+        "total_volume_usd": float(frame["total_volume_usd"].sum()),
+        "volume_in_usd": float(frame["volume_in_usd"].sum()),
+        "volume_out_usd": float(frame["volume_out_usd"].sum()),
+        "interaction_count": float(frame["interaction_count"].sum()),
+    }])
+    nodes = pd.concat([wallet_row, kept, grouped], ignore_index=True)
+
+    # Edges: wallet -> node carries volume_out_usd, node -> wallet carries volume_in_usd
+    n = len(nodes)
+    idx = np.arange(1, n)
+    vol_out = nodes["volume_out_usd"].to_numpy(dtype="float64")[1:]
+    vol_in = nodes["volume_in_usd"].to_numpy(dtype="float64")[1:]
+    out_mask, in_mask = vol_out > 0, vol_in > 0
+    rows = np.concatenate([np.zeros(out_mask.sum(), dtype="int64"), idx[in_mask]])
+    cols_ = np.concatenate([idx[out_mask], np.zeros(in_mask.sum(), dtype="int64")])
+    data = np.concatenate([vol_out[out_mask], vol_in[in_mask]])
+    adjacency = sp.coo_matrix((data, (rows, cols_)), shape=(n, n)).tocsr()
+
+    # Share of the wallet's inflow each node sent (column 0) and of its outflow each received (row 0)
+    inflow = adjacency[:, 0].toarray().ravel()
+    outflow = adjacency[0, :].toarray().ravel()
+    nodes["inflow_share"] = inflow / inflow.sum() if inflow.sum() > 0 else 0.0
+    nodes["outflow_share"] = outflow / outflow.sum() if outflow.sum() > 0 else 0.0
+
+    scores, iterations, stopped = pagerank(adjacency, deadline=deadline)
+    nodes["pagerank"] = scores
+
+    return CounterpartyGraph(
+        nodes=nodes.drop(columns=["volume_in_usd", "volume_out_usd"]),
+        adjacency=adjacency,
+        counterparties=len(frame),
+        collapsed=int((~keep).sum()),
+        iterations=iterations,
+        stopped=stopped,
+        elapsed_s=time.perf_counter() - started,
+        fetch_stopped=fetch_stopped,
+    )
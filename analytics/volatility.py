@@ -0,0 +1,175 @@
+"""
+Rolling volatility, drawdown and return statistics for every token of a portfolio at once.
+
+Input is the tokens x days USD value matrix of a wallet (see loaders.balances.BalancePanel).
+Rolling std uses NumPy sliding windows over the whole matrix, processed in row chunks so
+the (tokens, days, window) view never materializes more than CHUNK_ELEMENTS floats.
+
+Results are cached per (wallet, chain, window). When the matrix for a key shares its days
+with the cached one (e.g. the window slid forward by a day), only the columns whose
+trailing window changed are recomputed; drawdown and return statistics are cheap
+running/pairwise passes and are always recomputed.
+"""
+import threading
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+WINDOWS = (7, 14, 30)
+MIN_PERIODS = 2
+CHUNK_ELEMENTS = 4_000_000
+CACHE_SIZE = 64
+DAYS_PER_YEAR = 365  # crypto trades every day
+
+
+@dataclass(frozen=True)
+class VolatilityStats:
+    tokens: pd.Index
+    days: pd.DatetimeIndex
+    window: int
+    values: np.ndarray        # tokens x days USD value (0 where not held)
+    rolling_std: np.ndarray   # tokens x days population std over the trailing window; NaN < MIN_PERIODS
+    drawdown: np.ndarray      # tokens x days value / running max - 1 (<= 0); NaN before first holding
+    returns: np.ndarray       # tokens x (days - 1) simple daily returns; NaN where the previous day is 0
+
+    def heat(self, tokens: Optional[pd.Index] = None) -> pd.DataFrame:
+        """Token x day frame of rolling std (0 where undefined), optionally restricted to tokens."""
+        frame = pd.DataFrame(np.nan_to_num(self.rolling_std), index=self.tokens, columns=self.days)
+        if tokens is None:
+            return frame
+        tokens = pd.Index(tokens)
+        return frame.loc[tokens[tokens.isin(self.tokens)]]
+
+    def summary(self) -> pd.DataFrame:
+        """Per-token risk statistics over the whole window."""
+        # Tokens without any holding or return give all-NaN rows; their stats are NaN
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            held = self.values > 0
+            first = np.where(held.any(axis=1), np.argmax(held, axis=1), -1)
+            rows = np.arange(len(self.tokens))
+            start = np.where(first >= 0, self.values[rows, np.maximum(first, 0)], np.nan)
+            last = self.values[:, -1] if self.values.shape[1] else np.full(len(self.tokens), np.nan)
+            ret_std = np.nanstd(self.returns, axis=1) if self.returns.size else np.full(len(self.tokens), np.nan)
+            return pd.DataFrame({
+                "token_symbol": self.tokens,
+                "value_usd": last,
+                "mean_rolling_std": np.nanmean(self.rolling_std, axis=1),
+                "max_rolling_std": np.nanmax(self.rolling_std, axis=1),
+                "max_drawdown": np.nanmin(self.drawdown, axis=1),
+                "mean_daily_return": np.nanmean(self.returns, axis=1) if self.returns.size else np.nan,
+                "annualized_volatility": ret_std * np.sqrt(DAYS_PER_YEAR),
+                "total_return": last / start - 1,
+            })
+
+
+# ---------- Kernels ----------
+
+def rolling_std(values: np.ndarray, window: int, min_periods: int = MIN_PERIODS,
+                columns: Optional[slice] = None) -> np.ndarray:
+    """
+    Population rolling std (ddof=0) along axis 1, like DataFrame.rolling(window,
+    min_periods).std(ddof=0) per row. With `columns`, only those output columns are
+    computed (the input still supplies their trailing windows).
+    """
+    n_rows, n_days = values.shape
+    start, stop, _ = (columns or slice(None)).indices(n_days)
+    out = np.full((n_rows, max(stop - start, 0)), np.nan)
+    if n_rows == 0 or stop <= start:
+        return out
+
+    # Left-pad so early columns see a partial window, then take the windows ending at start..stop-1
+    lo = max(start - window + 1, 0)
+    pad = window - 1 - (start - lo)
+    src = values[:, lo:stop]
+    if pad:
+        src = np.concatenate([np.full((n_rows, pad), np.nan), src], axis=1)
+
+    chunk = max(1, CHUNK_ELEMENTS // (src.shape[1] * window))
+    # All-NaN windows (padding only) warn in nanstd; they are masked by min_periods anyway
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for r0 in range(0, n_rows, chunk):
+            win = sliding_window_view(src[r0:r0 + chunk], window, axis=1)
+            counts = np.count_nonzero(~np.isnan(win), axis=2)
+            std = np.nanstd(win, axis=2)
+            out[r0:r0 + chunk] = np.where(counts >= min_periods, std, np.nan)
+    return out
+
+def drawdown(values: np.ndarray) -> np.ndarray:
+    """value / running max - 1 along axis 1; NaN until the first positive value."""
+    running_max = np.fmax.accumulate(np.where(values > 0, values, np.nan), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(running_max > 0, values / running_max - 1, np.nan)
+
+def daily_returns(values: np.ndarray) -> np.ndarray:
+    prev, cur = values[:, :-1], values[:, 1:]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(prev > 0, cur / prev - 1, np.nan)
+
+
+# ---------- Cache ----------
+
+_cache: "OrderedDict[Tuple[Hashable, int], VolatilityStats]" = OrderedDict()
+_lock = threading.Lock()
+
+def _reusable_columns(old: VolatilityStats, tokens: pd.Index, days: pd.DatetimeIndex,
+                      values: np.ndarray) -> Tuple[int, int, int]:
+    """
+    (old_offset, new_start, new_stop): new rolling-std columns new_start..new_stop-1 equal
+    old columns shifted by old_offset. (0, 0, 0) when nothing can be reused.
+    """
+    if not tokens.equals(old.tokens) or len(days) == 0 or len(old.days) == 0:
+        return 0, 0, 0
+    offset = old.days.get_indexer([days[0]])[0]
+    if offset < 0:
+        return 0, 0, 0
+    overlap = min(len(old.days) - offset, len(days))
+    if not old.days[offset:offset + overlap].equals(days[:overlap]):
+        return 0, 0, 0
+    if not np.array_equal(old.values[:, offset:offset + overlap], values[:, :overlap], equal_nan=True):
+        return 0, 0, 0
+    # After a slide, the first window-1 columns lost part of their trailing window
+    new_start = 0 if offset == 0 else min(old.window - 1, overlap)
+    return offset, new_start, overlap
+
+def volatility_stats(key: Hashable, tokens: pd.Index, days: pd.DatetimeIndex, values: np.ndarray,
+                     window: int) -> VolatilityStats:
+    """
+    Statistics for a tokens x days value matrix, cached under (key, window). `key` identifies
+    the series (e.g. (wallet, chain)); a call with the same key reuses every rolling-std
+    column of the previous result whose trailing window is unchanged.
+    """
+    values = np.nan_to_num(np.asarray(values, dtype="float64"))
+    with _lock:
+        old = _cache.get((key, window))
+
+    std = None
+    if old is not None:
+        offset, reuse_start, reuse_stop = _reusable_columns(old, tokens, days, values)
+        if reuse_stop == len(days) and reuse_start == 0 and values.shape == old.values.shape:
+            return old
+        if reuse_stop > reuse_start:
+            std = np.empty(values.shape)
+            std[:, reuse_start:reuse_stop] = old.rolling_std[:, offset + reuse_start:offset + reuse_stop]
+            std[:, :reuse_start] = rolling_std(values, window, columns=slice(0, reuse_start))
+            std[:, reuse_stop:] = rolling_std(values, window, columns=slice(reuse_stop, None))
+    if std is None:
+        std = rolling_std(values, window)
+
+    stats = VolatilityStats(
+        tokens=tokens, days=days, window=window, values=values,
+        rolling_std=std, drawdown=drawdown(values), returns=daily_returns(values),
+    )
+    with _lock:
+        _cache[(key, window)] = stats
+        _cache.move_to_end((key, window))
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return stats
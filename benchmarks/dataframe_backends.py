@@ -0,0 +1,111 @@
+"""
+Compare the pandas backend of the aggregation helpers in dataframes.py with polars or duckdb.
+
+Usage (from the repo root, with polars or duckdb installed):
+    python benchmarks/dataframe_backends.py --rows 500000 --tokens 200 --repeat 5
+    python benchmarks/dataframe_backends.py --backend duckdb
+
+Each helper is run on the same synthetic input with both backends; outputs are checked
+for equality before timings are reported.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dataframes  # noqa: E402
+from dataframes import (  # noqa: E402
+    daily_token_pivot, rolling_std, holder_flows_by_type, holder_type_summary, hourly_trade_activity,
+)
+
+
+def make_balances(rows: int, tokens: int, days: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-01-01", tz="UTC")
+    offsets = rng.integers(0, days * 24 * 3600, size=rows)
+    return pd.DataFrame({
+        "block_timestamp": start + pd.to_timedelta(offsets, unit="s"),
+        "token_symbol": [f"TKN{i}" for i in rng.integers(0, tokens, size=rows)],
+        "value_usd": rng.lognormal(mean=6, sigma=2, size=rows),
+    })
+
+
+def make_holders(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    types = np.array(["exchange", "smart_money", "whale", "public_figure", "other"])
+    return pd.DataFrame({
+        "address": [f"0x{i:040x}" for i in rng.integers(0, rows // 2 + 1, size=rows)],
+        "holder_type": types[rng.integers(0, len(types), size=rows)],
+        "token_amount": rng.lognormal(mean=10, sigma=2, size=rows),
+        "total_inflow": rng.lognormal(mean=8, sigma=2, size=rows),
+        "total_outflow": rng.lognormal(mean=8, sigma=2, size=rows),
+        "value_usd": rng.lognormal(mean=9, sigma=2, size=rows),
+        "ownership_percentage": rng.uniform(0, 1, size=rows),
+    })
+
+
+def make_trades(rows: int, days: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-01-01", tz="UTC")
+    offsets = rng.integers(0, days * 24 * 3600, size=rows)
+    return pd.DataFrame({
+        "block_timestamp": start + pd.to_timedelta(offsets, unit="s"),
+        "traded_token_amount": rng.lognormal(mean=6, sigma=2, size=rows),
+    })
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", choices=["polars", "duckdb"], default="polars")
+    args = parser.parse_args()
+
+    if dataframes.get_backend(args.backend) != args.backend:
+        sys.exit(f"{args.backend} is not installed: pip install {args.backend}")
+
+    balances = make_balances(args.rows, args.tokens, args.days)
+    holders = make_holders(args.rows)
+    trades = make_trades(args.rows, args.days)
+    all_days = pd.date_range(balances["block_timestamp"].min().floor("D"),
+                             balances["block_timestamp"].max().floor("D"), freq="D")
+    wide = daily_token_pivot(balances, days=all_days, backend="pandas").fillna(0.0)
+
+    cases = {
+        "daily_token_pivot": lambda b: daily_token_pivot(balances, days=all_days, backend=b),
+        "rolling_std": lambda b: rolling_std(wide, window=7, min_periods=2, backend=b),
+        "holder_flows_by_type": lambda b: holder_flows_by_type(holders, backend=b),
+        "holder_type_summary": lambda b: holder_type_summary(holders, backend=b),
+        "hourly_trade_activity": lambda b: hourly_trade_activity(trades, hours=24, backend=b),
+    }
+
+    print(f"rows={args.rows:,} tokens={args.tokens} days={args.days} repeat={args.repeat}")
+    other = f"{args.backend} (s)"
+    print(f"{'step':<24}{'pandas (s)':>12}{other:>12}{'speedup':>10}")
+    for name, fn in cases.items():
+        expected, t_pd = timed(lambda: fn("pandas"), args.repeat)
+        actual, t_pl = timed(lambda: fn(args.backend), args.repeat)
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_index_type=False,
+                                      check_freq=False, rtol=1e-9)
+        print(f"{name:<24}{t_pd:>12.4f}{t_pl:>12.4f}{t_pd / t_pl:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 import streamlit as st
 import json
 import re
+import time
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
 from openai import OpenAI
 
 from lib.hyperliquid_tools import get_hyperliquid_tools
-from lib.nansen_mcp_client import NansenMCPClient
+from lib.nansen_mcp_client import NansenMCPClient, connection_metrics, connection_summary
+from lib.tool_runner import ToolCallRunner
+from lib.tool_cache import get_tool_cache
+from lib.tool_compaction import FULL_RESULT_TOOL, PAGE_BUDGET_TOKENS, ToolResultStore, compact_tool_result
+from lib.chat_context import ChatContext
 
 
 def replace_nansen_urls_with_dashboard(text: str) -> str:
@@ -141,9 +148,9 @@ def initialize_chat(openai_api_key: str, nansen_mcp_url: str, nansen_api_key: st
         return True
 
     try:
-        # Initialize MCP client
+        # Initialize MCP client; the handshake runs in the background so the page renders right away
         mcp_client = NansenMCPClient(nansen_mcp_url, nansen_api_key)
-        mcp_client.initialize()
+        mcp_client.initialize_async()
 
         # Initialize OpenAI client
         openai_client = OpenAI(api_key=openai_api_key)
@@ -151,18 +158,19 @@ def initialize_chat(openai_api_key: str, nansen_mcp_url: str, nansen_api_key: st
         # Load Hyperliquid tools and handlers
         hyperliquid_tools, hyperliquid_handlers = get_hyperliquid_tools()
 
-        # Get MCP tools
-        mcp_tools = mcp_client.get_tools_for_openai()
+        # Full results of compacted tool outputs, readable by the model through FULL_RESULT_TOOL
+        tool_results = ToolResultStore()
 
-        # Combine all tools
-        all_tools = mcp_tools + hyperliquid_tools
-
-        # Store in session state
+        # Store in session state; MCP tools are added once the handshake is done (see get_all_tools)
         st.session_state.mcp_client = mcp_client
         st.session_state.openai_client = openai_client
+        st.session_state.hyperliquid_tools = hyperliquid_tools
         st.session_state.hyperliquid_handlers = hyperliquid_handlers
-        st.session_state.all_tools = all_tools
+        st.session_state.tool_results = tool_results
+        st.session_state.all_tools = None
+        st.session_state.all_tools_version = None
         st.session_state.chat_messages = []
+        st.session_state.chat_context = ChatContext(openai_client)
         st.session_state.chat_initialized = True
 
         return True
@@ -172,6 +180,201 @@ def initialize_chat(openai_api_key: str, nansen_mcp_url: str, nansen_api_key: st
         return False
 
 
+MAX_TOOLS = 128  # OpenAI's limit per request
+
+
+def get_all_tools() -> List[Dict[str, Any]]:
+    """
+    MCP, Hyperliquid and local tools for this session. Waits for the MCP handshake started by
+    initialize_chat; the list is rebuilt only when the shared tool catalog's version changes.
+    Only MCP tools are dropped to stay within MAX_TOOLS.
+    """
+    mcp_client: NansenMCPClient = st.session_state.mcp_client
+    mcp_client.wait_initialized()
+    version = mcp_client.catalog.version if mcp_client.catalog else None
+    if st.session_state.get("all_tools") is None or st.session_state.get("all_tools_version") != version:
+        own_tools = st.session_state.hyperliquid_tools + [st.session_state.tool_results.tool_definition()]
+        st.session_state.all_tools = mcp_client.get_tools_for_openai()[:MAX_TOOLS - len(own_tools)] + own_tools
+        st.session_state.all_tools_version = version
+    return st.session_state.all_tools
+
+
+# ---------- Streaming ----------
+
+STREAM_RENDER_INTERVAL_S = 0.05
+URL_MARKERS = ("http", "app.", "nansen")
+
+
+def render_streamed_text(text: str) -> str:
+    """
+    Text for display while it is still streaming. Nansen URLs are only replaced up to the last
+    whitespace, since a URL never spans one; the trailing word is held back while it may be
+    an incomplete URL, so a half-streamed token address is never rewritten into a wrong link.
+    """
+    cut = max(text.rfind(" "), text.rfind("\n")) + 1
+    stable, tail = text[:cut], text[cut:]
+    if any(marker in tail.lower() for marker in URL_MARKERS):
+        tail = ""
+    return replace_nansen_urls_with_dashboard(stable) + tail
+
+
+def _parse_arguments(arguments: str, final: bool) -> Optional[Dict[str, Any]]:
+    """Tool-call arguments once they are a complete JSON object; None while still streaming."""
+    if not arguments.strip():
+        return {} if final else None
+    if not final and not arguments.rstrip().endswith("}"):
+        return None
+    try:
+        return json.loads(arguments)
+    except json.JSONDecodeError:
+        if final:
+            raise
+        return None
+
+
+def stream_completion(openai_client: OpenAI, messages: List[Dict], tools: List[Dict],
+                      runner: ToolCallRunner, placeholder) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Stream one completion, rendering its text into placeholder as it arrives. Tool-call deltas
+    are accumulated per index. Nansen MCP, local and read-only Hyperliquid calls are submitted
+    to runner as soon as their arguments are complete (in index order), so they run while the
+    rest of the response streams. Calls that change the Hyperliquid account, and Hyperliquid
+    reads issued after one, are held until the stream has finished with finish_reason
+    "tool_calls"; a stream that fails or stops early never places an order.
+    Returns (content, the submitted tool_calls in the assistant-message format).
+    """
+    content = ""
+    calls: Dict[int, Dict[str, Any]] = {}
+    submitted = set()
+    held: Dict[int, Dict[str, Any]] = {}   # index -> parsed args, waiting for the stream to finish
+    finish_reason = None
+    last_render = 0.0
+
+    def submit_ready(final: bool) -> None:
+        for index in sorted(calls):
+            if index in submitted or index in held:
+                continue
+            call = calls[index]
+            # A call is complete once a later one has started, or when its JSON object closes
+            args = _parse_arguments(call["function"]["arguments"], final or index < max(calls))
+            if args is None:
+                return
+            name = call["function"]["name"]
+            if runner.is_serial(name) or (held and runner.is_hyperliquid(name)):
+                held[index] = args
+                continue
+            runner.submit(call["id"], name, args)
+            submitted.add(index)
+
+    stream = openai_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=messages,
+        tools=tools,
+        tool_choice="auto",
+        stream=True,
+    )
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            finish_reason = choice.finish_reason
+        delta = choice.delta
+        if delta.content:
+            content += delta.content
+            now = time.perf_counter()
+            if now - last_render >= STREAM_RENDER_INTERVAL_S:
+                placeholder.markdown(render_streamed_text(content) + " ▌")
+                last_render = now
+        for tc in delta.tool_calls or []:
+            call = calls.setdefault(tc.index, {"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function and tc.function.name:
+                call["function"]["name"] += tc.function.name
+            if tc.function and tc.function.arguments:
+                call["function"]["arguments"] += tc.function.arguments
+        if delta.tool_calls:
+            submit_ready(final=False)
+
+    if finish_reason == "tool_calls":
+        submit_ready(final=True)
+        for index in sorted(held):
+            runner.submit(calls[index]["id"], calls[index]["function"]["name"], held[index])
+            submitted.add(index)
+    elif len(submitted) < len(calls):
+        # Cut off (e.g. by the token limit): only the calls that already started get answered
+        st.warning(f"The response stopped early ({finish_reason}); {len(calls) - len(submitted)} "
+                   f"incomplete or trading tool call(s) were not run.")
+
+    if content:
+        placeholder.markdown(replace_nansen_urls_with_dashboard(content))
+    else:
+        placeholder.empty()
+    return content, [calls[i] for i in sorted(submitted)]
+
+
+def render_connection_metrics():
+    """Sidebar expander: how many MCP requests reused a pooled connection and the setup time saved."""
+    with st.expander("MCP connection metrics"):
+        summary = connection_summary()
+        if not summary["requests"]:
+            st.caption("No MCP requests yet.")
+            return
+        c1, c2 = st.columns(2)
+        c1.metric("Reused connections", f"{summary['reused']}/{summary['requests']}")
+        c2.metric("Setup time saved", f"{summary['saved_ms'] / 1000:,.2f}s")
+        st.caption(
+            f"New connections took {summary['avg_setup_ms']:,.0f} ms on average (TCP + TLS); "
+            f"{'HTTP/2' if summary['http2'] else 'HTTP/1.1 keep-alive (install h2 for HTTP/2)'}."
+        )
+        st.dataframe(pd.DataFrame(connection_metrics()[::-1]), hide_index=True)
+        catalog = st.session_state.mcp_client.catalog if "mcp_client" in st.session_state else None
+        if catalog is not None:
+            st.caption(f"Tool catalog {catalog.version}: {len(catalog.tools)} tools, fetched {catalog.age_s / 60:,.0f} min ago.")
+
+
+def render_tool_cache_metrics():
+    """Sidebar expander: how often repeated tool calls were answered without an upstream request."""
+    with st.expander("Tool result cache"):
+        stats = pd.DataFrame(get_tool_cache().stats())
+        if stats.empty:
+            st.caption("No cacheable tool calls yet.")
+            return
+        calls = stats["calls"].sum()
+        served = (stats["hits"] + stats["coalesced"]).sum()
+        c1, c2 = st.columns(2)
+        c1.metric("Hit rate", f"{served / calls:.0%}" if calls else "–")
+        c2.metric("Upstream time saved", f"{stats['saved_s'].sum():,.1f}s")
+        st.dataframe(
+            stats, hide_index=True,
+            column_config={"hit_rate": st.column_config.NumberColumn(format="percent")},
+        )
+
+
+def render_prompt_size():
+    """Sidebar expander: token size of each request's prompt by section."""
+    context: ChatContext = st.session_state.get("chat_context")
+    with st.expander("Prompt size"):
+        if context is None or not context.stats:
+            st.caption("No requests yet.")
+            return
+        stats = pd.DataFrame(list(context.stats))
+        last = stats.iloc[-1]
+        c1, c2 = st.columns(2)
+        c1.metric("Last prompt", f"{last['prompt_tokens']:,} tokens")
+        c2.metric("Messages summarized", f"{last['summarized_messages']:,}")
+        st.caption(
+            f"History window: {context.history_tokens:,} tokens"
+            + (" · summarizing older turns in the background" if context.summary_pending() else "")
+        )
+        st.bar_chart(stats, y=["system_tokens", "memory_tokens", "history_tokens", "tools_tokens"])
+        st.dataframe(stats.iloc[::-1], hide_index=True)
+        if context.summary:
+            st.markdown("**Memory**")
+            st.text(context.summary)
+
+
 def run_chat():
     """Run the chat interface."""
     if not st.session_state.get("chat_initialized", False):
@@ -225,118 +428,84 @@ def run_chat():
     if needs_processing:
         # Get assistant response
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    # Prepare messages for OpenAI
-                    messages = [
-                        {"role": "system", "content": SYSTEM_PROMPT}
-                    ] + st.session_state.chat_messages
-
-                    # Get OpenAI response with function calling
-                    tools = st.session_state.all_tools
-                    
-                    # Loop to handle multiple rounds of tool calls
-                    max_iterations = 10  # Prevent infinite loops
-                    iteration = 0
-                    final_content = None
+            try:
+                # Prepare messages for OpenAI
+                # Recent history that fits the token window, plus a memory of older turns
+                context: ChatContext = st.session_state.chat_context
+                messages = context.build(SYSTEM_PROMPT, st.session_state.chat_messages)
+
+                # Get OpenAI response with function calling
+                tools = get_all_tools()
+                
+                # Loop to handle multiple rounds of tool calls
+                max_iterations = 10  # Prevent infinite loops
+                iteration = 0
+                final_content = None
+                
+                while iteration < max_iterations:
+                    iteration += 1
                     
-                    while iteration < max_iterations:
-                        iteration += 1
-                        
-                        response = openai_client.chat.completions.create(
-                            model="gpt-4o-mini",
-                            messages=messages,
-                            tools=tools[:128] if len(tools) > 128 else tools,  # OpenAI has a limit
-                            tool_choice="auto"
+                    # Stream the completion; tool calls start as soon as their arguments are complete
+                    text_placeholder = st.empty()
+                    text_placeholder.caption("Thinking...")
+                    tool_results: ToolResultStore = st.session_state.tool_results
+                    runner = ToolCallRunner(mcp_client, st.session_state.get("hyperliquid_handlers", {}),
+                                            local_handlers={FULL_RESULT_TOOL: tool_results.page})
+                    try:
+                        content, tool_calls = stream_completion(
+                            openai_client, context.prepare(messages), tools, runner, text_placeholder,
                         )
 
-                        assistant_message = response.choices[0].message
-
                         # Handle tool calls
-                        if assistant_message.tool_calls:
-                            # Show intermediate message if assistant has content before tool calls
-                            if assistant_message.content:
-                                st.markdown(assistant_message.content)
-                            
+                        if tool_calls:
                             # Add assistant message with tool calls to messages
                             messages.append({
                                 "role": "assistant",
-                                "content": assistant_message.content,
-                                "tool_calls": [tc.model_dump() for tc in assistant_message.tool_calls]
+                                "content": content or None,
+                                "tool_calls": tool_calls
                             })
-                            
-                            # Process each tool call
-                            for tool_call in assistant_message.tool_calls:
-                                tool_name = tool_call.function.name
-                                tool_args = json.loads(tool_call.function.arguments)
-
-                                st.write(f"🔧 Calling tool: `{tool_name}`")
-
-                                # Check if this is a Hyperliquid tool
-                                hyperliquid_handlers = st.session_state.get("hyperliquid_handlers", {})
-                                
-                                if tool_name in hyperliquid_handlers:
-                                    # Execute Hyperliquid tool directly
-                                    try:
-                                        handler = hyperliquid_handlers[tool_name]
-                                        with st.spinner(f"Executing {tool_name}..."):
-                                            result = handler(**tool_args)
-                                        # Convert result to JSON string for OpenAI
-                                        tool_result = json.dumps(result) if isinstance(result, dict) else str(result)
-                                    except Exception as e:
-                                        error_result = {
-                                            "status": "error",
-                                            "error": str(e)
-                                        }
-                                        tool_result = json.dumps(error_result)
-                                else:
-                                    # Call the MCP tool with streaming
-                                    tool_output_placeholder = st.empty()
-                                    tool_result_parts = []
-
-                                    with st.spinner(f"Fetching data from {tool_name}..."):
-                                        for chunk in mcp_client.call_tool_streaming(tool_name, tool_args):
-                                            tool_result_parts.append(chunk)
-                                            # Update placeholder with accumulated result
-                                            current_result = ''.join(tool_result_parts)
-                                            if current_result.startswith("Progress:"):
-                                                # Show progress updates
-                                                tool_output_placeholder.info(current_result)
-                                            else:
-                                                # Show partial results
-                                                tool_output_placeholder.text(current_result[:500] + "..." if len(current_result) > 500 else current_result)
-
-                                    tool_result = ''.join(tool_result_parts)
-                                    tool_output_placeholder.empty()  # Clear the placeholder
-
+                            # Trading calls may start after later reads; answer in tool_call order
+                            results = runner.wait()
+                            names = {tc["id"]: tc["function"]["name"] for tc in tool_calls}
+                            full_tokens = sent_tokens = 0
+                            for tool_call_id in names:
+                                tool_result = results[tool_call_id]
+                                # Keep the full result for follow-ups, send a compacted one
+                                tool_results.put(tool_call_id, tool_result)
+                                # Pages the model asked for explicitly get the larger page budget
+                                budget = PAGE_BUDGET_TOKENS if names[tool_call_id] == FULL_RESULT_TOOL else None
+                                compacted = compact_tool_result(tool_call_id, names[tool_call_id], tool_result, budget)
+                                full_tokens += compacted.full_tokens
+                                sent_tokens += compacted.tokens
                                 # Add tool response to messages
                                 messages.append({
                                     "role": "tool",
-                                    "tool_call_id": tool_call.id,
-                                    "content": tool_result
+                                    "tool_call_id": tool_call_id,
+                                    "content": compacted.text
                                 })
-                            
+                            if sent_tokens < full_tokens:
+                                st.caption(f"Tool results compacted from {full_tokens:,} to {sent_tokens:,} tokens.")
                             # Continue loop to get next response with tool results
                             continue
                         else:
-                            # No more tool calls, get final response
-                            final_content = assistant_message.content
+                            # No more tool calls, this is the final response
+                            final_content = content
                             break
-                    
-                    # Display final response
-                    if final_content:
-                        # Replace Nansen URLs in final content before displaying
-                        # Only modify the displayed version, keep original in session state for context
-                        displayed_content = replace_nansen_urls_with_dashboard(final_content)
-                        st.markdown(displayed_content)
-                        # Store the modified version in chat messages so links work in chat history too
-                        st.session_state.chat_messages.append({"role": "assistant", "content": displayed_content})
-                    else:
-                        error_msg = "Maximum iterations reached. The assistant may need more tool calls to complete the task."
-                        st.error(error_msg)
-                        st.session_state.chat_messages.append({"role": "assistant", "content": error_msg})
-
-                except Exception as e:
-                    error_msg = f"Error: {str(e)}"
+                    finally:
+                        runner.shutdown()
+
+                # Store final response
+                if final_content:
+                    # Already rendered (with Nansen URLs replaced) while streaming
+                    displayed_content = replace_nansen_urls_with_dashboard(final_content)
+                    # Store the modified version in chat messages so links work in chat history too
+                    st.session_state.chat_messages.append({"role": "assistant", "content": displayed_content})
+                else:
+                    error_msg = "Maximum iterations reached. The assistant may need more tool calls to complete the task."
                     st.error(error_msg)
-                    st.session_state.chat_messages.append({"role": "assistant", "content": error_msg})
\ No newline at end of file
+                    st.session_state.chat_messages.append({"role": "assistant", "content": error_msg})
+
+            except Exception as e:
+                error_msg = f"Error: {str(e)}"
+                st.error(error_msg)
+                st.session_state.chat_messages.append({"role": "assistant", "content": error_msg})
\ No newline at end of file
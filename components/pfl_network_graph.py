@@ -0,0 +1,237 @@
+# components/pfl_network_graph.py
+"""
+Rendering engine for the Profiler's wallet networks (counterparties, related wallets).
+
+Both networks are ego graphs: one target wallet with edges to and from its neighbours.
+Their layout is computed analytically (neighbours on concentric rings, heaviest on the
+inner ring) and cached by graph fingerprint, so reruns don't lay the graph out again.
+Edges and arrowheads are built as NumPy segment arrays and drawn as a handful of WebGL
+line traces (one per colour and width bin) instead of one annotation per edge, which
+keeps the figure responsive from 10 to thousands of neighbours.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import plotly.graph_objects as go
+
+
+FIRST_RING_CAPACITY = 12    # ring r holds FIRST_RING_CAPACITY * r nodes
+LAYOUT_CACHE_SIZE = 128
+MIN_WIDTH_PX, MAX_WIDTH_PX = 1.0, 5.0
+DUAL_DIRECTION_OFFSET = 0.03  # perpendicular shift when both directions of a pair are drawn
+
+
+def short_addr(a: str) -> str:
+    return a[:8] + "…" + a[-4:] if isinstance(a, str) and len(a) > 12 else str(a)
+
+def first_label(x):
+    if isinstance(x, (list, tuple)) and len(x):
+        return str(x[0])
+    if isinstance(x, str) and x:
+        return x
+    return None
+
+
+@dataclass(frozen=True)
+class EgoGraph:
+    """
+    A target wallet and its neighbours. Node index 0 is the center and index i + 1 is
+    nodes[i]; edges are given as src/dst node indexes.
+    """
+    center: str
+    center_label: str
+    nodes: np.ndarray         # neighbour ids
+    labels: np.ndarray        # neighbour display labels
+    weights: np.ndarray       # float; ring order (heaviest innermost) and marker size
+    src: np.ndarray           # int edge source index
+    dst: np.ndarray           # int edge target index
+    edge_weights: np.ndarray  # float; line width
+    edge_cats: np.ndarray     # colour key of each edge
+
+    @property
+    def order(self) -> np.ndarray:
+        """Neighbour positions by descending weight (ties keep their input order)."""
+        return np.argsort(-np.nan_to_num(self.weights.astype("float64")), kind="stable")
+
+    @property
+    def fingerprint(self) -> str:
+        # The layout only depends on the center and the ordered neighbour ids
+        h = hashlib.blake2b(digest_size=16)
+        h.update(str(self.center).encode())
+        for node in self.nodes[self.order]:
+            h.update(b"\x1f")
+            h.update(str(node).encode())
+        return h.hexdigest()
+
+
+# ---------- Layout ----------
+
+_layout_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_layout_lock = threading.Lock()
+
+def _ring_layout(n: int) -> np.ndarray:
+    """(n, 2) positions for ranks 0..n-1 on concentric rings; the outer ring has radius 1."""
+    if n == 0:
+        return np.empty((0, 2))
+    capacities = []
+    while sum(capacities) < n:
+        capacities.append(FIRST_RING_CAPACITY * (len(capacities) + 1))
+    counts = np.array(capacities)
+    counts[-1] -= sum(capacities) - n  # the outer ring is spread over the nodes it actually has
+    ring = np.repeat(np.arange(len(counts)), counts)
+    slot = np.arange(n) - np.repeat(np.cumsum(counts) - counts, counts)
+    per_ring = counts[ring]
+    # Alternate rings are rotated half a slot so spokes don't line up
+    angle = np.pi / 2 + 2 * np.pi * (slot + 0.5 * (ring % 2)) / per_ring
+    radius = (ring + 1) / len(counts)
+    return np.column_stack([radius * np.cos(angle), radius * np.sin(angle)])
+
+def ego_layout(graph: EgoGraph) -> np.ndarray:
+    """(len(nodes) + 1, 2) read-only positions, row 0 = center; cached by fingerprint."""
+    key = graph.fingerprint
+    with _layout_lock:
+        if key in _layout_cache:
+            _layout_cache.move_to_end(key)
+            return _layout_cache[key]
+
+    pos = np.zeros((len(graph.nodes) + 1, 2))
+    pos[graph.order + 1] = _ring_layout(len(graph.nodes))
+    pos.setflags(write=False)
+
+    with _layout_lock:
+        _layout_cache[key] = pos
+        while len(_layout_cache) > LAYOUT_CACHE_SIZE:
+            _layout_cache.popitem(last=False)
+    return pos
+
+
+# ---------- Edge geometry ----------
+
+def edge_widths(values: np.ndarray) -> np.ndarray:
+    """Line widths in px: values clipped to their 5th-95th percentile, mapped to 1-5 px."""
+    w = np.asarray(values, dtype="float64")
+    w = np.where(np.isfinite(w), w, 1.0)
+    if len(w) == 0:
+        return w
+    w_min, w_max = (np.percentile(w, 5), np.percentile(w, 95)) if len(w) > 1 else (w.min(), w.max())
+    if w_max <= w_min + 1e-12:
+        return np.full(len(w), 2.0)
+    return np.interp(np.clip(w, w_min, w_max), [w_min, w_max], [MIN_WIDTH_PX, MAX_WIDTH_PX])
+
+def edge_segments(pos: np.ndarray, src: np.ndarray, dst: np.ndarray, widths: np.ndarray, *,
+                  standoff: float = 0.04, center_standoff: float = 0.08,
+                  head_length: float = 0.025) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Polyline coordinates for every edge and its arrowhead, as (E, 7) x and y arrays:
+    shaft start, shaft end, gap, head left, tip, head right, gap (gaps are NaN).
+    """
+    src = np.asarray(src, dtype="int64")
+    dst = np.asarray(dst, dtype="int64")
+    p0, p1 = pos[src], pos[dst]
+    d = p1 - p0
+    length = np.maximum(np.hypot(d[:, 0], d[:, 1]), 1e-9)
+    u = d / length[:, None]
+    perp = np.column_stack([-u[:, 1], u[:, 0]])
+
+    # Pairs drawn in both directions are pushed apart, each to its own side
+    lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+    _, inverse, counts = np.unique(lo * len(pos) + hi, return_inverse=True, return_counts=True)
+    both = counts[inverse] > 1
+    offset = np.where(both, np.where(src < dst, DUAL_DIRECTION_OFFSET, -DUAL_DIRECTION_OFFSET), 0.0)
+    p0 = p0 + perp * offset[:, None]
+    p1 = p1 + perp * offset[:, None]
+
+    # Stop short of the markers (the center marker is larger)
+    cap = 0.45 * length
+    s0 = np.minimum(np.where(src == 0, center_standoff, standoff), cap)
+    s1 = np.minimum(np.where(dst == 0, center_standoff, standoff), cap)
+    start = p0 + u * s0[:, None]
+    tip = p1 - u * s1[:, None]
+
+    head = (head_length * (0.6 + 0.1 * np.asarray(widths, dtype="float64")))[:, None]
+    base = tip - u * head
+    left = base + perp * head * 0.5
+    right = base - perp * head * 0.5
+
+    gap = np.full(len(src), np.nan)
+    xs = np.column_stack([start[:, 0], tip[:, 0], gap, left[:, 0], tip[:, 0], right[:, 0], gap])
+    ys = np.column_stack([start[:, 1], tip[:, 1], gap, left[:, 1], tip[:, 1], right[:, 1], gap])
+    return xs, ys
+
+
+# ---------- Figure ----------
+
+def ego_network_figure(graph: EgoGraph, *, color_map: Dict[str, str], legend_names: Dict[str, str],
+                       center_size: float = 30, size_range: Tuple[float, float] = (10, 40),
+                       hover: Optional[Sequence[str]] = None, label_top: int = 15) -> go.Figure:
+    """
+    Network figure: one WebGL line trace per (edge colour, width bin), one WebGL marker
+    trace for the nodes, and text labels for the center and the label_top heaviest nodes.
+    """
+    pos = ego_layout(graph)
+    n = len(graph.nodes)
+    traces = []
+
+    if len(graph.src):
+        widths = edge_widths(graph.edge_weights)
+        xs, ys = edge_segments(pos, graph.src, graph.dst, widths)
+        width_bin = np.rint(widths)
+        cats = np.asarray(graph.edge_cats, dtype=object)
+        for cat in sorted(set(cats)):
+            for w in np.unique(width_bin[cats == cat]):
+                sel = (cats == cat) & (width_bin == w)
+                traces.append(go.Scattergl(
+                    x=xs[sel].ravel(), y=ys[sel].ravel(),
+                    mode="lines",
+                    line=dict(color=color_map.get(cat, "#888"), width=float(w)),
+                    hoverinfo="skip",
+                    showlegend=False,
+                ))
+
+    # Legend entries (one per edge colour present)
+    for cat in sorted(set(graph.edge_cats)):
+        traces.append(go.Scatter(
+            x=[None], y=[None], mode="lines",
+            line=dict(color=color_map.get(cat, "#888"), width=3),
+            name=legend_names.get(cat, str(cat).capitalize()),
+        ))
+
+    # Marker area grows with weight; markers shrink as the graph gets denser
+    weights = np.nan_to_num(np.asarray(graph.weights, dtype="float64")).clip(min=0)
+    lo, hi = size_range
+    if n > 50:
+        lo, hi = max(4.0, lo * 50 / n ** 0.75), max(6.0, hi * 50 / n ** 0.75)
+    scale = np.sqrt(weights / weights.max()) if n and weights.max() > 0 else np.zeros(n)
+    sizes = np.concatenate([[center_size], lo + (hi - lo) * scale])
+
+    hovertext = [graph.center_label, *(hover if hover is not None else graph.labels)]
+    traces.append(go.Scattergl(
+        x=pos[:, 0], y=pos[:, 1],
+        mode="markers",
+        hovertext=hovertext, hoverinfo="text",
+        marker=dict(size=sizes, color="#f5f5f5", line=dict(color="#333", width=1)),
+        showlegend=False,
+    ))
+
+    labelled = np.concatenate([[0], graph.order[:label_top] + 1])
+    traces.append(go.Scatter(
+        x=pos[labelled, 0], y=pos[labelled, 1],
+        mode="text",
+        text=[graph.center_label, *graph.labels[graph.order[:label_top]]],
+        textposition="top center",
+        hoverinfo="skip",
+        showlegend=False,
+    ))
+
+    fig = go.Figure(data=traces)
+    fig.update_layout(
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False, scaleanchor="x", scaleratio=1),
+        legend=dict(orientation="h", yanchor="bottom", y=1.08, xanchor="left", x=0),
+        margin=dict(t=100, l=10, r=10, b=10),
+    )
+    return fig
@@ -1,26 +1,10 @@
 import streamlit as st
-from dataframes import single_pnl_summary_to_dataframe
+from loaders.profiler_dataset import ProfilerDataset
 
-@st.cache_data(ttl=300)
-def fetch_profiler_address_pnl_summary(_client, wallet, chain_all, from_iso, to_iso):
-    payload = {
-        "address": wallet,
-        "chain": chain_all,
-        "date": {
-            "from": f"{from_iso}", 
-            "to": f"{to_iso}"
-        },
-    }
-
-    items = _client.profiler_address_pnl_summary(payload=payload)
-    df = single_pnl_summary_to_dataframe(items)
-    
-    return df
-
-def render_portfolio_pnl_metrics(client, wallet, chain_all, from_iso, to_iso):
+def render_portfolio_pnl_metrics(dataset: ProfilerDataset):
 
 
-    df = fetch_profiler_address_pnl_summary(client, wallet, chain_all, from_iso, to_iso)
+    df = dataset.pnl_metrics()
     if df.empty:
         st.warning("No pnl data found.")
         return
@@ -1,25 +1,5 @@
 import streamlit as st
-from dataframes import historical_balances_to_dataframe
-
-@st.cache_data(ttl=300)
-def fetch_historical_balances(_client, wallet, chain, from_iso, to_iso):
-    payload = {
-        "address": wallet,
-        "chain": chain,
-        "date": {
-            "from": from_iso,
-            "to": to_iso
-        },
-        "pagination": {
-            "page": 1,
-            "per_page": 1000
-        },
-    }
-
-    items = _client.profiler_address_historical_balances(payload=payload, fetch_all=True)
-    df = historical_balances_to_dataframe(items)
-    
-    return df
+from loaders.balances import load_balance_panel
 
 def render_portfolio_trends_metrics(client, wallet, chain, from_iso, to_iso):
     """
@@ -32,24 +12,24 @@ def render_portfolio_trends_metrics(client, wallet, chain, from_iso, to_iso):
         from_iso: str, start datetime ISO string
         to_iso: str, end datetime ISO string
     """
-    # Fetch historical balances from Nansen Profiler API
-    df = fetch_historical_balances(client, wallet, chain, from_iso, to_iso)
-    if df.empty:
+    # Historical balances panel shared with the other Profiler components
+    panel = load_balance_panel(client, wallet, chain, from_iso, to_iso)
+    if panel.empty:
         st.warning("No portfolio data found for trend metrics.")
         return
 
     # --- Latest snapshot per token ---
-    snapshot = df.sort_values("block_timestamp").groupby("token_symbol").last()
-    total_value_usd = snapshot["value_usd"].sum()
-    top_token_value = snapshot["value_usd"].max() if not snapshot.empty else 0
+    snapshot = panel.latest()
+    total_value_usd = snapshot.sum()
+    top_token_value = snapshot.max() if not snapshot.empty else 0
     top_token_concentration = (top_token_value / total_value_usd * 100) if total_value_usd > 0 else 0
 
     # --- 30-Day Portfolio Growth ---
     # Sum value across tokens for first and last day
-    df_daily = df.groupby("block_timestamp")["value_usd"].sum().reset_index()
-    if len(df_daily) >= 2:
-        start_val = df_daily.iloc[0]["value_usd"]
-        end_val = df_daily.iloc[-1]["value_usd"]
+    daily = panel.daily_totals()
+    if len(daily) >= 2:
+        start_val = daily.iloc[0]
+        end_val = daily.iloc[-1]
         portfolio_growth_30d = ((end_val - start_val) / start_val * 100) if start_val > 0 else 0
     else:
         portfolio_growth_30d = 0
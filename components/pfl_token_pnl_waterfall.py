@@ -3,25 +3,13 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.graph_objects as go
-from nansen_client import NansenClient
+from loaders.profiler_dataset import ProfilerDataset
 
-@st.cache_data(ttl=300)
-def fetch_profiler_address_pnl_summary(_client, address, chain_all, from_iso, to_iso):
-    payload = {
-        "address": address,
-        "chain": chain_all,
-        "date": {"from": from_iso, "to": to_iso},
-    }
-    items = _client.profiler_address_pnl_summary(payload)
-    df = pd.DataFrame(items.get("top5_tokens", []))
-
-    return df
-
-def render_token_pnl_waterfall(client: NansenClient, address: str, chain_all: str, from_iso: str, to_iso: str):
+def render_token_pnl_waterfall(dataset: ProfilerDataset):
     st.subheader("PnL Drivers")
     st.text("Each bar = token’s realized PnL; up=gains, down=losses (last 30 days).")
     try:
-        top5_df = fetch_profiler_address_pnl_summary(client, address, chain_all, from_iso, to_iso)
+        top5_df = dataset.top_tokens_pnl()
         if top5_df.empty or not {"token_symbol", "realized_pnl"}.issubset(top5_df.columns):
             st.info("We are unable to compute profit & loss (PnL) data for this wallet on the currently selected chain(s).")
             return
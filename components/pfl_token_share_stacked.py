@@ -1,44 +1,33 @@
 # components/pfl_token_share_stacked.py
 import numpy as np
-import pandas as pd
 import streamlit as st
 import plotly.express as px
 from nansen_client import NansenClient
+from loaders.balances import load_balance_panel
 
-@st.cache_data(ttl=300)
-def fetch_historical_balances(_client, address, chain_all, from_iso, to_iso, hide_spam):
-    payload = {
-        "address": address,
-        "chain": chain_all,
-        "filters": {"hide_spam_tokens": hide_spam, "value_usd": {"min": 10}},
-        "date": {"from": from_iso, "to": to_iso},
-        "pagination": { "page": 1,"per_page": 100 }
-    }
-
-    items = _client.profiler_address_historical_balances(payload=payload, fetch_all=True)
-    df = pd.DataFrame(items)
-    
-    return df
+# Holdings below this are dropped as dust
+MIN_VALUE_USD = 10
 
 def render_token_share_stacked(client: NansenClient, address: str, chain_all: str, from_iso: str, to_iso: str, hide_spam: bool = True):
     st.subheader("Token Mix Over Time")
     st.text("100% stacked area (holdings > $10 only to remove dust); band thickness = daily portfolio share.")
 
     try:
-        df = fetch_historical_balances(client, address, chain_all, from_iso, to_iso, hide_spam)
+        panel = load_balance_panel(client, address, chain_all, from_iso, to_iso, hide_spam)
+        wide = panel.wide(min_value_usd=MIN_VALUE_USD)
 
-        if df.empty:
+        if wide.empty or wide.shape[1] == 0:
             st.info("No historical balances found for the selected date range.")
             return
 
-        df["block_timestamp"] = pd.to_datetime(df["block_timestamp"], errors="coerce").dt.floor("D")
-        g = (df.groupby(["block_timestamp", "token_symbol"], as_index=False)["value_usd"]
-                .sum().rename(columns={"value_usd": "value_usd_token"}))
-        g["value_usd_token"] = pd.to_numeric(g["value_usd_token"], errors="coerce").fillna(0.0)
-
-        totals = g.groupby("block_timestamp", as_index=False)["value_usd_token"].sum() \
-                  .rename(columns={"value_usd_token": "total_usd"})
-        g = g.merge(totals, on="block_timestamp", how="left")
+        totals = wide.sum(axis=1)
+        g = (
+            wide.reset_index()
+            .melt(id_vars="day", var_name="token_symbol", value_name="value_usd_token")
+            .dropna(subset=["value_usd_token"])
+            .rename(columns={"day": "block_timestamp"})
+        )
+        g["total_usd"] = g["block_timestamp"].map(totals)
         g["pct_share"] = np.where(g["total_usd"] > 0, 100 * g["value_usd_token"] / g["total_usd"], 0.0)
 
         fig = px.area(
@@ -1,80 +1,121 @@
 # components/pfl_transactions_log_hist.py
+import time
 import numpy as np
 import pandas as pd
 import streamlit as st
-import plotly.express as px
 import plotly.graph_objects as go
 from nansen_client import NansenClient
+from analytics.distribution import LogSketch, rebin, silverman_bandwidth, binned_kde
+import warehouse
+
+# 1000 pages of 100 = 100k transactions; beyond that the distribution is marked partial
+MAX_PAGES = 1000
+# Wall-clock budget for the page stream; the Profiler's prefetch waits on it before rendering
+TIME_BUDGET_S = 12.0
+# Pages buffered per warehouse write
+PERSIST_EVERY_PAGES = 20
 
 @st.cache_data(ttl=300)
-def fetch_profiler_address_transactions(_client, address, chain_tx, from_iso, to_iso):
+def fetch_trade_size_distribution(address, chain_tx, from_iso, to_iso, max_pages=MAX_PAGES,
+                                  time_budget_s=TIME_BUDGET_S):
+    """
+    Trade-size sketch of the wallet's transactions in [from_iso, to_iso] (the Profiler's
+    30-day window), newest first. "stopped" is None when every page was read, otherwise
+    "max_pages" or "time_budget".
+    """
+    deadline = time.perf_counter() + time_budget_s
     payload = {
         "address": address,
         "chain": chain_tx,
         "date": {"from": from_iso, "to": to_iso},
         "order_by": [{"field": "block_timestamp", "direction": "DESC"}],
-        "pagination": {"page": 1, "per_page": 20},
+        "pagination": {"page": 1, "per_page": 100},
     }
 
-    items = _client.profiler_address_transactions(payload, n=5)
-    df = pd.DataFrame(items)
+    # Each page is folded into the sketch, then dropped once its batch is in the warehouse.
+    # A plain client: pages are never shared, so they skip the page run's coalescing client.
+    client = NansenClient()
+    sketch = LogSketch()
+    pages, stopped = 0, None
+    batch = []
+    for response in client.profiler_address_transactions_pages(payload, max_pages=max_pages):
+        items = response.get("data", [])
+        pages += 1
+        if items:
+            page = pd.DataFrame(items)
+            if "volume_usd" in page.columns:
+                sketch.add(pd.to_numeric(page["volume_usd"], errors="coerce").to_numpy(dtype="float64"))
+            batch.append(page)
+            if len(batch) >= PERSIST_EVERY_PAGES:
+                warehouse.persist("transactions", pd.concat(batch, ignore_index=True), chain=chain_tx, address=address)
+                batch = []
+        if response["pagination"]["is_last_page"] is True:
+            break
+        if pages >= max_pages:
+            stopped = "max_pages"
+            break
+        if time.perf_counter() > deadline:
+            stopped = "time_budget"
+            break
+    if batch:
+        warehouse.persist("transactions", pd.concat(batch, ignore_index=True), chain=chain_tx, address=address)
 
-    return df
+    return {"sketch": sketch, "pages": pages, "stopped": stopped}
 
-def render_transactions_log_hist(client: NansenClient, address: str, chain_tx: str, from_iso: str, to_iso: str):
+def render_transactions_log_hist(address: str, chain_tx: str, from_iso: str, to_iso: str):
     st.text("Log-scaled USD/transaction with mean & median lines; shows small-vs-whale mix.")
 
     try:
-        df = fetch_profiler_address_transactions(client, address, chain_tx, from_iso, to_iso)
-        if df.empty or "volume_usd" not in df.columns:
-            st.info("No transactions found to plot.")
-            return
-
-        df["volume_usd"] = pd.to_numeric(df["volume_usd"], errors="coerce")
-        x = df["volume_usd"].replace(0, np.nan).dropna()
-        x = x[x > 0]
-        if x.empty:
-            st.info("No non-zero transaction volumes available.")
+        result = fetch_trade_size_distribution(address, chain_tx, from_iso, to_iso)
+        sketch = result["sketch"]
+        if sketch.count == 0:
+            st.info("No transactions with a non-zero USD volume found to plot.")
             return
 
-        mean_v = float(x.mean())
-        median_v = float(x.median())
-        m1, m2 = st.columns(2)
+        mean_v = sketch.mean
+        median_v = sketch.quantile(0.5)
+        m1, m2, m3, m4 = st.columns(4)
         m1.metric("Mean", f"${mean_v:,.0f}")
         m2.metric("Median", f"${median_v:,.0f}")
+        m3.metric("P90", f"${sketch.quantile(0.9):,.0f}")
+        m4.metric("P99", f"${sketch.quantile(0.99):,.0f}")
 
-        df_hist = pd.DataFrame({"volume_usd": x})
-        df_hist["log10_volume"] = np.log10(df_hist["volume_usd"])
+        centers, counts, width = sketch.log_bins()
+        z_min, z_max = float(np.log10(sketch.min)), float(np.log10(sketch.max))
 
-        nb = min(30, max(10, int(np.sqrt(len(df_hist)))))
+        nb = min(30, max(10, int(np.sqrt(sketch.count))))
+        edges = np.linspace(z_min - width / 2, z_max + width / 2, nb + 1)
+        hist = rebin(centers, counts, edges)
+        density = hist / (sketch.count * np.diff(edges))
 
-        fig = px.histogram(df_hist, x="log10_volume", nbins=nb, histnorm="probability density")
-        lo = float(np.floor(df_hist["log10_volume"].min()))
-        hi = float(np.ceil(df_hist["log10_volume"].max()))
+        fig = go.Figure(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2, y=density, width=np.diff(edges),
+            name="Transactions", hovertemplate="10^%{x:.2f} USD<br>Density: %{y:.3f}<extra></extra>",
+        ))
+        lo = float(np.floor(z_min))
+        hi = float(np.ceil(z_max))
         tick_vals = list(np.arange(lo, hi + 1))
-        tick_text = [f"10^{k}" if abs(k) > 2 else f"{10**k:g}" for k in tick_vals]
+        tick_text = [f"10^{k:g}" if abs(k) > 2 else f"{10**k:g}" for k in tick_vals]
 
         fig.update_xaxes(tickmode="array", tickvals=tick_vals, ticktext=tick_text, type="linear")
         fig.update_layout(xaxis_title="Transaction Value (USD, log scale)", yaxis_title="Density",
-                          margin=dict(t=30, l=10, r=10, b=10))
+                          bargap=0, margin=dict(t=30, l=10, r=10, b=10))
         fig.add_vline(x=np.log10(mean_v), line_dash="dash", annotation_text=f"Mean: {mean_v:,.0f}")
         fig.add_vline(x=np.log10(median_v), line_dash="solid", annotation_text=f"Median: {median_v:,.0f}")
 
-        z = df_hist["log10_volume"].values
-        n = len(z)
-        if n >= 2:
-            std = np.std(z)
-            iqr = np.subtract(*np.percentile(z, [75, 25]))
-            sigma = std if (iqr <= 0 or std <= 0) else min(std, iqr / 1.34)
-            h = 0.9 * sigma * (n ** (-1 / 5)) if sigma > 0 else 0.1
-            h = max(h, 1e-3)
-
-            grid = np.linspace(z.min() - 0.25, z.max() + 0.25, 256)
-            diff = (grid[:, None] - z[None, :]) / h
-            kde_vals = (np.exp(-0.5 * diff ** 2).sum(axis=1) / (n * h * np.sqrt(2 * np.pi)))
+        if sketch.count >= 2:
+            grid, kde_vals = binned_kde(centers, counts, width, silverman_bandwidth(sketch))
             fig.add_trace(go.Scatter(x=grid, y=kde_vals, mode="lines", name="KDE", hoverinfo="skip"))
 
         st.plotly_chart(fig, width='stretch')
+        stopped = {
+            "max_pages": f" (stopped at {MAX_PAGES:,} pages; older transactions not included)",
+            "time_budget": f" (stopped at the {TIME_BUDGET_S:g}s time budget; older transactions not included)",
+        }.get(result["stopped"], "")
+        st.caption(
+            f"{sketch.count:,} transactions in the last 30 days from {result['pages']:,} pages{stopped}"
+            + f". Percentiles are within ±{sketch.relative_accuracy:.0%}."
+        )
 
     except Exception as e:
         st.error(f"Failed to load Transaction Size Distribution: {e}")
@@ -1,9 +1,10 @@
 import streamlit as st
-from typing import Dict, List, Tuple
-import pandas as pd
+from typing import List
 from datetime import datetime, timezone, timedelta
 from nansen_client import NansenClient
-from dataframes import pfl_transactions_to_dataframe, tgm_token_screener_to_dataframe, format_small_price
+from dataframes import format_small_price
+from loaders.tracker import load_tracker_data
+from loaders.wallet_watcher import get_wallet_watcher
 import re
 
 
@@ -58,50 +59,6 @@ def parse_formatted_price(price_str: str) -> float:
     except (ValueError, TypeError):
         return 0.0
 
-@st.cache_data(ttl=300)
-def fetch_transactions(_client, wallet, from_iso, to_iso):
-    transaction_payload = {
-        "address": wallet,
-        "chain": "ethereum",
-        "date": {"from": from_iso,
-                "to": to_iso},
-        "hide_spam_token": True,
-        "order_by": [{"field": "block_timestamp", "direction": "DESC"}],
-        "pagination": {"page": 1, "per_page": 20},
-    }
-
-    transaction_items = _client.profiler_address_transactions(payload=transaction_payload)
-    transaction_df = pfl_transactions_to_dataframe(transaction_items)
-
-    return transaction_df
-
-@st.cache_data(ttl=300)
-def fetch_token_screener(_client, chain, from_iso, to_iso, token_address):
-    token_payload = {
-        "chains": [chain],
-        "date": {"from": from_iso, "to":to_iso},
-        "filters": {"token_address": token_address},
-        "pagination": {"page": 1, "per_page": 1},
-    }
-    token_items = _client.tgm_token_screener(payload=token_payload)
-    token_df = tgm_token_screener_to_dataframe(token_items)
-
-    return token_df
-
-@st.cache_data(ttl=300)
-def fetch_current_balance(_client, chain, wallet, token_address):
-    balance_payload = {
-        "chain": chain,
-        "address": wallet,
-        "filters": {"token_address": token_address},
-        "pagination": {"page": 1, "recordsPerPage": 1},
-    }
-    balance_items = _client.profiler_address_current_balance(balance_payload)
-    balance_df = pd.DataFrame(balance_items)
-
-    return balance_df
-
-
 @st.fragment
 def render_wallet_token_tracker(wallets: List): 
     try:
@@ -113,71 +70,18 @@ def render_wallet_token_tracker(wallets: List):
             client = NansenClient()
             starred_wallets = wallets
 
-            eth_swap_in_methods = ["swapExactTokensForTokens", "swapTokensForExactTokens",
-                                "swapExactETHForTokens", "swapETHForExactTokens",
-                                "swapExactTokensForTokensSupportingFeeOnTransferTokens",
-                                "swapExactETHForTokensSupportingFeeOnTransferTokens",
-                                ]
-            eth_swap_out_methods = ["swapTokensForExactETH", "swapExactTokensForETH",                                
-                                    "swapExactTokensForETHSupportingFeeOnTransferTokens"
-            ]
-
-            to_time = datetime.now(timezone.utc)
+            # Minute resolution so reruns within a minute hit every stage's cache
+            to_time = datetime.now(timezone.utc).replace(second=0, microsecond=0)
             from_time = to_time - timedelta(hours=48)
             from_iso = from_time.isoformat().replace("+00:00", "Z")
             to_iso = to_time.isoformat().replace("+00:00", "Z")
-            token_tx_map: Dict[Tuple[str, str], Dict[Tuple[str, str], List[Dict]]] = {}
-
-            for wallet in starred_wallets:
-                transaction_df = fetch_transactions(client, wallet, from_iso, to_iso)
-                if transaction_df.empty:
-                    st.warning("No net flow data returned for the selected filters.")
-                    return
-            
-                transaction_df["method"] = transaction_df["method"].apply(
-                    lambda m: m.split("(")[0]
-                )
-                swap_in_df = transaction_df[transaction_df["method"].isin(eth_swap_in_methods)].copy()
-                swap_out_df = transaction_df[transaction_df["method"].isin(eth_swap_out_methods)].copy()
 
-                for _, row in swap_in_df.iterrows():
-                    tokens_received = row.get("tokens_received", [])
-                    for token in tokens_received:
-                        token_address = token.get("token_address")
-                        token_chain = token.get("chain")
-                        if not token_address or not token_chain:
-                            continue
-                        token_key = (token_address, token_chain)
-                        wallet_label = token.get("to_address_label", "")
-                        wallet_key = (wallet, wallet_label)
-                        token_tx_map.setdefault(token_key, {}).setdefault(wallet_key, []).append({
-                            "token_symbol": token.get("token_symbol", ""),
-                            "token_amount": token.get("token_amount"),
-                            "block_timestamp": row["block_timestamp"],
-                            "transaction_hash": row["transaction_hash"],
-                            "transaction_type": "receive"
-                        })
+            # Wallets with no swaps and tokens Nansen has no data on are skipped, not fatal
+            data = load_tracker_data(client, starred_wallets, from_iso, to_iso)
+            token_tx_map = data.token_tx_map
 
-                for _, row in swap_out_df.iterrows():
-                    tokens_sent = row.get("tokens_sent", [])
-                    for token in tokens_sent:
-                        token_address = token.get("token_address")
-                        token_chain = token.get("chain")
-                        if not token_address or not token_chain:
-                            continue
-                        token_key = (token_address, token_chain)
-                        wallet_label = token.get("from_address_label", "")
-                        wallet_key = (wallet, wallet_label)
-                        token_tx_map.setdefault(token_key, {}).setdefault(wallet_key, []).append({
-                            "token_symbol": token.get("token_symbol", ""),
-                            "token_amount": token.get("token_amount"),
-                            "block_timestamp": row["block_timestamp"],
-                            "transaction_hash": row["transaction_hash"],
-                            "transaction_type": "sent"
-                        })
-            
             if not token_tx_map:
-                st.warning("No relevant transactions found for the starred wallets in the last 24 hours.")
+                st.warning("No relevant transactions found for the starred wallets in the last 48 hours.")
                 return
 
             token_cards = []
@@ -185,12 +89,11 @@ def render_wallet_token_tracker(wallets: List):
             wallet_labels_map = {}
 
             for (token_address, chain), wallet_map in token_tx_map.items():
-                token_df = fetch_token_screener(client, chain, from_iso, to_iso, token_address)
+                token_df = data.screener.get((token_address, chain))
 
                 # WARN: For now, check if token_symbol is empty to detect shitcoin that Nansen does not have data on 
-                if token_df.empty or token_df.iloc[0].get("token_symbol") == '':
-                    st.warning("No net flow data returned for the selected filters.")
-                    return
+                if token_df is None or token_df.empty or token_df.iloc[0].get("token_symbol") == '':
+                    continue
                 
                 token_row = token_df.iloc[0]
                 token_symbol = token_row.get("token_symbol", "Unknown")
@@ -208,9 +111,7 @@ def render_wallet_token_tracker(wallets: List):
                     if wallet_label not in wallet_labels_map:
                         wallet_labels_map[wallet_label] = wallet 
 
-                    balance_df = fetch_current_balance(client, chain, wallet, token_address)
-                    
-                    token_balance_value = balance_df["value_usd"].iloc[0] if not balance_df.empty else 0
+                    token_balance_value = data.balance_usd(wallet, token_address, chain)
 
                     tx_count_received = sum(1 for tx in tx_list if tx["transaction_type"] == "receive")
                     tx_count_sent = sum(1 for tx in tx_list if tx["transaction_type"] == "sent")
@@ -266,6 +167,10 @@ def render_wallet_token_tracker(wallets: List):
                 """
                 token_cards.append(token_card_html)
 
+            if not token_cards:
+                st.warning("No token data returned for the starred wallets' recent swaps.")
+                return
+
             col1, col2, col3, col4 = st.columns([2, 1, 2, 1])
             with col1:
                 selected_token = st.selectbox("Select a token", list(token_symbols_map.keys()), index=0, label_visibility="hidden", key="tracker_token")
@@ -297,6 +202,11 @@ def render_wallet_token_tracker(wallets: List):
                 """,
                 unsafe_allow_html=True,
             )
+
+            with st.expander("Pipeline timings"):
+                st.dataframe(data.timings_df(), hide_index=True, width='stretch')
+                st.caption("Wallet watcher (polls only for new transactions)")
+                st.dataframe(get_wallet_watcher().stats(), hide_index=True, width='stretch')
         
     except Exception as e:
         st.error(f"Unexpected error: {e}")
\ No newline at end of file
@@ -1,11 +1,49 @@
 from datetime import datetime as dt, timedelta
+from typing import Dict, Optional, Tuple
+import pandas as pd
 from nansen_client import NansenClient
-from dataframes import tgm_dex_trades_to_dataframe
 import streamlit as st
 import plotly.graph_objects as go
 
-@st.cache_data(ttl=300)
-def fetch_trades(chain, token_address, from_date, to_date, only_smart_money):
+# Pages (of 1000 trades) streamed for the all-trades count before it is extrapolated instead.
+MAX_COUNT_PAGES = 20
+
+PERIODS = {
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+
+def period_dates(period: str):
+    """(from_date, to_date) as YYYY-MM-DD for a gauge period; shared with the TGM prefetch."""
+    to_date = dt.today().strftime('%Y-%m-%d')
+    from_date = (dt.today() - PERIODS[period]).strftime('%Y-%m-%d')
+    return from_date, to_date
+
+def _extrapolate_count(stats: Dict, from_date: str, to_date: str) -> Dict:
+    """
+    Turn streamed page stats into counts. When paging stopped early the total is scaled by
+    the share of the date range the streamed (block_timestamp ASC) trades cover.
+    """
+    counts = {
+        "count": stats["count"],
+        "distinct_traders": stats["distinct"].get("trader_address", 0),
+        "pages": stats["pages"],
+        "is_estimate": False,
+    }
+    if stats["complete"] or not stats["first_time"] or not stats["last_time"]:
+        return counts
+
+    start = max(pd.Timestamp(from_date, tz="UTC"), pd.to_datetime(stats["first_time"], utc=True))
+    end = min(pd.Timestamp(to_date, tz="UTC") + pd.Timedelta(days=1), pd.Timestamp.now(tz="UTC"))
+    covered = (pd.to_datetime(stats["last_time"], utc=True) - start) / (end - start) if end > start else 0
+    if covered > 0:
+        counts["count"] = int(round(stats["count"] / min(covered, 1.0)))
+    counts["is_estimate"] = True
+    return counts
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_trade_counts(chain, token_address, from_date, to_date, only_smart_money, max_pages: Optional[int] = None):
     # Initialize client
     client = NansenClient()
                     
@@ -19,20 +57,21 @@ def fetch_trades(chain, token_address, from_date, to_date, only_smart_money):
         "order_by": [{"field": "block_timestamp", "direction": "ASC"}],
     }
                 
-    # Fetch data from Nansen API
-    trades_items = client.tgm_dex_trades(payload, fetch_all=True)
-    df = tgm_dex_trades_to_dataframe(trades_items)
+    # Stream pages keeping only the trade count and distinct traders
+    stats = client.tgm_dex_trades_stats(payload, distinct=("trader_address",), max_pages=max_pages)
     
-    return df
+    return _extrapolate_count(stats, from_date, to_date)
 
 @st.fragment
-def render_gauge_charts(token_address: str, chain: str, period: str):
+def render_gauge_charts(token_address: str, chain: str, period: str,
+                        dates: Optional[Tuple[str, str]] = None):
     """
     Fragment that renders two gauge charts:
     1st gauge: % of transactions by smart money
     2nd gauge: % of unique addresses out of the smart money transactions
     
     Stores results in session state instead of returning values.
+    dates: the run's period_dates(period), shared with the TGM prefetch; computed here if not given.
     """
     
     st.subheader("% of Smart Money Transactions")
@@ -41,6 +80,7 @@ def render_gauge_charts(token_address: str, chain: str, period: str):
     total_trades = 0
     smart_trades = 0
     unique_smart_addresses = 0
+    total_is_estimate = False
     gauge_1_value = 0
     gauge_2_value = 0
     has_data = False
@@ -51,28 +91,22 @@ def render_gauge_charts(token_address: str, chain: str, period: str):
             # Show loading spinner during data fetch
             with st.spinner("Fetching Smart Money data..."):
                 # Period validation
-                period_mapping = {
-                    "24h": timedelta(hours=24),
-                    "7d": timedelta(days=7),
-                    "30d": timedelta(days=30),
-                }
-                
-                if period not in period_mapping:
-                    valid_periods = ", ".join(period_mapping.keys())
+                if period not in PERIODS:
+                    valid_periods = ", ".join(PERIODS.keys())
                     st.error(f"❌ Invalid period: {period}. Must be one of: {valid_periods}")
                 else:
                     # Calculate date range
-                    to_date = dt.today().strftime('%Y-%m-%d')
-                    from_date = (dt.today() - period_mapping[period]).strftime('%Y-%m-%d')
+                    from_date, to_date = dates or period_dates(period)
                     
-                    # Convert to dataframes
-                    df_all = fetch_trades(chain, token_address, from_date, to_date, False)
-                    df_smart = fetch_trades(chain, token_address, from_date, to_date, True)
+                    # Count trades page by page; the all-trades total may be extrapolated
+                    all_counts = fetch_trade_counts(chain, token_address, from_date, to_date, False, MAX_COUNT_PAGES)
+                    smart_counts = fetch_trade_counts(chain, token_address, from_date, to_date, True)
                     
                     # Calculate metrics
-                    total_trades = len(df_all)
-                    smart_trades = len(df_smart)
-                    unique_smart_addresses = df_smart["trader_address"].nunique() if len(df_smart) > 0 else 0
+                    total_trades = max(all_counts["count"], smart_counts["count"])
+                    total_is_estimate = all_counts["is_estimate"]
+                    smart_trades = smart_counts["count"]
+                    unique_smart_addresses = smart_counts["distinct_traders"]
                     
                     # Calculate gauge values
                     gauge_1_value = (smart_trades / total_trades * 100) if total_trades > 0 else 0
@@ -123,7 +157,7 @@ def render_gauge_charts(token_address: str, chain: str, period: str):
     
     if has_data:
         st.caption(
-            f"📊 {smart_trades:,} of {total_trades:,} dex trades in the last {period} were by smart money"
+            f"📊 {smart_trades:,} of {'~' if total_is_estimate else ''}{total_trades:,} dex trades in the last {period} were by smart money"
         )
     
     # Second Gauge - only shows if first gauge is not 0
@@ -151,6 +185,7 @@ def render_gauge_charts(token_address: str, chain: str, period: str):
     st.session_state.gauge_data = {
         "smart_money_percentage": round(gauge_1_value, 2),
         "total_transactions": total_trades,
+        "total_is_estimate": total_is_estimate,
         "smart_money_transactions": smart_trades,
         "unique_smart_addresses": unique_smart_addresses,
         "period": period,
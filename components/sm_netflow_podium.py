@@ -1,38 +1,13 @@
 import streamlit as st
 import plotly.graph_objects as go
-from nansen_client import NansenClient
-from dataframes import net_flow_to_dataframe
-
-@st.cache_data(ttl=300)
-def fetch_netflows(chains, min_mc, max_mc, excl_labels):
-    client = NansenClient()
-    if "all" in chains:
-        chains = ["all"]
-    payload = {
-        "chains": chains,
-        "filters": {
-            "include_stablecoins": False,
-            "include_native_tokens": False,
-            "market_cap_usd": {
-                "min": min_mc, 
-                "max": max_mc
-            },
-            "exclude_smart_money_labels": excl_labels,
-        },
-        "pagination": {"page": 1, "per_page": 100},
-        "order_by": [{"field": "net_flow_24h_usd", "direction": "DESC"}],
-    }
-
-    items = client.smart_money_netflow(payload=payload)
-    df = net_flow_to_dataframe(items)
-
-    return df
+from loaders.smart_money import get_snapshot
 
 @st.fragment
 def render_netflow_podium(chains: list, min_mc: int, max_mc: int, excl_labels: list):
 
     try:
-        df = fetch_netflows(chains, min_mc, max_mc, excl_labels)
+        # Filters are applied locally to the shared snapshot for this label-exclusion set
+        df = get_snapshot("netflow", excl_labels).query(chains, min_mc, max_mc)
         if df.empty:
             st.warning("No net flow data returned for the selected filters.")
             return
@@ -1,35 +1,12 @@
 import streamlit as st
 import plotly.graph_objects as go
-from nansen_client import NansenClient
-from dataframes import dex_trades_to_dataframe
-
-@st.cache_data(ttl=300)
-def fetch_dex_trades(chains, min_mc, max_mc, excl_labels):
-    client = NansenClient()
-    if "all" in chains:
-        chains = ["all"]
-    payload = {
-        "chains": chains,
-        "filters": {
-            "token_bought_market_cap": {
-                "min": min_mc, 
-                "max": max_mc
-            },
-            "exclude_smart_money_labels": excl_labels,
-        },
-        "pagination": {"page": 1, "per_page": 100},
-        "order_by": [{"field": "trade_value_usd", "direction": "DESC"}],
-    }
-
-    items = client.smart_money_dex_trades(payload=payload)
-    df = dex_trades_to_dataframe(items)
-
-    return df
+from loaders.smart_money import get_snapshot
 
 @st.fragment
 def render_dex_trades_podium(chains: list, min_mc: int, max_mc: int, excl_labels: list):
     try:
-        df = fetch_dex_trades(chains, min_mc, max_mc, excl_labels)
+        # Filters are applied locally to the shared snapshot for this label-exclusion set
+        df = get_snapshot("dex_trades", excl_labels).query(chains, min_mc, max_mc)
         if df.empty:
             st.warning("No DEX trades data returned for the selected filters.")
             return
@@ -23,6 +23,7 @@ def prepare_summary_data() -> Optional[Dict[str, Any]]:
         summary_data["smart_money_metrics"] = {
             "smart_money_percentage": gauge_data.get("smart_money_percentage", 0),
             "total_transactions": gauge_data.get("total_transactions", 0),
+            "total_transactions_is_estimate": gauge_data.get("total_is_estimate", False),
             "smart_money_transactions": gauge_data.get("smart_money_transactions", 0),
             "unique_smart_addresses": gauge_data.get("unique_smart_addresses", 0),
             "period": gauge_data.get("period", "")
@@ -1,12 +1,15 @@
 import streamlit as st
 import pandas as pd
+import requests
 from datetime import datetime as dt
 
 import plotly.graph_objects as go
 from nansen_client import NansenClient
-from dataframes import tgm_dex_trades_to_dataframe
+from dataframes import tgm_dex_trades_to_dataframe, hourly_trade_activity
+from dataset_cache import shared_dataset
+import warehouse
 
-@st.cache_data(ttl=300)
+@shared_dataset(ttl=300, show_spinner=False)
 def fetch_tgm_dex_trades(chain, token_address):
     client = NansenClient()
     DATE_TO = dt.today().strftime('%Y-%m-%d') # today
@@ -32,8 +35,17 @@ def fetch_tgm_dex_trades(chain, token_address):
         ]
     }
 
-    items = client.tgm_dex_trades(payload, fetch_all=True)
+    try:
+        items = client.tgm_dex_trades(payload, fetch_all=True)
+    except requests.exceptions.RequestException:
+        # API unavailable: reload the persisted trades for the same window if there are any
+        df = warehouse.load("tgm_dex_trades", chain=chain, date_from=DATE_FROM, date_to=DATE_TO,
+                            where={"token_address": token_address})
+        if df.empty:
+            raise
+        return df.drop(columns=["date"], errors="ignore").sort_values("block_timestamp", ignore_index=True)
     df = tgm_dex_trades_to_dataframe(items)
+    warehouse.persist("tgm_dex_trades", df, chain=chain)
     
     return df
 
@@ -84,16 +96,10 @@ def render_dex_trades_hourly(chain: str, token_address: str):
                 # Filter for transactions in the last 24 hours
                 latest_time = df['block_timestamp'].max()
                 last_24h = latest_time - pd.Timedelta(hours=24)
-                df_24h = df[df['block_timestamp'] >= last_24h].copy()
-
-                # Simplify block_timestamp to just date and hour
-                df_24h['hour'] = df_24h['block_timestamp'].dt.hour
+                df_24h = df[df['block_timestamp'] >= last_24h]
 
                 # Aggregate: count transactions and sum traded_token_amount per hour
-                hourly_agg = df_24h.groupby(['hour']).agg(
-                    transactions_count=('block_timestamp', 'count'),
-                    traded_token_amount=('traded_token_amount', 'sum')
-                ).reset_index()
+                hourly_agg = hourly_trade_activity(df, hours=24)
                 
                 # Store summarized data for AI summary
                 st.session_state.tgm_dex_trades_summary = {
@@ -3,52 +3,7 @@ import plotly.express as px
 import requests
 import pandas as pd
 
-from nansen_client import NansenClient
-from dataframes import holders_to_dataframe
-
-@st.cache_data(ttl=300)
-def fetch_holders(chain, token_address, aggregate_by_entity):
-    client = NansenClient()
-
-    payload = {
-        "chain": chain,
-        "token_address": token_address,
-        "aggregate_by_entity": aggregate_by_entity,
-        "label_type": "all_holders",
-        "pagination": {
-            "page": 1,
-            "per_page": 10 
-        },
-        "filters": {
-            "include_smart_money_labels": [
-            "30D Smart Trader",
-            "Fund",
-            "90D Smart Trader",
-            "180D Smart Trader", 
-            "Smart Trader"
-                ],
-            "ownership_percentage": {
-            "min": 0.001
-            },
-            "token_amount": {
-            "min": 1000
-            },
-            "value_usd": {
-            "min": 10000
-            }
-        },
-        "order_by": [
-            {
-            "field": "ownership_percentage",
-            "direction": "DESC"
-            }
-        ]
-    }
-
-    items = client.tgm_holders(payload, fetch_all=True)
-    df = holders_to_dataframe(items)
-    
-    return df
+from loaders.holders import load_holders
 
 @st.fragment
 def render_holders_donut_chart(chain: str, token_address: str, aggregate_by_entity: bool):
@@ -81,39 +36,18 @@ def render_holders_donut_chart(chain: str, token_address: str, aggregate_by_enti
     else:
         try:
             # holder_types = ['smart_money', 'exchange', 'whale', 'public_figure', 'all_holders']
-            df = fetch_holders(chain, token_address, aggregate_by_entity)
+            holders = load_holders(chain, token_address, aggregate_by_entity)
 
-            if df.empty:
+            if holders.empty:
                 st.warning("No holder distribution data returned for the selected filters.")
             else:
+                df = holders.by_ownership()
+
+                # Per-label aggregates, shared by the AI summary and the donuts below
+                by_type = holders.by_type()
+
                 # Store summarized data for AI summary
-                holder_types = df['holder_type'].unique()
-                holder_distribution = {}
-                for htype in holder_types:
-                    htype_df = df[df['holder_type'] == htype]
-                    holder_distribution[htype] = {
-                        "count": int(htype_df['address'].nunique()),
-                        "total_value_usd": float(htype_df['value_usd'].sum()) if 'value_usd' in htype_df.columns else 0,
-                        "avg_ownership_pct": float(htype_df['ownership_percentage'].mean()) if 'ownership_percentage' in htype_df.columns else 0,
-                        "total_token_amount": float(htype_df['token_amount'].sum()) if 'token_amount' in htype_df.columns else 0,
-                    }
-                
-                # Top 5 holders
-                top_5_holders = df.nlargest(5, 'value_usd')[
-                    ['address_label', 'value_usd', 'ownership_percentage', 'holder_type']
-                ].to_dict('records')
-                
-                # Concentration metrics
-                top_10_ownership = float(df.nlargest(10, 'ownership_percentage')['ownership_percentage'].sum()) if len(df) >= 10 else float(df['ownership_percentage'].sum())
-                
-                st.session_state.tgm_holders_summary = {
-                    "total_holders": len(df),
-                    "holder_distribution": holder_distribution,
-                    "top_5_holders": top_5_holders,
-                    "concentration": {
-                        "top_10_ownership_pct": top_10_ownership
-                    }
-                }
+                st.session_state.tgm_holders_summary = holders.summary()
                 
                 df_display = df.copy()
 
@@ -155,20 +89,17 @@ def render_holders_donut_chart(chain: str, token_address: str, aggregate_by_enti
                 donut_cols = st.columns(3)
         
                 # 1. Distribution of number of unique addresses by label
-                address_counts = df.groupby('holder_type')['address'].nunique().reset_index()
-                fig1 = px.pie(address_counts, names='holder_type', values='address', hole=0.5,
+                fig1 = px.pie(by_type, names='holder_type', values='address', hole=0.5,
                             title='Unique Addresses by Label')
                 donut_cols[0].plotly_chart(fig1, width='stretch')
 
                 # 2. Aggregated token_amount by label
-                token_amounts = df.groupby('holder_type')['token_amount'].sum().reset_index()
-                fig2 = px.pie(token_amounts, names='holder_type', values='token_amount', hole=0.5,
+                fig2 = px.pie(by_type, names='holder_type', values='token_amount', hole=0.5,
                             title='Aggregated Token Amount by Label')
                 donut_cols[1].plotly_chart(fig2, width='stretch')
 
                 # 3. Aggregated total_inflow by label
-                inflows = df.groupby('holder_type')['total_inflow'].sum().reset_index()
-                fig3 = px.pie(inflows, names='holder_type', values='total_inflow', hole=0.5,
+                fig3 = px.pie(by_type, names='holder_type', values='total_inflow', hole=0.5,
                             title='Aggregated Total Inflow by Label')
                 donut_cols[2].plotly_chart(fig3, width='stretch')
         except requests.exceptions.HTTPError as http_err:
@@ -1,60 +1,14 @@
-from typing import Dict
 import streamlit as st
 import plotly.express as px 
-from nansen_client import NansenClient
-from dataframes import holders_to_dataframe
+from loaders.holders import load_holders
 import pandas as pd
 import plotly.graph_objects as go
 
-@st.cache_data(ttl=300)
-def fetch_holders(chain, token_address, aggregate_by_entity):
-    client = NansenClient()
-
-    payload = {
-        "chain": chain,
-        "token_address": token_address,
-        "aggregate_by_entity": aggregate_by_entity,
-        "label_type": "all_holders",
-        "pagination": {
-            "page": 1,
-            "per_page": 100
-        },
-        "filters": {
-            "include_smart_money_labels": [
-            "30D Smart Trader",
-            "Fund",
-            "90D Smart Trader",
-            "180D Smart Trader", 
-            "Smart Trader"
-                ],
-            "ownership_percentage": {
-            "min": 0.001
-            },
-            "token_amount": {
-            "min": 1000
-            },
-            "value_usd": {
-            "min": 10000
-            }
-        },
-        "order_by": [
-            {
-            "field": "ownership_percentage",
-            "direction": "DESC"
-            }
-        ]
-    }
-
-    items = client.tgm_holders(payload, fetch_all=True)
-    df = holders_to_dataframe(items)
-    
-    return df
-
 @st.fragment
 def render_holder_flows_horizontal_bar_chart(chain: str, token_address: str, aggregate_by_entity: bool):
     """
     Render a centered horizontal bar chart with inflow (green, right) and outflow (red, left) by holder_type.
-    Fetches data using the same payload logic as render_holder_distribution.
+    Reads the holders dataset shared with render_holders_donut_chart.
     """
     if not token_address or not chain:
         holder_labels = ["smart_money", "exchange", "whale", "public_figure", "others"]
@@ -88,33 +42,15 @@ def render_holder_flows_horizontal_bar_chart(chain: str, token_address: str, agg
         st.plotly_chart(fig, width='stretch')
 
     else:
-        df = fetch_holders(chain, token_address, aggregate_by_entity)
+        holders = load_holders(chain, token_address, aggregate_by_entity)
 
-        if df.empty:
+        if holders.empty:
             st.warning("No holder distribution data returned for the selected filters.")
             return
-        agg = df.groupby('holder_type').agg({
-            'total_inflow': 'sum',
-            'total_outflow': 'sum'
-        }).reset_index()
+        agg = holders.flows_by_type()
         
         # Store summarized data for AI summary
-        holder_type_flows = {}
-        net_flow_by_type = {}
-        for _, row in agg.iterrows():
-            htype = row['holder_type']
-            inflow = float(row['total_inflow'])
-            outflow = float(row['total_outflow'])
-            holder_type_flows[htype] = {
-                "inflow": inflow,
-                "outflow": outflow
-            }
-            net_flow_by_type[htype] = inflow - outflow
-        
-        st.session_state.tgm_holder_flows_summary = {
-            "holder_type_flows": holder_type_flows,
-            "net_flow_by_type": net_flow_by_type
-        }
+        st.session_state.tgm_holder_flows_summary = holders.flows_summary()
         
         agg['total_outflow'] = -agg['total_outflow']
         fig = go.Figure()
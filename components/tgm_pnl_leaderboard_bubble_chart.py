@@ -6,8 +6,9 @@ import plotly.graph_objects as go
 
 from nansen_client import NansenClient
 from dataframes import pnl_leaderboard_to_dataframe, pnl_summary_to_dataframe
+from dataset_cache import shared_dataset
 
-@st.cache_data(ttl=300)
+@shared_dataset(ttl=300, show_spinner=False)
 def fetch_token_leaderboard(chain, token_address, DATE_FROM, DATE_TO):
     client = NansenClient()
 
@@ -43,7 +44,7 @@ def fetch_token_leaderboard(chain, token_address, DATE_FROM, DATE_TO):
     
     return df
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=300, show_spinner=False)
 def fetch_pfl_leaderboard(chain, leaderboard_df, DATE_FROM, DATE_TO):
     client = NansenClient()
 
@@ -61,6 +62,19 @@ def fetch_pfl_leaderboard(chain, leaderboard_df, DATE_FROM, DATE_TO):
     
     return df
 
+def leaderboard_dates():
+    """(DATE_FROM, DATE_TO): the trailing week the bubble chart covers."""
+    DATE_FROM = (dt.today() - pd.Timedelta(days=7)).strftime('%Y-%m-%d')  # one week ago
+    DATE_TO = dt.today().strftime('%Y-%m-%d') # today
+    return DATE_FROM, DATE_TO
+
+def fetch_leaderboard_with_pnl(chain, token_address):
+    """Token PnL leaderboard and the traders' PnL summaries (the second request depends on the first)."""
+    DATE_FROM, DATE_TO = leaderboard_dates()
+    leaderboard_df = fetch_token_leaderboard(chain, token_address, DATE_FROM, DATE_TO)
+    summary_df = fetch_pfl_leaderboard(chain, leaderboard_df, DATE_FROM, DATE_TO)
+    return leaderboard_df, summary_df
+
 @st.fragment
 def render_pnl_leaderboard_bubble_chart(chain: str, token_address: str):
     if not token_address or not chain:
@@ -93,11 +107,8 @@ def render_pnl_leaderboard_bubble_chart(chain: str, token_address: str):
         st.plotly_chart(fig, width='stretch')
 
     else:
-        DATE_FROM = (dt.today() - pd.Timedelta(days=7)).strftime('%Y-%m-%d')  # one week ago
-        DATE_TO = dt.today().strftime('%Y-%m-%d') # today
         try:
-            leaderboard_df = fetch_token_leaderboard(chain, token_address, DATE_FROM, DATE_TO)  # Limit to top 100 for performance
-            summary_df = fetch_pfl_leaderboard(chain, leaderboard_df, DATE_FROM, DATE_TO)
+            leaderboard_df, summary_df = fetch_leaderboard_with_pnl(chain, token_address)  # Limit to top 100 for performance
 
             df = pd.merge(leaderboard_df, summary_df, left_on='trader_address', right_on='address', how='left', suffixes=('', '_summary'))
             if df.empty:
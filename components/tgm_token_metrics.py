@@ -1,7 +1,11 @@
+import math
 import streamlit as st
+import pandas as pd
 from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
 from nansen_client import NansenClient
 from dataframes import tgm_token_screener_to_dataframe
+from dataset_cache import shared_dataset
 
 
 def format_delta_color(delta_value):
@@ -12,8 +16,32 @@ def format_delta_color(delta_value):
     else:
         return "normal"
 
-@st.cache_data(ttl=300)
-def fetch_trades(chain, token_address, from_datetime, to_datetime):
+PERIODS = {
+    "1h": timedelta(hours=1),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+
+def period_window(period: str):
+    """
+    (from, to) ISO timestamps for a metrics period, truncated to the minute. The TGM page
+    computes it once per run and passes it to both the prefetch and this component.
+    """
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    to_datetime = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+    from_datetime = (now - PERIODS[period]).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return from_datetime, to_datetime
+
+def _raw_value(item: dict, key: str):
+    value = item.get(key)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+@shared_dataset(ttl=300, show_spinner=False)
+def fetch_token_screener(chain, token_address, from_datetime, to_datetime):
+    """Raw token-screener rows; formatted for display by the component."""
     client = NansenClient()
 
     payload = {
@@ -26,12 +54,13 @@ def fetch_trades(chain, token_address, from_datetime, to_datetime):
     }
 
     items = client.tgm_token_screener(payload)
-    df = tgm_token_screener_to_dataframe(items)
     
-    return df
+    return pd.DataFrame(items)
 
 @st.fragment
-def render_token_metrics(token_address: str, chain: str, period: str):
+def render_token_metrics(token_address: str, chain: str, period: str,
+                         window: Optional[Tuple[str, str]] = None):
+    """window: the run's period_window(period), shared with the prefetch; computed here if not given."""
 
     st.subheader("Token Metrics")
     st.markdown("<br>", unsafe_allow_html=True)
@@ -39,56 +68,37 @@ def render_token_metrics(token_address: str, chain: str, period: str):
     if token_address:
         with st.spinner("Fetching token metrics..."):
             try:
-                period_mapping = {
-                    "1h": timedelta(hours=1),
-                    "24h": timedelta(hours=24),
-                    "7d": timedelta(days=7),
-                    "30d": timedelta(days=30),
-                }
-
-                if period not in period_mapping:
+                if period not in PERIODS:
                     raise ValueError(f"Invalid period: {period}. Must be one of: 1h, 24h, 7d, 30d")
 
                 # Calculate date range based on period
-                now = datetime.now(timezone.utc)
-                to_datetime = now.strftime("%Y-%m-%dT%H:%M:%SZ")
-                from_datetime = (now - period_mapping[period]).strftime("%Y-%m-%dT%H:%M:%SZ")
+                from_datetime, to_datetime = window or period_window(period)
 
-                df = fetch_trades(chain, token_address, from_datetime, to_datetime)
+                raw = fetch_token_screener(chain, token_address, from_datetime, to_datetime)
+                raw_items = raw.to_dict("records")
+                df = tgm_token_screener_to_dataframe(raw_items)
 
                 if not df.empty:
                     token_data = df.iloc[0]  # df should only have one row
                     
-                    # Fetch raw data for summary (before formatting)
-                    client = NansenClient()
-                    payload = {
-                        "chains": [chain],
-                        "date": {
-                            "from": from_datetime,
-                            "to": to_datetime,
-                        },
-                        "filters": {"token_address": token_address},
-                    }
-                    raw_items = client.tgm_token_screener(payload)
-                    
                     # Store summarized data for AI summary - extract raw numeric values
                     if raw_items and len(raw_items) > 0:
                         raw_item = raw_items[0]
                         st.session_state.tgm_token_metrics_summary = {
-                            "token_symbol": raw_item.get("token_symbol", "N/A"),
-                            "token_age_days": float(raw_item.get("token_age_days", 0)) if raw_item.get("token_age_days") is not None else None,
-                            "price_usd": float(raw_item.get("price_usd", 0)) if raw_item.get("price_usd") is not None else None,
-                            "price_change": float(raw_item.get("price_change", 0)) if raw_item.get("price_change") is not None else None,
-                            "market_cap_usd": float(raw_item.get("market_cap_usd", 0)) if raw_item.get("market_cap_usd") is not None else None,
-                            "volume": float(raw_item.get("volume", 0)) if raw_item.get("volume") is not None else None,
-                            "liquidity": float(raw_item.get("liquidity", 0)) if raw_item.get("liquidity") is not None else None,
-                            "fdv": float(raw_item.get("fdv", 0)) if raw_item.get("fdv") is not None else None,
-                            "buy_volume": float(raw_item.get("buy_volume", 0)) if raw_item.get("buy_volume") is not None else None,
-                            "sell_volume": float(raw_item.get("sell_volume", 0)) if raw_item.get("sell_volume") is not None else None,
-                            "netflow": float(raw_item.get("netflow", 0)) if raw_item.get("netflow") is not None else None,
-                            "fdv_mc_ratio": float(raw_item.get("fdv_mc_ratio", 0)) if raw_item.get("fdv_mc_ratio") is not None else None,
-                            "inflow_fdv_ratio": float(raw_item.get("inflow_fdv_ratio", 0)) if raw_item.get("inflow_fdv_ratio") is not None else None,
-                            "outflow_fdv_ratio": float(raw_item.get("outflow_fdv_ratio", 0)) if raw_item.get("outflow_fdv_ratio") is not None else None,
+                            "token_symbol": _raw_value(raw_item, "token_symbol") or "N/A",
+                            "token_age_days": float(_raw_value(raw_item, "token_age_days")) if _raw_value(raw_item, "token_age_days") is not None else None,
+                            "price_usd": float(_raw_value(raw_item, "price_usd")) if _raw_value(raw_item, "price_usd") is not None else None,
+                            "price_change": float(_raw_value(raw_item, "price_change")) if _raw_value(raw_item, "price_change") is not None else None,
+                            "market_cap_usd": float(_raw_value(raw_item, "market_cap_usd")) if _raw_value(raw_item, "market_cap_usd") is not None else None,
+                            "volume": float(_raw_value(raw_item, "volume")) if _raw_value(raw_item, "volume") is not None else None,
+                            "liquidity": float(_raw_value(raw_item, "liquidity")) if _raw_value(raw_item, "liquidity") is not None else None,
+                            "fdv": float(_raw_value(raw_item, "fdv")) if _raw_value(raw_item, "fdv") is not None else None,
+                            "buy_volume": float(_raw_value(raw_item, "buy_volume")) if _raw_value(raw_item, "buy_volume") is not None else None,
+                            "sell_volume": float(_raw_value(raw_item, "sell_volume")) if _raw_value(raw_item, "sell_volume") is not None else None,
+                            "netflow": float(_raw_value(raw_item, "netflow")) if _raw_value(raw_item, "netflow") is not None else None,
+                            "fdv_mc_ratio": float(_raw_value(raw_item, "fdv_mc_ratio")) if _raw_value(raw_item, "fdv_mc_ratio") is not None else None,
+                            "inflow_fdv_ratio": float(_raw_value(raw_item, "inflow_fdv_ratio")) if _raw_value(raw_item, "inflow_fdv_ratio") is not None else None,
+                            "outflow_fdv_ratio": float(_raw_value(raw_item, "outflow_fdv_ratio")) if _raw_value(raw_item, "outflow_fdv_ratio") is not None else None,
                         }
 
                     # Show token symbol and age
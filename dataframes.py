@@ -1,6 +1,43 @@
-from typing import List, Dict
+import os
+from typing import List, Dict, Optional
 import pandas as pd
 
+try:
+    import polars as pl
+except ImportError:  # polars is optional, pandas stays the default backend
+    pl = None
+
+import query_layer
+
+
+# ---------- Backend ----------
+
+# "pandas" (default), "polars" or "duckdb". Optional backends are only used when installed.
+DATAFRAME_BACKEND = os.environ.get("DATAFRAME_BACKEND", "pandas").lower()
+
+
+def set_backend(backend: str) -> None:
+    """Switch the backend used by the aggregation helpers at the bottom of this module."""
+    global DATAFRAME_BACKEND
+    DATAFRAME_BACKEND = backend.lower()
+
+
+def get_backend(backend: Optional[str] = None) -> str:
+    """Resolve the backend to use, falling back to pandas when the requested one is unavailable."""
+    backend = (backend or DATAFRAME_BACKEND).lower()
+    if backend == "polars" and pl is not None:
+        return "polars"
+    if backend == "duckdb" and query_layer.is_enabled():
+        return "duckdb"
+    return "pandas"
+
+
+def to_backend_frame(df: pd.DataFrame, backend: Optional[str] = None):
+    """Return df as a frame of the selected backend (pandas.DataFrame or polars.DataFrame)."""
+    if get_backend(backend) == "polars":
+        return pl.from_pandas(df)
+    return df
+
 
 # ---------- Helper Functions ----------
 
@@ -76,7 +113,7 @@ def net_flow_to_dataframe(items: List[Dict]) -> pd.DataFrame:
             columns=[
                 "token_address",
                 "token_symbol",
-                "netflow_24h_usd",
+                "net_flow_24h_usd",
                 "net_flow_7d_usd",
                 "net_flow_30d_usd",
                 "chain",
@@ -92,7 +129,7 @@ def net_flow_to_dataframe(items: List[Dict]) -> pd.DataFrame:
             lambda x: ", ".join(x) if isinstance(x, list) else x
         )
     numeric_cols = [
-        "netflow_24h_usd",
+        "net_flow_24h_usd",
         "net_flow_7d_usd",
         "net_flow_30d_usd",
         "trader_count",
@@ -122,7 +159,7 @@ def dex_trades_to_dataframe(items: List[Dict]) -> pd.DataFrame:
                 "token_sold_symbol",
                 "token_bought_age_days",
                 "token_sold_age_days",
-                "trader_bought_market_cap",
+                "token_bought_market_cap",
                 "token_sold_market_cap",
                 "trade_value_usd",
             ]
@@ -135,7 +172,7 @@ def dex_trades_to_dataframe(items: List[Dict]) -> pd.DataFrame:
         "token_sold_amount",
         "token_bought_age_days",
         "token_sold_age_days",
-        "trader_bought_market_cap",
+        "token_bought_market_cap",
         "token_sold_market_cap",
         "trade_value_usd",
     ]
@@ -532,4 +569,186 @@ def pfl_transactions_to_dataframe(data: List[Dict]) -> pd.DataFrame:
     df["tokens_sent"] = df["tokens_sent"].apply(clean_token_list)
     df["tokens_received"] = df["tokens_received"].apply(clean_token_list)
     
-    return df
\ No newline at end of file
+    return df
+
+
+# ---------- Aggregations ----------
+# Each helper takes and returns pandas frames so components can plot the result directly.
+# With the polars or duckdb backend the heavy groupby/pivot/rolling steps run multi-threaded
+# outside pandas; outputs match the pandas path (see benchmarks/dataframe_backends.py).
+
+# profiler/address/historical-balances
+def daily_token_pivot(df: pd.DataFrame, days: Optional[pd.DatetimeIndex] = None,
+                      value_col: str = "value_usd", backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    Sum value_col per (day, token_symbol) and pivot to a wide frame: index=day, columns=token_symbol.
+    Missing (day, token) pairs are NaN. If days is given the index is reindexed to it.
+    """
+    ts = pd.to_datetime(df["block_timestamp"], errors="coerce")
+    values = pd.to_numeric(df[value_col], errors="coerce").fillna(0.0)
+
+    if get_backend(backend) == "polars":
+        tz = getattr(ts.dt, "tz", None)
+        frame = pl.from_pandas(pd.DataFrame({
+            "day": ts.dt.floor("D"),
+            "token_symbol": df["token_symbol"].astype(str),
+            "value": values.astype(float),
+        }))
+        out = (
+            frame.drop_nulls("day")
+            .group_by(["day", "token_symbol"])
+            .agg(pl.col("value").sum())
+            .pivot(on="token_symbol", index="day", values="value")
+            .sort("day")
+            .to_pandas()
+            .set_index("day")
+        )
+        if tz is not None and out.index.tz is None:
+            out.index = out.index.tz_localize("UTC").tz_convert(tz)
+        wide = out[sorted(out.columns)].astype(float)
+        wide.columns.name = "token_symbol"
+    elif get_backend(backend) == "duckdb":
+        tz = getattr(ts.dt, "tz", None)
+        daily = query_layer.get_query_layer().query_df(
+            """
+            SELECT date_trunc('day', ts) AS day, token_symbol, sum(value) AS value
+            FROM balances
+            WHERE ts IS NOT NULL
+            GROUP BY 1, 2
+            """,
+            balances=pd.DataFrame({"ts": ts, "token_symbol": df["token_symbol"].astype(str), "value": values}),
+        )
+        wide = daily.pivot(index="day", columns="token_symbol", values="value").astype(float).sort_index()
+        wide.index = pd.DatetimeIndex(wide.index)
+        if tz is not None:
+            wide.index = wide.index.tz_localize("UTC").tz_convert(tz)
+    else:
+        daily = (
+            pd.DataFrame({"day": ts.dt.floor("D"), "token_symbol": df["token_symbol"].astype(str), "value": values})
+            .groupby(["day", "token_symbol"], as_index=False)["value"].sum()
+        )
+        wide = daily.pivot(index="day", columns="token_symbol", values="value").astype(float)
+
+    wide.index.name = "day"
+    if days is not None:
+        wide = wide.reindex(days)
+        wide.index.name = "day"
+    return wide
+
+
+def rolling_std(wide: pd.DataFrame, window: int = 7, min_periods: int = 2,
+                backend: Optional[str] = None) -> pd.DataFrame:
+    """Population rolling std (ddof=0) down each column of a wide frame; NaN where < min_periods."""
+    if get_backend(backend) == "polars" and wide.shape[1] > 0:
+        frame = pl.from_pandas(wide.reset_index(drop=True))
+        out = frame.select([
+            pl.col(c).rolling_std(window_size=window, min_samples=min_periods, ddof=0)
+            for c in frame.columns
+        ]).to_pandas()
+        out.index = wide.index
+        out.columns = wide.columns
+        return out.astype(float)
+    return wide.rolling(window=window, min_periods=min_periods).std(ddof=0)
+
+
+# tgm/holders
+def holder_flows_by_type(df: pd.DataFrame, backend: Optional[str] = None) -> pd.DataFrame:
+    """Sum total_inflow and total_outflow per holder_type, sorted by holder_type."""
+    if get_backend(backend) == "polars":
+        frame = pl.from_pandas(df[["holder_type", "total_inflow", "total_outflow"]])
+        return (
+            frame.group_by("holder_type")
+            .agg(pl.col("total_inflow").sum(), pl.col("total_outflow").sum())
+            .sort("holder_type")
+            .to_pandas()
+        )
+    if get_backend(backend) == "duckdb":
+        return query_layer.get_query_layer().query_df(
+            """
+            SELECT holder_type, sum(total_inflow) AS total_inflow, sum(total_outflow) AS total_outflow
+            FROM holders GROUP BY holder_type ORDER BY holder_type
+            """,
+            holders=df[["holder_type", "total_inflow", "total_outflow"]],
+        )
+    return df.groupby("holder_type").agg({
+        "total_inflow": "sum",
+        "total_outflow": "sum",
+    }).reset_index()
+
+
+def holder_type_summary(df: pd.DataFrame, backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    Per holder_type: unique addresses, summed token_amount / total_inflow / value_usd and
+    mean ownership_percentage. Sorted by holder_type.
+    """
+    if get_backend(backend) == "duckdb":
+        return query_layer.get_query_layer().query_df(
+            """
+            SELECT holder_type,
+                   count(DISTINCT address)   AS address,
+                   sum(token_amount)         AS token_amount,
+                   sum(total_inflow)         AS total_inflow,
+                   sum(value_usd)            AS value_usd,
+                   avg(ownership_percentage) AS ownership_percentage
+            FROM holders GROUP BY holder_type ORDER BY holder_type
+            """,
+            holders=df[["holder_type", "address", "token_amount", "total_inflow", "value_usd", "ownership_percentage"]],
+        )
+    return df.groupby("holder_type").agg(
+        address=("address", "nunique"),
+        token_amount=("token_amount", "sum"),
+        total_inflow=("total_inflow", "sum"),
+        value_usd=("value_usd", "sum"),
+        ownership_percentage=("ownership_percentage", "mean"),
+    ).reset_index()
+
+
+# tgm/dex-trades
+def hourly_trade_activity(df: pd.DataFrame, hours: int = 24, backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    Trades in the `hours` before the latest block_timestamp, aggregated per hour of day:
+    columns hour, transactions_count, traded_token_amount. Sorted by hour.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=["hour", "transactions_count", "traded_token_amount"])
+    if get_backend(backend) == "duckdb":
+        out = query_layer.get_query_layer().query_df(
+            f"""
+            WITH recent AS (
+                SELECT block_timestamp, traded_token_amount FROM trades
+                WHERE block_timestamp >= (SELECT max(block_timestamp) FROM trades) - INTERVAL {int(hours)} HOUR
+            )
+            SELECT CAST(hour(block_timestamp) AS INTEGER) AS hour,
+                   count(block_timestamp)   AS transactions_count,
+                   sum(traded_token_amount) AS traded_token_amount
+            FROM recent GROUP BY 1 ORDER BY 1
+            """,
+            trades=df[["block_timestamp", "traded_token_amount"]],
+        )
+        out["traded_token_amount"] = out["traded_token_amount"].fillna(0.0)
+        return out
+    latest_time = df["block_timestamp"].max()
+    recent = df[df["block_timestamp"] >= latest_time - pd.Timedelta(hours=hours)]
+    return recent.groupby(recent["block_timestamp"].dt.hour.rename("hour")).agg(
+        transactions_count=("block_timestamp", "count"),
+        traded_token_amount=("traded_token_amount", "sum"),
+    ).reset_index()
+
+
+# tgm/dex-trades x tgm/holders
+def trades_with_holder_labels(trades: pd.DataFrame, holders: pd.DataFrame) -> pd.DataFrame:
+    """
+    Left-join trades to holders on trader_address = address, adding holder_type, address_label
+    (as holder_label) and ownership_percentage. Runs in DuckDB when available.
+    """
+    cols = [c for c in ("address", "holder_type", "address_label", "ownership_percentage") if c in holders.columns]
+    labels = holders[cols].drop_duplicates("address").rename(columns={"address_label": "holder_label"})
+    if query_layer.is_enabled() and not trades.empty:
+        label_cols = ", ".join(f"h.{c}" for c in labels.columns if c != "address")
+        joined = query_layer.get_query_layer().query_df(
+            f"SELECT t.*, {label_cols} FROM trades t LEFT JOIN labels h ON t.trader_address = h.address",
+            trades=trades, labels=labels,
+        )
+        return query_layer.restore_tz(joined, trades)
+    merged = trades.merge(labels, how="left", left_on="trader_address", right_on="address", suffixes=("", "_holder"))
+    return merged.drop(columns=["address"] if "address" not in trades.columns else ["address_holder"], errors="ignore")
@@ -0,0 +1,351 @@
+"""
+Process-wide shared dataset cache.
+
+st.cache_data pickles a cached DataFrame on every hit, so each session pays the
+deserialization and holds its own copy. This cache writes each dataset once as an
+Arrow IPC file (in /dev/shm when available), memory-maps it, and hands every session
+a read-only view over the same mapped buffers. Numeric and timestamp columns are
+zero-copy; string/object columns are materialized by pandas.
+
+Entries are reference counted: every view handed out holds a reference that is
+released when the view is garbage collected. Expired or evicted entries stop being
+served immediately and their file is removed once the last view is gone.
+
+pyarrow is optional; without it @shared_dataset falls back to st.cache_data.
+
+Published datasets (publish / read_published) are the cross-process counterpart: a
+headless refresher (refresher.py) writes hot datasets into a directory shared with the
+Streamlit processes (NANSEN_PUBLISHED_DIR, /dev/shm/nansen-published by default), each
+file replaced atomically so readers never see a partial write.
+"""
+import atexit
+import functools
+import hashlib
+import inspect
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional
+    pa = None
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_DIR_PREFIX = "nansen-dataset-cache-"
+
+PUBLISHED_DIR = os.environ.get(
+    "NANSEN_PUBLISHED_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "nansen-published"),
+)
+
+
+@dataclass(eq=False)
+class _Entry:
+    key: str
+    name: str
+    created_at: float
+    ttl: float
+    resident_bytes: int
+    path: Optional[str] = None       # Arrow IPC file backing the mapped table
+    table: Any = None                # pyarrow.Table over the memory map
+    frame: Optional[pd.DataFrame] = None  # fallback for frames Arrow cannot represent
+    refcount: int = 0
+    hits: int = 0
+    stale: bool = False
+    last_access: float = field(default_factory=time.time)
+
+    def expired(self, now: float) -> bool:
+        return now - self.created_at > self.ttl
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True   # exists, owned by another user
+    return True
+
+
+def _remove_stale_dirs(base: str) -> None:
+    """Remove cache directories left behind by processes that exited without close()."""
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return
+    for name in names:
+        pid = name[len(CACHE_DIR_PREFIX):]
+        if name.startswith(CACHE_DIR_PREFIX) and pid.isdigit() and int(pid) != os.getpid() \
+                and not _pid_alive(int(pid)):
+            shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+
+
+class SharedDatasetCache:
+    """Immutable datasets shared by all sessions of this process, backed by mapped Arrow IPC files."""
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        base = root or ("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+        _remove_stale_dirs(base)
+        self.root = os.path.join(base, f"{CACHE_DIR_PREFIX}{os.getpid()}")
+        os.makedirs(self.root, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._retired: List[_Entry] = []  # no longer served, waiting for their views to be released
+        # Re-entrant: a view finalizer can fire (and release) while the lock is already held.
+        self._lock = threading.RLock()
+        # /dev/shm is memory: don't leave the files behind when the process exits
+        atexit.register(self.close)
+
+    # ---------- Public API ----------
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Return a read-only view of the dataset, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            now = time.time()
+            if entry.expired(now):
+                self._retire_locked(entry)
+                return None
+            entry.hits += 1
+            entry.last_access = now
+            self._entries.move_to_end(key)
+            return self._view_locked(entry)
+
+    def get_table(self, key: str):
+        """Return the underlying pyarrow.Table (fully zero-copy), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.table is None or entry.expired(time.time()):
+                return None
+            return entry.table
+
+    def put(self, key: str, df: pd.DataFrame, ttl: float, name: str = "") -> pd.DataFrame:
+        """Store df under key and return a view of the stored copy."""
+        entry = self._materialize(key, df, ttl, name or key)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._retire_locked(old)
+            self._entries[key] = entry
+            self._evict_locked()
+            return self._view_locked(entry)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-dataset resident size, reference count, hits and age."""
+        now = time.time()
+        with self._lock:
+            rows = [
+                {
+                    "dataset": e.name,
+                    "resident_mb": round(e.resident_bytes / 1024 / 1024, 3),
+                    "refcount": e.refcount,
+                    "hits": e.hits,
+                    "age_s": round(now - e.created_at, 1),
+                    "state": "retired" if e.stale else ("mapped" if e.table is not None else "in-memory"),
+                }
+                for e in list(self._entries.values()) + self._retired
+            ]
+        return rows
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(e.resident_bytes for e in self._entries.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in list(self._entries.values()):
+                self._retire_locked(entry)
+
+    def close(self) -> None:
+        self.clear()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    # ---------- Internals ----------
+
+    def _materialize(self, key: str, df: pd.DataFrame, ttl: float, name: str) -> _Entry:
+        now = time.time()
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            path = os.path.join(self.root, f"{uuid.uuid4().hex}.arrow")
+            with pa.OSFile(path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            mapped = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+            return _Entry(key=key, name=name, created_at=now, ttl=ttl,
+                          resident_bytes=os.path.getsize(path), path=path, table=mapped)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError, ValueError):
+            # Nested/mixed object columns Arrow can't type: keep the frame in memory instead.
+            frozen = df.copy()
+            return _Entry(key=key, name=name, created_at=now, ttl=ttl,
+                          resident_bytes=int(frozen.memory_usage(deep=True).sum()), frame=frozen)
+
+    def _view_locked(self, entry: _Entry) -> pd.DataFrame:
+        if entry.table is not None:
+            view = entry.table.to_pandas(split_blocks=True, self_destruct=False)
+        else:
+            # A shallow copy would share the cached arrays, so one session's in-place
+            # write would show up in every other session's copy
+            view = entry.frame.copy(deep=True)
+        entry.refcount += 1
+        weakref.finalize(view, self._release, entry)
+        return view
+
+    def _release(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.refcount -= 1
+            if entry.stale and entry.refcount <= 0:
+                self._drop_locked(entry)
+
+    def _retire_locked(self, entry: _Entry) -> None:
+        if self._entries.get(entry.key) is entry:
+            del self._entries[entry.key]
+        entry.stale = True
+        if entry.refcount <= 0:
+            self._drop_locked(entry)
+        else:
+            self._retired.append(entry)
+
+    def _drop_locked(self, entry: _Entry) -> None:
+        if entry in self._retired:
+            self._retired.remove(entry)
+        entry.table = None
+        entry.frame = None
+        if entry.path:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _evict_locked(self) -> None:
+        now = time.time()
+        for entry in [e for e in self._entries.values() if e.expired(now)]:
+            self._retire_locked(entry)
+        total = sum(e.resident_bytes for e in self._entries.values())
+        # Least recently used first; datasets with live views are kept unless nothing else can go.
+        for entry in sorted(self._entries.values(), key=lambda e: (e.refcount > 0, e.last_access)):
+            if total <= self.max_bytes or len(self._entries) <= 1:
+                break
+            total -= entry.resident_bytes
+            self._retire_locked(entry)
+
+
+@st.cache_resource
+def get_shared_cache() -> SharedDatasetCache:
+    max_mb = st.secrets.get("shared_cache_max_mb", DEFAULT_MAX_BYTES // (1024 * 1024))
+    return SharedDatasetCache(max_bytes=int(max_mb) * 1024 * 1024)
+
+
+def _cache_key(func: Callable, signature: inspect.Signature, args, kwargs) -> str:
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    # Like st.cache_data, parameters starting with "_" are not part of the key.
+    parts = [(k, v) for k, v in bound.arguments.items() if not k.startswith("_")]
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f"{func.__module__}.{func.__qualname__}:{digest}"
+
+
+def shared_dataset(ttl: float = 300, show_spinner: bool = True):
+    """
+    Drop-in replacement for @st.cache_data(ttl=...) on fetchers that return a DataFrame.
+    Results live once per process in the shared cache instead of being pickled per hit.
+    show_spinner only applies to the st.cache_data fallback (without pyarrow).
+    """
+    def decorator(func: Callable[..., pd.DataFrame]):
+        if pa is None:
+            return st.cache_data(ttl=ttl, show_spinner=show_spinner)(func)
+
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_shared_cache()
+            key = _cache_key(func, signature, args, kwargs)
+            view = cache.get(key)
+            if view is not None:
+                return view
+            df = func(*args, **kwargs)
+            if not isinstance(df, pd.DataFrame):
+                return df
+            return cache.put(key, df, ttl=ttl, name=func.__qualname__)
+
+        return wrapper
+
+    return decorator
+
+
+# ---------- Published datasets ----------
+
+def _published_path(name: str, suffix: str, root: Optional[str] = None) -> str:
+    return os.path.join(root or PUBLISHED_DIR, f"{name}{suffix}")
+
+
+def publish(name: str, df: pd.DataFrame, root: Optional[str] = None) -> str:
+    """
+    Atomically replace the published copy of dataset name with df (Arrow IPC when pyarrow
+    can represent it, pickle otherwise). Returns the path written.
+    """
+    base = root or PUBLISHED_DIR
+    os.makedirs(base, exist_ok=True)
+    tmp = os.path.join(base, f".{name}-{uuid.uuid4().hex}.tmp")
+    suffix = ".pkl"
+    try:
+        if pa is not None:
+            try:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                with pa.OSFile(tmp, "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+                suffix = ".arrow"
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError, ValueError):
+                pass
+        if suffix == ".pkl":
+            df.to_pickle(tmp)
+        path = _published_path(name, suffix, base)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    # A dataset switching format must not leave its older copy behind to be read instead.
+    other = _published_path(name, ".pkl" if suffix == ".arrow" else ".arrow", base)
+    if os.path.exists(other):
+        os.remove(other)
+    return path
+
+
+def read_published(name: str, max_age_s: Optional[float] = None,
+                   root: Optional[str] = None) -> Optional[Tuple[pd.DataFrame, float]]:
+    """(frame, published_at) of the published dataset, or None if it is missing or older than max_age_s."""
+    for suffix in (".arrow", ".pkl"):
+        path = _published_path(name, suffix, root)
+        try:
+            published_at = os.path.getmtime(path)
+            if max_age_s is not None and time.time() - published_at > max_age_s:
+                return None
+            if suffix == ".pkl":
+                return pd.read_pickle(path), published_at
+            if pa is None:
+                continue
+            # The mapping stays valid after the refresher replaces the file (old inode).
+            table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+            return table.to_pandas(), published_at
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            print(f"Published dataset {name} could not be read: {e}")
+            return None
+    return None
@@ -0,0 +1,167 @@
+"""
+Context window management for long chats.
+
+Every completion used to re-send the whole chat history. A ChatContext, kept per session,
+builds each prompt instead from:
+
+    - the system prompt;
+    - a memory message summarizing the turns that slid out of the window. Older turns are
+      folded into it by a background summarization call, so no user turn waits for it;
+    - the most recent messages that fit the history token budget, starting at a user turn.
+
+Turns that left the window while their summary is still being written are missing from
+that one prompt; the memory covers them from the next turn on.
+
+Within a turn, tool results of earlier tool rounds are stale once the model has acted on
+them. Only the latest KEEP_TOOL_ROUNDS rounds are sent in full; older ones are replaced by
+a stub pointing at get_full_tool_result, since the full results are in the session's
+ToolResultStore.
+
+Each request's prompt size is recorded by section for the debug panel.
+"""
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional
+
+import streamlit as st
+from openai import OpenAI
+
+from lib.tool_compaction import FULL_RESULT_TOOL, count_tokens
+
+
+DEFAULT_HISTORY_TOKENS = 6000
+MIN_RECENT_MESSAGES = 2       # the latest exchange is always sent, whatever its size
+KEEP_TOOL_ROUNDS = 1
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_MAX_TOKENS = 600
+STATS_WINDOW = 50
+
+SUMMARY_PROMPT = """You maintain the memory of a conversation between a user and an assistant that answers questions about blockchain data (Nansen) and trades on Hyperliquid.
+Merge the existing memory and the new messages into one updated memory of at most 250 words.
+Keep: the user's goals and preferences, tokens with their addresses and chains, wallets, numbers the user may refer back to, trades placed or discussed, and open questions.
+Drop: greetings, formatting and anything superseded. Write terse bullet points."""
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """Tokens of one chat message, including the per-message overhead and any tool-call arguments."""
+    tokens = 4 + count_tokens(message.get("content") or "")
+    for call in message.get("tool_calls") or []:
+        tokens += count_tokens(call["function"]["name"]) + count_tokens(call["function"]["arguments"])
+    return tokens
+
+def history_budget() -> int:
+    return int(st.secrets.get("chat_history_token_budget", DEFAULT_HISTORY_TOKENS))
+
+
+class ChatContext:
+    """A session's summary memory and prompt-size stats; see module docstring."""
+
+    def __init__(self, openai_client: OpenAI, history_tokens: Optional[int] = None):
+        self._openai_client = openai_client
+        self.history_tokens = history_tokens or history_budget()
+        self.summary = ""
+        self.summarized_upto = 0          # chat_messages[:summarized_upto] are in the summary
+        self._pending: Optional[Future] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-summary")
+        self._lock = threading.Lock()
+        self.stats: Deque[Dict[str, Any]] = deque(maxlen=STATS_WINDOW)
+        self._turn: Dict[str, Any] = {}
+
+    # ---------- History window ----------
+
+    def window_start(self, chat_messages: List[Dict[str, Any]]) -> int:
+        """Index of the oldest message that fits the history budget, moved forward to a user turn."""
+        start, used = len(chat_messages), 0
+        while start > 0:
+            tokens = message_tokens(chat_messages[start - 1])
+            if used + tokens > self.history_tokens and len(chat_messages) - start >= MIN_RECENT_MESSAGES:
+                break
+            used += tokens
+            start -= 1
+        while 0 < start < len(chat_messages) - 1 and chat_messages[start]["role"] != "user":
+            start += 1
+        return start
+
+    def build(self, system_prompt: str, chat_messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The base prompt for a turn; starts summarizing whatever slid out of the window."""
+        start = self.window_start(chat_messages)
+        with self._lock:
+            summary, summarized_upto = self.summary, self.summarized_upto
+            if summarized_upto < start and (self._pending is None or self._pending.done()):
+                self._pending = self._executor.submit(
+                    self._summarize, summary, chat_messages[summarized_upto:start], start)
+
+        messages = [{"role": "system", "content": system_prompt}]
+        if summary:
+            messages.append({"role": "system", "content": f"Memory of the earlier conversation:\n{summary}"})
+        messages += chat_messages[start:]
+        self._turn = {
+            "history_messages": len(chat_messages) - start,
+            "dropped_messages": start,
+            "summarized_messages": summarized_upto,
+            "summary_tokens": count_tokens(summary),
+        }
+        return messages
+
+    def _summarize(self, summary: str, messages: List[Dict[str, Any]], upto: int) -> None:
+        transcript = "\n".join(f"{m['role']}: {m.get('content') or ''}" for m in messages)
+        try:
+            response = self._openai_client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": f"Existing memory:\n{summary or '(empty)'}\n\nNew messages:\n{transcript}"},
+                ],
+                max_tokens=SUMMARY_MAX_TOKENS,
+            )
+            updated = (response.choices[0].message.content or "").strip()
+        except Exception as e:
+            # The turns stay unsummarized and are retried with the next turn
+            print(f"Chat summary failed: {e}")
+            return
+        with self._lock:
+            if upto > self.summarized_upto:
+                self.summary, self.summarized_upto = updated, upto
+
+    # ---------- Per request ----------
+
+    def prepare(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        The messages to send for one completion: tool results of all but the latest
+        KEEP_TOOL_ROUNDS tool rounds are replaced by stubs. Records the request's prompt size.
+        """
+        rounds = [i for i, m in enumerate(messages) if m["role"] == "assistant" and m.get("tool_calls")]
+        stale_before = rounds[-KEEP_TOOL_ROUNDS] if len(rounds) > KEEP_TOOL_ROUNDS else 0
+        prepared, elided = [], 0
+        for i, message in enumerate(messages):
+            if message["role"] == "tool" and i < stale_before:
+                message = {**message, "content": json.dumps({
+                    "note": f"Earlier tool result elided; call {FULL_RESULT_TOOL} with "
+                            f"result_id={message['tool_call_id']!r} if it is needed again."})}
+                elided += 1
+            prepared.append(message)
+
+        sections = {"system": 0, "memory": 0, "history": 0, "tools": 0}
+        for i, message in enumerate(prepared):
+            tokens = message_tokens(message)
+            if message["role"] == "system":
+                sections["memory" if i > 0 else "system"] += tokens
+            elif message["role"] == "tool" or message.get("tool_calls"):
+                sections["tools"] += tokens
+            else:
+                sections["history"] += tokens
+        self.stats.append({
+            "at": time.strftime("%H:%M:%S"),
+            **{f"{name}_tokens": tokens for name, tokens in sections.items()},
+            "prompt_tokens": sum(sections.values()),
+            **self._turn,
+            "elided_tool_results": elided,
+        })
+        return prepared
+
+    def summary_pending(self) -> bool:
+        with self._lock:
+            return self._pending is not None and not self._pending.done()
@@ -12,6 +12,15 @@ from lib.hyperliquid_sdk import (
 )
 
 
+# Handlers that only read account or market state. Every other handler places, changes or
+# cancels orders and must never run concurrently with, or be reordered against, another one.
+READ_ONLY_TOOLS = frozenset({
+    "fetch_balances_positions",
+    "get_available_trading_pairs",
+    "get_leverage",
+})
+
+
 def get_hyperliquid_tools() -> Tuple[List[Dict[str, Any]], Dict[str, Callable]]:
     """
     Get Hyperliquid tools in OpenAI function calling format.
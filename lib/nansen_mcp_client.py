@@ -1,7 +1,144 @@
+import atexit
+import hashlib
 import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Optional, Dict, Any, List, Generator
 import httpx
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2 = True
+except ImportError:  # h2 is optional
+    HTTP2 = False
+
+
+# ---------- Shared connection pool ----------
+# One pooled httpx.Client per process, shared by every chat session's NansenMCPClient, so
+# tool calls reuse kept-alive (and, with h2 installed, multiplexed HTTP/2) connections
+# instead of paying TCP + TLS setup each time.
+
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120.0)
+CONNECT_TIMEOUT_S = 10.0
+POOL_TIMEOUT = httpx.Timeout(60.0, connect=CONNECT_TIMEOUT_S)
+REQUEST_TIMEOUT = httpx.Timeout(30.0, connect=CONNECT_TIMEOUT_S)   # handshake and tools/list
+METRICS_WINDOW = 200   # recent requests kept for connection metrics
+
+_http_client: Optional[httpx.Client] = None
+_http_lock = threading.Lock()
+_metrics: deque = deque(maxlen=METRICS_WINDOW)
+
+def get_http_client() -> httpx.Client:
+    global _http_client
+    with _http_lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(http2=HTTP2, limits=POOL_LIMITS, timeout=POOL_TIMEOUT)
+        return _http_client
+
+@atexit.register
+def close_http_client() -> None:
+    global _http_client
+    with _http_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+class _ConnectionTrace:
+    """httpcore trace hook: times the TCP connect and TLS handshake of one request, if it opened a connection."""
+
+    def __init__(self, method: str):
+        self.method = method
+        self.started = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+        self.http_version = "HTTP/1.1"
+
+    def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        self.marks[event_name] = time.perf_counter()
+        if event_name.startswith("http2."):
+            self.http_version = "HTTP/2"
+
+    def _span_ms(self, step: str) -> float:
+        start = self.marks.get(f"connection.{step}.started")
+        end = self.marks.get(f"connection.{step}.complete")
+        return (end - start) * 1000 if start is not None and end is not None else 0.0
+
+    def record(self) -> None:
+        _metrics.append({
+            "method": self.method,
+            "reused_connection": "connection.connect_tcp.started" not in self.marks,
+            "http_version": self.http_version,
+            "connect_ms": round(self._span_ms("connect_tcp"), 1),
+            "tls_ms": round(self._span_ms("start_tls"), 1),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+        })
+
+def connection_metrics() -> List[Dict[str, Any]]:
+    """Recent MCP requests, oldest first: connection reuse, HTTP version, connect/TLS and total time."""
+    return list(_metrics)
+
+def connection_summary() -> Dict[str, Any]:
+    """Aggregate of connection_metrics(); saved_ms estimates the setup time that reused connections avoided."""
+    rows = connection_metrics()
+    fresh = [r for r in rows if not r["reused_connection"]]
+    reused = len(rows) - len(fresh)
+    setup_ms = sum(r["connect_ms"] + r["tls_ms"] for r in fresh) / len(fresh) if fresh else 0.0
+    return {
+        "requests": len(rows),
+        "reused": reused,
+        "new_connections": len(fresh),
+        "avg_setup_ms": round(setup_ms, 1),
+        "saved_ms": round(setup_ms * reused, 1),
+        "http2": HTTP2,
+    }
+
+
+# ---------- Tool catalog ----------
+# tools/list and the OpenAI conversion are the same for every session, so they are done
+# once per server per CATALOG_TTL_S. version is a hash of the catalog, so sessions can tell
+# when the tools they were built with have changed.
+
+CATALOG_TTL_S = 60 * 60
+
+@dataclass(frozen=True)
+class ToolCatalog:
+    tools: List[Dict[str, Any]]
+    openai_tools: List[Dict[str, Any]]
+    version: str
+    fetched_at: float
+
+    @property
+    def age_s(self) -> float:
+        return time.time() - self.fetched_at
+
+    @classmethod
+    def build(cls, tools: List[Dict[str, Any]]) -> "ToolCatalog":
+        openai_tools = [{
+            "type": "function",
+            "function": {
+                "name": tool['name'],
+                "description": tool.get('description', ''),
+                "parameters": tool.get('inputSchema', {})
+            }
+        } for tool in tools]
+        version = hashlib.sha256(json.dumps(tools, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        return cls(tools=tools, openai_tools=openai_tools, version=version, fetched_at=time.time())
+
+_catalogs: Dict[str, ToolCatalog] = {}
+_catalog_lock = threading.Lock()
+
+def cached_catalog(server_url: str) -> Optional[ToolCatalog]:
+    """The server's tool catalog if fetched within CATALOG_TTL_S."""
+    with _catalog_lock:
+        catalog = _catalogs.get(server_url)
+    return catalog if catalog is not None and catalog.age_s < CATALOG_TTL_S else None
+
+# Background session handshakes, so a page never blocks on one
+_bootstrap_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="mcp-bootstrap")
+
 
 class NansenMCPClient:
     """Custom MCP client for Nansen HTTP-based MCP server."""
@@ -10,8 +147,10 @@ class NansenMCPClient:
         self.server_url = server_url
         self.api_key = api_key
         self.session_id: Optional[str] = None
-        self.tools: List[Dict[str, Any]] = []
+        self.catalog: Optional[ToolCatalog] = None
         self._initialized = False
+        self._init_future: Optional[Future] = None
+        self._init_lock = threading.Lock()
 
     def _parse_sse_response(self, text: str) -> Dict[str, Any]:
         """Parse Server-Sent Events format response."""
@@ -33,6 +172,16 @@ class NansenMCPClient:
                 return None
         return None
 
+    def _post(self, payload: Dict[str, Any], headers: Dict[str, str],
+              timeout: httpx.Timeout = REQUEST_TIMEOUT) -> httpx.Response:
+        """POST payload on the shared pool, recording connection metrics for it."""
+        trace = _ConnectionTrace(payload.get("method", ""))
+        try:
+            return get_http_client().post(self.server_url, json=payload, headers=headers,
+                                          timeout=timeout, extensions={"trace": trace})
+        finally:
+            trace.record()
+
     def initialize(self) -> bool:
         """Initialize the MCP session."""
         if self._initialized:
@@ -59,47 +208,79 @@ class NansenMCPClient:
         }
 
         try:
-            with httpx.Client(timeout=30.0) as client:
-                # Initialize session
-                response = client.post(self.server_url, json=init_payload, headers=headers)
+            # Initialize session
+            response = self._post(init_payload, headers)
 
-                if response.status_code != 200:
-                    raise Exception(f"Failed to initialize: {response.text}")
+            if response.status_code != 200:
+                raise Exception(f"Failed to initialize: {response.text}")
 
-                # Parse response (validation)
-                self._parse_sse_response(response.text)
+            # Parse response (validation)
+            self._parse_sse_response(response.text)
 
-                # Extract session ID
-                self.session_id = response.headers.get('mcp-session-id')
-                if self.session_id:
-                    headers['mcp-session-id'] = self.session_id
+            # Extract session ID
+            self.session_id = response.headers.get('mcp-session-id')
+            if self.session_id:
+                headers['mcp-session-id'] = self.session_id
 
-                # Send initialized notification
-                initialized_payload = {
-                    "jsonrpc": "2.0",
-                    "method": "notifications/initialized"
-                }
-                client.post(self.server_url, json=initialized_payload, headers=headers)
-
-                # List available tools
-                tools_payload = {
-                    "jsonrpc": "2.0",
-                    "id": 2,
-                    "method": "tools/list",
-                    "params": {}
-                }
+            # Send initialized notification
+            initialized_payload = {
+                "jsonrpc": "2.0",
+                "method": "notifications/initialized"
+            }
+            self._post(initialized_payload, headers)
+
+            # List available tools
+            tools_payload = {
+                "jsonrpc": "2.0",
+                "id": 2,
+                "method": "tools/list",
+                "params": {}
+            }
 
-                tools_response = client.post(self.server_url, json=tools_payload, headers=headers)
+            # The catalog is shared; only list tools when it is missing or expired
+            self.catalog = cached_catalog(self.server_url)
+            if self.catalog is None:
+                tools_response = self._post(tools_payload, headers)
                 if tools_response.status_code == 200:
                     tools_result = self._parse_sse_response(tools_response.text)
-                    self.tools = tools_result.get('result', {}).get('tools', [])
+                    self.catalog = ToolCatalog.build(tools_result.get('result', {}).get('tools', []))
+                    with _catalog_lock:
+                        _catalogs[self.server_url] = self.catalog
+                else:
+                    self.catalog = ToolCatalog.build([])
 
-                self._initialized = True
-                return True
+            self._initialized = True
+            return True
 
         except Exception as e:
             raise Exception(f"MCP initialization failed: {str(e)}")
 
+    def initialize_async(self) -> Future:
+        """Start initialize() in the background (once); returns its future."""
+        with self._init_lock:
+            if self._init_future is None:
+                self._init_future = _bootstrap_executor.submit(self.initialize)
+            return self._init_future
+
+    def wait_initialized(self, timeout: float = 30.0) -> None:
+        """
+        Block until the background handshake is done; a failed one is retried by the next call.
+        Picks up a catalog another session refreshed since this one started.
+        """
+        future = self.initialize_async()
+        try:
+            future.result(timeout=timeout)
+        except Exception:
+            with self._init_lock:
+                if self._init_future is future and future.done():
+                    self._init_future = None
+            raise
+        self.catalog = cached_catalog(self.server_url) or self.catalog
+
+    @property
+    def tools(self) -> List[Dict[str, Any]]:
+        return self.catalog.tools if self.catalog else []
+
     def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
         """Call an MCP tool (non-streaming version for backward compatibility)."""
         result_parts = []
@@ -111,7 +292,7 @@ class NansenMCPClient:
     def call_tool_streaming(self, tool_name: str, arguments: Dict[str, Any]) -> Generator[str, None, None]:
         """Call an MCP tool with streaming support."""
         if not self._initialized:
-            raise Exception("MCP client not initialized")
+            self.wait_initialized()
 
         headers = {
             "NANSEN-API-KEY": self.api_key,
@@ -132,75 +313,67 @@ class NansenMCPClient:
             }
         }
 
+        trace = _ConnectionTrace("tools/call")
         try:
-            with httpx.Client(timeout=60.0) as client:
-                with client.stream("POST", self.server_url, json=payload, headers=headers) as response:
-                    if response.status_code != 200:
-                        yield f"Error calling tool: HTTP {response.status_code}"
-                        return
-
-                    # Buffer for incomplete lines
-                    buffer = ""
-                    final_result = None
-
-                    for chunk in response.iter_text():
-                        buffer += chunk
-
-                        # Process complete lines
-                        while '\n' in buffer:
-                            line, buffer = buffer.split('\n', 1)
-                            line = line.strip()
-
-                            if not line:
-                                continue
-
-                            # Parse SSE line
-                            parsed = self._parse_sse_line(line)
-                            if parsed:
-                                # Check for errors
-                                if 'error' in parsed:
-                                    yield f"Tool error: {parsed['error'].get('message', 'Unknown error')}"
-                                    return
-
-                                # Store final result
-                                if 'result' in parsed:
-                                    final_result = parsed['result']
-
-                                # Yield progress if available
-                                if 'progress' in parsed.get('result', {}):
-                                    progress = parsed['result']['progress']
-                                    yield f"Progress: {progress}\n"
-
-                    # Process any remaining buffer
-                    if buffer.strip():
-                        parsed = self._parse_sse_line(buffer.strip())
-                        if parsed and 'result' in parsed:
-                            final_result = parsed['result']
-
-                    # Yield final result
-                    if final_result:
-                        content = final_result.get('content', [])
-                        if content and len(content) > 0:
-                            yield content[0].get('text', str(final_result))
-                        else:
-                            yield str(final_result)
+            with get_http_client().stream("POST", self.server_url, json=payload, headers=headers,
+                                          timeout=POOL_TIMEOUT, extensions={"trace": trace}) as response:
+                if response.status_code != 200:
+                    yield f"Error calling tool: HTTP {response.status_code}"
+                    return
+
+                # Buffer for incomplete lines
+                buffer = ""
+                final_result = None
+
+                for chunk in response.iter_text():
+                    buffer += chunk
+
+                    # Process complete lines
+                    while '\n' in buffer:
+                        line, buffer = buffer.split('\n', 1)
+                        line = line.strip()
+
+                        if not line:
+                            continue
+
+                        # Parse SSE line
+                        parsed = self._parse_sse_line(line)
+                        if parsed:
+                            # Check for errors
+                            if 'error' in parsed:
+                                yield f"Tool error: {parsed['error'].get('message', 'Unknown error')}"
+                                return
+
+                            # Store final result
+                            if 'result' in parsed:
+                                final_result = parsed['result']
+
+                            # Yield progress if available
+                            if 'progress' in parsed.get('result', {}):
+                                progress = parsed['result']['progress']
+                                yield f"Progress: {progress}\n"
+
+                # Process any remaining buffer
+                if buffer.strip():
+                    parsed = self._parse_sse_line(buffer.strip())
+                    if parsed and 'result' in parsed:
+                        final_result = parsed['result']
+
+                # Yield final result
+                if final_result:
+                    content = final_result.get('content', [])
+                    if content and len(content) > 0:
+                        yield content[0].get('text', str(final_result))
                     else:
-                        yield "No result returned from tool"
+                        yield str(final_result)
+                else:
+                    yield "No result returned from tool"
 
         except Exception as e:
             yield f"Error: {str(e)}"
+        finally:
+            trace.record()
 
     def get_tools_for_openai(self) -> List[Dict[str, Any]]:
-        """Convert MCP tools to OpenAI function calling format."""
-        openai_tools = []
-        for tool in self.tools:
-            openai_tools.append({
-                "type": "function",
-                "function": {
-                    "name": tool['name'],
-                    "description": tool.get('description', ''),
-                    "parameters": tool.get('inputSchema', {})
-                }
-            })
-        return openai_tools
-
+        """MCP tools in OpenAI function calling format (converted once per catalog)."""
+        return self.catalog.openai_tools if self.catalog else []
@@ -0,0 +1,159 @@
+"""
+Process-wide TTL cache for chat tool results.
+
+Identical tool calls (same tool, same arguments after canonical JSON encoding) made within
+the tool's TTL are answered from memory, across all chat sessions of the process, and
+concurrent identical calls share one upstream request (single flight).
+
+Only Nansen MCP tools on an explicit allowlist of read-only tools are cached: they read
+market data that is the same for every session. A tool that is not listed, including any
+tool the MCP server adds later, is always called upstream. Hyperliquid tools are never
+cached; their results depend on the session's account and network and the trading ones
+change state. The allowlist and per-tool TTLs are set in secrets.toml (0 disables caching
+for a tool):
+
+    tool_cache_tools = ["token_screener"]
+
+    [tool_cache_ttl]
+    default = 300
+    token_screener = 120
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+
+DEFAULT_TTL_S = 300
+MAX_ENTRIES = 256
+ERROR_PREFIXES = ("Error", "Tool error", "No result returned")
+
+
+def cacheable_tools() -> List[str]:
+    """MCP tools opted in to caching (read-only and idempotent)."""
+    return list(st.secrets.get("tool_cache_tools", []))
+
+def tool_ttl(tool_name: str, mcp_tool: bool) -> float:
+    """Seconds a result of tool_name may be reused; 0 means never cache it."""
+    if not mcp_tool or tool_name not in cacheable_tools():
+        return 0
+    ttls = st.secrets.get("tool_cache_ttl", {})
+    return float(ttls.get(tool_name, ttls.get("default", DEFAULT_TTL_S)))
+
+def cache_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    return tool_name + "\n" + json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+
+
+@dataclass
+class _ToolStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    upstream_s: float = 0.0     # time spent in upstream calls (misses)
+    saved_s: float = 0.0        # upstream time hits and coalesced calls did not spend
+
+
+@dataclass
+class _Entry:
+    result: str
+    expires_at: float
+    upstream_s: float
+
+
+class ToolResultCache:
+    """TTL + LRU cache of tool results with single-flight misses; see module docstring."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._stats: Dict[str, _ToolStats] = {}
+        self._lock = threading.Lock()
+
+    def get_or_call(self, tool_name: str, arguments: Dict[str, Any], ttl: float,
+                    call: Callable[[], str]) -> Tuple[str, str]:
+        """
+        (result, source) where source is "cache", "coalesced" (waited for an identical call
+        already in flight) or "upstream". Error results are returned but never stored.
+        """
+        key = cache_key(tool_name, arguments)
+        with self._lock:
+            stats = self._stats.setdefault(tool_name, _ToolStats())
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.time():
+                self._entries.move_to_end(key)
+                stats.hits += 1
+                stats.saved_s += entry.upstream_s
+                return entry.result, "cache"
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                stats.misses += 1
+            else:
+                stats.coalesced += 1
+
+        if not owner:
+            result, upstream_s = future.result()
+            with self._lock:
+                stats.saved_s += upstream_s
+            return result, "coalesced"
+
+        started = time.perf_counter()
+        try:
+            result = call()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        upstream_s = time.perf_counter() - started
+        with self._lock:
+            stats.upstream_s += upstream_s
+            if ttl > 0 and not result.startswith(ERROR_PREFIXES):
+                self._entries[key] = _Entry(result, time.time() + ttl, upstream_s)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._inflight.pop(key, None)
+        future.set_result((result, upstream_s))
+        return result, "upstream"
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per tool: hits, misses, coalesced calls, hit rate and upstream time saved."""
+        with self._lock:
+            items = [(name, _ToolStats(**vars(s))) for name, s in self._stats.items()]
+        rows = []
+        for name, s in sorted(items, key=lambda item: -(item[1].hits + item[1].coalesced)):
+            calls = s.hits + s.misses + s.coalesced
+            rows.append({
+                "tool": name,
+                "calls": calls,
+                "hits": s.hits,
+                "coalesced": s.coalesced,
+                "misses": s.misses,
+                "hit_rate": (s.hits + s.coalesced) / calls if calls else 0.0,
+                "saved_s": round(s.saved_s, 1),
+            })
+        return rows
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_instance: Optional[ToolResultCache] = None
+_instance_lock = threading.Lock()
+
+def get_tool_cache() -> ToolResultCache:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = ToolResultCache()
+        return _instance
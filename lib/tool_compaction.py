@@ -0,0 +1,232 @@
+"""
+Compaction of tool results before they are fed back to the model.
+
+Tool messages are re-sent on every later round of a chat turn, so a large JSON table
+returned by an MCP tool costs its full token count again and again. Results over the
+token budget are compacted:
+
+    - tabular results (a JSON list of records, a list of records inside a JSON object, or
+      a markdown pipe table) keep the leading rows (tools already return them ranked) and
+      the informative columns; empty columns are dropped, constant ones are reported once,
+      long values are shortened, and rows are sent column-wise to avoid repeating keys;
+    - anything else is cut to the budget.
+
+The full result stays in the session's ToolResultStore, and the model can page through
+it with the get_full_tool_result tool. tiktoken is optional; without it (or when its
+encoding can't be loaded, e.g. offline) tokens are estimated at four characters each.
+"""
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional
+    tiktoken = None
+
+
+DEFAULT_BUDGET_TOKENS = 1500
+PAGE_BUDGET_TOKENS = 4000     # for get_full_tool_result pages the model asked for explicitly
+MAX_VALUE_CHARS = 80
+MAX_STORED_RESULTS = 50
+FULL_RESULT_TOOL = "get_full_tool_result"
+
+_encoding = None
+_encoding_failed = False
+
+def count_tokens(text: str) -> int:
+    global _encoding, _encoding_failed
+    if _encoding is None and tiktoken is not None and not _encoding_failed:
+        try:
+            # Downloads the BPE file on first use
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            _encoding_failed = True
+            print(f"tiktoken encoding unavailable, estimating tokens from characters: {e}")
+    if _encoding is None:
+        return (len(text) + 3) // 4
+    return len(_encoding.encode(text, disallowed_special=()))
+
+def token_budget() -> int:
+    return int(st.secrets.get("tool_result_token_budget", DEFAULT_BUDGET_TOKENS))
+
+
+# ---------- Parsing ----------
+
+def _records_from_json(value: Any) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+    """(records, other top-level fields) for a list of objects or the largest such list in an object."""
+    if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+        return value, {}
+    if isinstance(value, dict):
+        tables = [(k, v) for k, v in value.items()
+                  if isinstance(v, list) and v and all(isinstance(r, dict) for r in v)]
+        if tables:
+            key, records = max(tables, key=lambda kv: len(kv[1]))
+            return records, {k: v for k, v in value.items() if k != key}
+    return None
+
+def _records_from_markdown(text: str) -> Optional[List[Dict[str, Any]]]:
+    lines = [l.strip() for l in text.splitlines() if l.strip().startswith("|")]
+    if len(lines) < 3:
+        return None
+    split = lambda l: [c.strip() for c in l.strip("|").split("|")]
+    header = split(lines[0])
+    body = [split(l) for l in lines[1:] if not set(l) <= set("|-: ")]
+    return [dict(zip(header, row)) for row in body if len(row) == len(header)] or None
+
+def parse_table(text: str) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+    try:
+        return _records_from_json(json.loads(text))
+    except (json.JSONDecodeError, TypeError):
+        records = _records_from_markdown(text)
+        return (records, {}) if records else None
+
+
+# ---------- Compaction ----------
+
+def _short(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, separators=(",", ":"), default=str)
+    if isinstance(value, str) and len(value) > MAX_VALUE_CHARS:
+        return value[:MAX_VALUE_CHARS - 1] + "…"
+    return value
+
+def _columnar(records: List[Dict[str, Any]], columns: List[str], note: str,
+              extra: Dict[str, Any]) -> str:
+    payload = {"note": note, **extra, "columns": columns,
+               "rows": [[_short(r.get(c)) for c in columns] for r in records]}
+    return json.dumps(payload, separators=(",", ":"), default=str)
+
+def compact_records(records: List[Dict[str, Any]], budget: int, note: str,
+                    extra: Optional[Dict[str, Any]] = None) -> Tuple[str, int, List[str]]:
+    """
+    The largest leading slice of records (and its columns) whose columnar JSON fits budget.
+    Returns (text, rows kept, columns kept).
+    """
+    extra = {k: _short(v) for k, v in (extra or {}).items()}
+    columns = list(dict.fromkeys(c for r in records for c in r))
+    # Empty columns carry nothing; constant ones are stated once instead of per row
+    columns = [c for c in columns if any(r.get(c) not in (None, "", [], {}) for r in records)]
+    if len(records) > 1:
+        constant = {c: records[0].get(c) for c in columns
+                    if all(r.get(c) == records[0].get(c) for r in records)}
+        if constant:
+            extra["same_in_every_row"] = {k: _short(v) for k, v in constant.items()}
+            columns = [c for c in columns if c not in constant]
+
+    while True:
+        lo, hi = 0, len(records)
+        # Binary search for the most rows that fit
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if count_tokens(_columnar(records[:mid], columns, note, extra)) <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        if lo > 0 or len(columns) <= 1:
+            break
+        # Not even one row fits: drop the widest column and retry
+        widest = max(columns, key=lambda c: len(str(_short(records[0].get(c)))))
+        columns = [c for c in columns if c != widest]
+    rows = max(lo, 1)
+    return _columnar(records[:rows], columns, note, extra), rows, columns
+
+
+@dataclass(frozen=True)
+class CompactedResult:
+    result_id: str
+    text: str
+    full_tokens: int
+    tokens: int
+    rows_total: Optional[int] = None
+    rows_kept: Optional[int] = None
+
+    @property
+    def compacted(self) -> bool:
+        return self.tokens < self.full_tokens
+
+
+def compact_tool_result(result_id: str, tool_name: str, text: str,
+                        budget: Optional[int] = None) -> CompactedResult:
+    """Compact text to the token budget; results already under it are returned unchanged."""
+    budget = budget or token_budget()
+    full_tokens = count_tokens(text)
+    if full_tokens <= budget:
+        return CompactedResult(result_id, text, full_tokens, full_tokens)
+
+    table = parse_table(text)
+    if table is not None:
+        records, extra = table
+        note = (f"Compacted {tool_name} result: showing the first {{rows}} of {len(records)} rows. "
+                f"Call {FULL_RESULT_TOOL} with result_id={result_id!r} for other rows or columns.")
+        compact, rows, _ = compact_records(records, budget, note, extra)
+        # The note names the row count, so render it once more with the final number
+        compact = compact.replace("{rows}", str(rows), 1)
+        return CompactedResult(result_id, compact, full_tokens, count_tokens(compact), len(records), rows)
+
+    keep = max(0, len(text) * budget // full_tokens - 200)
+    compact = (text[:keep] + f"\n… [truncated {tool_name} result; call {FULL_RESULT_TOOL} with "
+               f"result_id={result_id!r} for the rest]")
+    return CompactedResult(result_id, compact, full_tokens, count_tokens(compact))
+
+
+# ---------- Full results ----------
+
+class ToolResultStore:
+    """A session's full tool results by result_id (the tool_call id), newest MAX_STORED_RESULTS kept."""
+
+    def __init__(self, max_results: int = MAX_STORED_RESULTS):
+        self.max_results = max_results
+        self._results: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, result_id: str, text: str) -> None:
+        with self._lock:
+            self._results[result_id] = text
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+
+    def page(self, result_id: str, offset: int = 0, limit: int = 50,
+             columns: Optional[List[str]] = None) -> str:
+        """Rows [offset, offset + limit) of a stored result (optionally only some columns), within PAGE_BUDGET_TOKENS."""
+        with self._lock:
+            text = self._results.get(result_id)
+        if text is None:
+            return json.dumps({"status": "error", "error": f"No stored result with result_id={result_id!r}"})
+        table = parse_table(text)
+        if table is None:
+            chars = PAGE_BUDGET_TOKENS * 4
+            start = max(0, int(offset))
+            return text[start:start + chars]
+        records, _ = table
+        selected = records[max(0, int(offset)):max(0, int(offset)) + max(1, int(limit))]
+        if columns:
+            selected = [{c: r.get(c) for c in columns} for r in selected]
+        note = f"Rows {offset}..{offset + len(selected) - 1} of {len(records)}."
+        compact, _, _ = compact_records(selected, PAGE_BUDGET_TOKENS, note)
+        return compact
+
+    def tool_definition(self) -> Dict[str, Any]:
+        return {
+            "type": "function",
+            "function": {
+                "name": FULL_RESULT_TOOL,
+                "description": ("Read more of a tool result that was compacted (its note names the result_id): "
+                                "other rows via offset/limit, or specific columns."),
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "result_id": {"type": "string", "description": "result_id from the compacted result's note."},
+                        "offset": {"type": "integer", "description": "First row to return (0-based). Default 0."},
+                        "limit": {"type": "integer", "description": "Number of rows to return. Default 50."},
+                        "columns": {"type": "array", "items": {"type": "string"},
+                                    "description": "Only return these columns (optional)."},
+                    },
+                    "required": ["result_id"],
+                },
+            },
+        }
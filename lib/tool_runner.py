@@ -0,0 +1,166 @@
+"""
+Concurrent execution of the tool calls of one chat turn.
+
+When the model returns several tool_calls at once they are independent by construction,
+so they run side by side instead of one after another: a turn takes roughly its slowest
+tool instead of the sum of all of them.
+
+    - Nansen MCP tools and read-only Hyperliquid handlers share a pool of max_workers.
+    - Hyperliquid handlers that place, change or cancel orders run in one serial lane, in
+      the order the model issued them. Once one of them is queued, later Hyperliquid reads
+      join that lane too, so e.g. a balance check issued after an order sees the order.
+
+Calls stream their progress into per-call state; the script thread renders it into one
+placeholder per call (workers never touch Streamlit elements) and collects the results
+by tool_call id.
+"""
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from lib.hyperliquid_tools import READ_ONLY_TOOLS
+from lib.nansen_mcp_client import NansenMCPClient
+from lib.tool_cache import get_tool_cache, tool_ttl
+
+
+MAX_PARALLEL_TOOLS = 4
+PREVIEW_CHARS = 500
+
+
+@dataclass(eq=False)
+class _ToolCall:
+    call_id: str
+    name: str
+    args: Dict[str, Any]
+    parts: List[str] = field(default_factory=list)
+    result: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    future: Optional[Future] = None
+    source: str = "upstream"   # or "cache" / "coalesced", see ToolResultCache.get_or_call
+    placeholder: Any = None
+    rendered: Optional[Tuple[bool, int, bool]] = None   # (started, len(parts), done) at the last render
+
+    def elapsed_s(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+
+class ToolCallRunner:
+    """Runs one turn's tool calls; submit() each call, then wait() for the results."""
+
+    def __init__(self, mcp_client: NansenMCPClient, hyperliquid_handlers: Dict[str, Callable],
+                 local_handlers: Optional[Dict[str, Callable]] = None, max_workers: int = MAX_PARALLEL_TOOLS):
+        """local_handlers: read-only in-process tools (e.g. get_full_tool_result); never cached."""
+        self._mcp_client = mcp_client
+        self._handlers = hyperliquid_handlers
+        self._local_handlers = local_handlers or {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool-call")
+        self._serial = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tool-call-serial")
+        self._calls: List[_ToolCall] = []
+        self._mutating_queued = False
+        self._ctx = get_script_run_ctx()
+        self._lock = threading.Lock()
+
+    def is_serial(self, name: str) -> bool:
+        """Hyperliquid handlers that change account state."""
+        return name in self._handlers and name not in READ_ONLY_TOOLS
+
+    def is_hyperliquid(self, name: str) -> bool:
+        return name in self._handlers
+
+    def submit(self, call_id: str, name: str, args: Dict[str, Any]) -> None:
+        """Start a tool call and give it a live placeholder below the ones submitted before it."""
+        call = _ToolCall(call_id=call_id, name=name, args=args)
+        st.write(f"🔧 Calling tool: `{name}`")
+        call.placeholder = st.empty()
+        # Hyperliquid reads issued after a state change must not overtake it
+        serial = self.is_serial(name) or (self._mutating_queued and self.is_hyperliquid(name))
+        self._mutating_queued = self._mutating_queued or self.is_serial(name)
+        lane = self._serial if serial else self._pool
+        call.future = lane.submit(self._run, call)
+        self._calls.append(call)
+
+    # ---------- Workers ----------
+
+    def _run(self, call: _ToolCall) -> None:
+        if self._ctx is not None:
+            add_script_run_ctx(threading.current_thread(), self._ctx)
+        call.started_at = time.perf_counter()
+        try:
+            if call.name in self._local_handlers:
+                call.result = self._run_handler(self._local_handlers[call.name], call)
+                return
+            if call.name in self._handlers:
+                call.result = self._run_handler(self._handlers[call.name], call)
+                return
+            ttl = tool_ttl(call.name, mcp_tool=True)
+            if ttl > 0:
+                call.result, call.source = get_tool_cache().get_or_call(
+                    call.name, call.args, ttl, lambda: self._run_mcp(call))
+            else:
+                call.result = self._run_mcp(call)
+        finally:
+            call.finished_at = time.perf_counter()
+
+    def _run_mcp(self, call: _ToolCall) -> str:
+        for chunk in self._mcp_client.call_tool_streaming(call.name, call.args):
+            with self._lock:
+                call.parts.append(chunk)
+        # Progress lines are only shown while the call runs; the last part is the result or
+        # the error, so the cache's error check sees it
+        return call.parts[-1] if call.parts else "No result returned from tool"
+
+    def _run_handler(self, handler: Callable, call: _ToolCall) -> str:
+        try:
+            result = handler(**call.args)
+            return json.dumps(result) if isinstance(result, dict) else str(result)
+        except Exception as e:
+            return json.dumps({"status": "error", "error": str(e)})
+
+    # ---------- Script thread ----------
+
+    def _render(self, call: _ToolCall) -> None:
+        with self._lock:
+            state = (call.started_at is not None, len(call.parts), call.future.done())
+            if state == call.rendered:
+                return
+            call.rendered = state
+            current = "".join(call.parts)
+        if call.future.done():
+            note = {"cache": " (cached)", "coalesced": " (shared with an identical call)"}.get(call.source, "")
+            call.placeholder.caption(f"`{call.name}` finished in {call.elapsed_s():.1f}s{note}")
+        elif call.started_at is None:
+            call.placeholder.caption(f"`{call.name}` queued")
+        elif not current:
+            call.placeholder.info(f"Fetching data from {call.name}...")
+        elif current.startswith("Progress:"):
+            call.placeholder.info(current)
+        else:
+            call.placeholder.text(current[:PREVIEW_CHARS] + "..." if len(current) > PREVIEW_CHARS else current)
+
+    def wait(self, poll_s: float = 0.1) -> Dict[str, str]:
+        """Render progress until every call has finished; returns {call_id: result}."""
+        pending = {call.future for call in self._calls}
+        while True:
+            for call in self._calls:
+                self._render(call)
+            if not pending:
+                break
+            _, pending = wait(pending, timeout=poll_s, return_when=FIRST_COMPLETED)
+        results = {}
+        for call in self._calls:
+            error = call.future.exception()
+            results[call.call_id] = call.result if error is None else f"Error: {error}"
+        return results
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._serial.shutdown(wait=False, cancel_futures=True)
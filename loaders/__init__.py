@@ -0,0 +1,3 @@
+"""
+Package for data loaders shared by several dashboard components.
+"""
@@ -0,0 +1,110 @@
+"""
+Historical balances of a wallet as one tokens x days panel, shared by the Profiler value,
+trends, token-share and volatility components.
+
+The panel is fetched once per (wallet, chain, window, hide_spam) with the broadest payload
+and kept as a float matrix (row per token_symbol, column per UTC day, summed value_usd,
+NaN where the token has no balance that day). Components slice it instead of refetching
+with their own filters and re-pivoting.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dataframes import historical_balances_to_dataframe, daily_token_pivot
+import warehouse
+
+
+@dataclass(frozen=True)
+class BalancePanel:
+    tokens: pd.Index          # token_symbol of each row
+    days: pd.DatetimeIndex    # UTC day of each column, ascending
+    values: np.ndarray        # float64, shape (len(tokens), len(days))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "BalancePanel":
+        if df.empty:
+            return cls(pd.Index([], name="token_symbol"), pd.DatetimeIndex([], tz="UTC", name="day"),
+                       np.empty((0, 0), dtype="float64"))
+        frame = df.assign(block_timestamp=pd.to_datetime(df["block_timestamp"], utc=True, errors="coerce"))
+        wide = daily_token_pivot(frame)  # index=day, columns=token_symbol
+        return cls(
+            tokens=pd.Index(wide.columns, name="token_symbol"),
+            days=pd.DatetimeIndex(wide.index, name="day"),
+            values=np.ascontiguousarray(wide.to_numpy(dtype="float64").T),
+        )
+
+    @property
+    def empty(self) -> bool:
+        return self.values.size == 0
+
+    def _masked(self, min_value_usd: float) -> np.ndarray:
+        if not min_value_usd:
+            return self.values
+        # Cells below the threshold are treated as no holding (dust)
+        return np.where(self.values >= min_value_usd, self.values, np.nan)
+
+    # ---------- Views ----------
+
+    def wide(self, min_value_usd: float = 0.0, tokens: Optional[pd.Index] = None,
+             days: Optional[pd.DatetimeIndex] = None) -> pd.DataFrame:
+        """Day x token frame like daily_token_pivot; NaN where a token has no (or dust) balance."""
+        values = self._masked(min_value_usd)
+        keep = np.any(~np.isnan(values), axis=1)
+        if tokens is not None:
+            keep &= self.tokens.isin(tokens)
+        wide = pd.DataFrame(values[keep].T, index=self.days, columns=self.tokens[keep])
+        if days is not None:
+            wide = wide.reindex(days)
+            wide.index.name = "day"
+        return wide
+
+    def latest(self, min_value_usd: float = 0.0) -> pd.Series:
+        """Each token's value on the last day it has a balance."""
+        values = self._masked(min_value_usd)
+        present = ~np.isnan(values)
+        has_any = present.any(axis=1)
+        # Index of the last present column per row
+        last_idx = values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+        latest = values[np.arange(len(self.tokens)), last_idx]
+        return pd.Series(latest[has_any], index=self.tokens[has_any], name="value_usd")
+
+    def daily_totals(self, min_value_usd: float = 0.0) -> pd.Series:
+        """Portfolio value per day (days with no balances at all are dropped)."""
+        values = self._masked(min_value_usd)
+        present = ~np.isnan(values).all(axis=0)
+        return pd.Series(np.nansum(values[:, present], axis=0), index=self.days[present], name="value_usd")
+
+    def top_tokens(self, n: int, min_value_usd: float = 0.0) -> pd.Index:
+        """Tokens with the largest value summed over the window."""
+        totals = np.nansum(self._masked(min_value_usd), axis=1)
+        order = np.argsort(-totals, kind="stable")[:n]
+        return self.tokens[order[totals[order] > 0]]
+
+
+@st.cache_data(ttl=300)
+def load_balance_panel(_client, wallet, chain, from_iso, to_iso, hide_spam: bool = True) -> BalancePanel:
+    # The response carries no spam flag, so spam can only be filtered upstream; the
+    # value_usd floor the components use is applied locally (BalancePanel min_value_usd).
+    payload = {
+        "address": wallet,
+        "chain": chain,
+        "filters": {"hide_spam_tokens": hide_spam},
+        "date": {
+            "from": from_iso,
+            "to": to_iso
+        },
+        "pagination": {
+            "page": 1,
+            "per_page": 1000
+        },
+    }
+
+    items = _client.profiler_address_historical_balances(payload=payload, fetch_all=True)
+    df = historical_balances_to_dataframe(items)
+    warehouse.persist("historical_balances", df, chain=chain, address=wallet)
+
+    return BalancePanel.from_frame(df)
@@ -0,0 +1,178 @@
+"""
+Holders of a token, fetched once per (chain, token, aggregate_by_entity) and shared by the
+TGM donut chart, the holder flows chart and the AI summary.
+"""
+from dataclasses import dataclass
+from typing import Dict
+
+import pandas as pd
+import requests
+
+from nansen_client import NansenClient
+from dataframes import holders_to_dataframe, holder_type_summary, holder_flows_by_type
+from dataset_cache import shared_dataset
+import warehouse
+
+SMART_MONEY_LABELS = [
+    "30D Smart Trader",
+    "Fund",
+    "90D Smart Trader",
+    "180D Smart Trader",
+    "Smart Trader",
+]
+
+NUMERIC_COLUMNS = [
+    "token_amount", "total_outflow", "total_inflow",
+    "balance_change_24h", "balance_change_7d", "balance_change_30d",
+    "ownership_percentage", "value_usd",
+]
+TEXT_COLUMNS = ["address", "address_label", "holder_type"]
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Fixed columns and dtypes regardless of what the API (or the warehouse) returned."""
+    out = df.copy()
+    for col in TEXT_COLUMNS:
+        if col not in out.columns:
+            out[col] = pd.Series(dtype="object", index=out.index)
+    out["address_label"] = out["address_label"].fillna("")
+    for col in NUMERIC_COLUMNS:
+        out[col] = pd.to_numeric(out[col], errors="coerce").astype("float64") if col in out.columns \
+            else pd.Series(0.0, index=out.index, dtype="float64")
+    extra = [c for c in out.columns if c not in TEXT_COLUMNS + NUMERIC_COLUMNS]
+    return out[TEXT_COLUMNS + NUMERIC_COLUMNS + extra]
+
+
+@shared_dataset(ttl=300, show_spinner=False)
+def fetch_holders(chain, token_address, aggregate_by_entity):
+    client = NansenClient()
+
+    # Superset of what the holder components show; each derives its view locally.
+    payload = {
+        "chain": chain,
+        "token_address": token_address,
+        "aggregate_by_entity": aggregate_by_entity,
+        "label_type": "all_holders",
+        "pagination": {
+            "page": 1,
+            "per_page": 100
+        },
+        "filters": {
+            "include_smart_money_labels": SMART_MONEY_LABELS,
+            "ownership_percentage": {
+                "min": 0.001
+            },
+            "token_amount": {
+                "min": 1000
+            },
+            "value_usd": {
+                "min": 10000
+            }
+        },
+        "order_by": [
+            {
+                "field": "ownership_percentage",
+                "direction": "DESC"
+            }
+        ]
+    }
+
+    context = {"token_address": token_address, "aggregate_by_entity": aggregate_by_entity}
+    try:
+        items = client.tgm_holders(payload, fetch_all=True)
+    except requests.exceptions.RequestException:
+        # API unavailable: fall back to the last persisted snapshot if there is one
+        df = warehouse.load_latest_snapshot("tgm_holders", chain=chain, where=context)
+        if df.empty:
+            raise
+        return _typed(df)
+    df = holders_to_dataframe(items)
+    warehouse.persist("tgm_holders", df, chain=chain, **context)
+
+    return _typed(df)
+
+
+@dataclass(frozen=True)
+class HoldersDataset:
+    chain: str
+    token_address: str
+    aggregate_by_entity: bool
+    frame: pd.DataFrame  # one row per holder, columns TEXT_COLUMNS + NUMERIC_COLUMNS
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    # ---------- Views ----------
+
+    def by_ownership(self, min_ownership_pct: float = 0.0) -> pd.DataFrame:
+        """Holders sorted by ownership_percentage, largest first."""
+        df = self.frame
+        if min_ownership_pct:
+            df = df[df["ownership_percentage"] >= min_ownership_pct]
+        return df.sort_values("ownership_percentage", ascending=False, kind="stable").reset_index(drop=True)
+
+    def top(self, n: int, by: str = "value_usd") -> pd.DataFrame:
+        return self.frame.nlargest(n, by)
+
+    def by_type(self) -> pd.DataFrame:
+        """Per holder_type address count, token amount, inflow, value and mean ownership."""
+        return holder_type_summary(self.frame)
+
+    def flows_by_type(self) -> pd.DataFrame:
+        """Per holder_type total inflow and outflow."""
+        return holder_flows_by_type(self.frame)
+
+    # ---------- AI summary ----------
+
+    def summary(self) -> Dict:
+        holder_distribution = {}
+        for row in self.by_type().itertuples(index=False):
+            holder_distribution[row.holder_type] = {
+                "count": int(row.address),
+                "total_value_usd": float(row.value_usd),
+                "avg_ownership_pct": float(row.ownership_percentage),
+                "total_token_amount": float(row.token_amount),
+            }
+
+        top_5_holders = self.top(5)[
+            ["address_label", "value_usd", "ownership_percentage", "holder_type"]
+        ].to_dict("records")
+
+        top_10_ownership = float(self.top(10, "ownership_percentage")["ownership_percentage"].sum())
+
+        return {
+            "total_holders": len(self.frame),
+            "holder_distribution": holder_distribution,
+            "top_5_holders": top_5_holders,
+            "concentration": {
+                "top_10_ownership_pct": top_10_ownership
+            }
+        }
+
+    def flows_summary(self) -> Dict:
+        holder_type_flows = {}
+        net_flow_by_type = {}
+        for row in self.flows_by_type().itertuples(index=False):
+            inflow = float(row.total_inflow)
+            outflow = float(row.total_outflow)
+            holder_type_flows[row.holder_type] = {
+                "inflow": inflow,
+                "outflow": outflow
+            }
+            net_flow_by_type[row.holder_type] = inflow - outflow
+
+        return {
+            "holder_type_flows": holder_type_flows,
+            "net_flow_by_type": net_flow_by_type
+        }
+
+
+def load_holders(chain: str, token_address: str, aggregate_by_entity: bool) -> HoldersDataset:
+    """Holders of token_address; the underlying fetch is shared across components and sessions."""
+    return HoldersDataset(
+        chain=chain,
+        token_address=token_address,
+        aggregate_by_entity=aggregate_by_entity,
+        frame=fetch_holders(chain, token_address, aggregate_by_entity),
+    )
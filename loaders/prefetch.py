@@ -0,0 +1,122 @@
+"""
+Concurrent prefetch stage for dashboard pages.
+
+A page submits every fetch for the current selection up front, then renders each
+component as soon as the data it needs has resolved:
+
+    prefetch = Prefetcher(max_workers=8)
+    prefetch.submit("holders", fetch_holders, chain, token, False)
+    for key in prefetch.as_completed():
+        ...render the components that need `key`...
+
+Fetchers keep their own caches (st.cache_data / shared_dataset), so a component calling
+its fetcher after the prefetch has resolved gets a cache hit instead of a second request.
+Tasks run with the page's ScriptRunContext attached so st.cache_data and st.secrets
+behave as they do on the script thread.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+
+@dataclass
+class _Timing:
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+class Prefetcher:
+    """Runs keyed fetches in a bounded thread pool; a key is only ever submitted once."""
+
+    def __init__(self, max_workers: int = 8, name: str = "prefetch"):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._futures: Dict[str, Future] = {}
+        self._timings: Dict[str, _Timing] = {}
+        self._ctx = get_script_run_ctx()
+        self._created_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, fn: Callable, *args, **kwargs) -> Future:
+        """Start fn(*args, **kwargs) under key, or return the future already running for key."""
+        with self._lock:
+            if key in self._futures:
+                return self._futures[key]
+            timing = _Timing(submitted_at=time.perf_counter())
+            self._timings[key] = timing
+            future = self._executor.submit(self._run, timing, fn, args, kwargs)
+            self._futures[key] = future
+            return future
+
+    def _run(self, timing: _Timing, fn: Callable, args, kwargs):
+        if self._ctx is not None:
+            add_script_run_ctx(threading.current_thread(), self._ctx)
+        timing.started_at = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            timing.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            timing.finished_at = time.perf_counter()
+
+    def future(self, key: str) -> Optional[Future]:
+        return self._futures.get(key)
+
+    def result(self, key: str, timeout: Optional[float] = None) -> Any:
+        """Block until key resolves; re-raises the fetch's exception."""
+        return self._futures[key].result(timeout=timeout)
+
+    def wait(self, keys: Iterable[str], timeout: Optional[float] = None) -> None:
+        """Block until all keys have resolved (successfully or not)."""
+        wait([self._futures[k] for k in keys if k in self._futures], timeout=timeout)
+
+    def as_completed(self, keys: Optional[Iterable[str]] = None) -> Iterator[str]:
+        """Yield keys in the order their fetches finish (failed fetches included)."""
+        pending = {self._futures[k]: k for k in (keys if keys is not None else list(self._futures))}
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            # Deterministic order among fetches that finished together
+            for future in sorted(done, key=lambda f: self._timings[pending[f]].finished_at or 0):
+                yield pending.pop(future)
+
+    def as_ready(self, groups: Dict[str, List[str]]) -> Iterator[str]:
+        """
+        Yield each group name (e.g. a component) once every key it lists has resolved, in
+        resolution order. Groups without any submitted key are yielded first.
+        """
+        remaining = {name: {k for k in keys if k in self._futures} for name, keys in groups.items()}
+        for name in [n for n, keys in remaining.items() if not keys]:
+            remaining.pop(name)
+            yield name
+        for key in self.as_completed({k for keys in remaining.values() for k in keys}):
+            for name in list(remaining):
+                remaining[name].discard(key)
+                if not remaining[name]:
+                    remaining.pop(name)
+                    yield name
+
+    def timings(self) -> pd.DataFrame:
+        """One row per dataset: status, queue wait and fetch time, and when it resolved."""
+        rows: List[Dict[str, Any]] = []
+        for key, t in self._timings.items():
+            future = self._futures[key]
+            status = "running" if not future.done() else ("error" if t.error else "ok")
+            rows.append({
+                "dataset": key,
+                "status": status,
+                "queued_s": round((t.started_at or time.perf_counter()) - t.submitted_at, 3),
+                "fetch_s": round(t.finished_at - t.started_at, 3) if t.finished_at and t.started_at else None,
+                "resolved_at_s": round(t.finished_at - self._created_at, 3) if t.finished_at else None,
+                "error": t.error,
+            })
+        return pd.DataFrame(rows)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
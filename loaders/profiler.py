@@ -0,0 +1,62 @@
+"""
+Prefetch stage for the Profiler dashboard: launches every Profiler endpoint request for
+(wallet, chains, window) together in a bounded pool, so a whale wallet costs roughly the
+slowest endpoint instead of the sum of all of them.
+"""
+from typing import Dict, List
+
+from loaders.prefetch import Prefetcher
+from loaders.balances import load_balance_panel
+from loaders.profiler_dataset import ProfilerDataset
+from components import pfl_portfolio_treemap, pfl_transactions_log_hist
+
+# Kept small: the Profiler endpoints are rate limited per API key.
+MAX_WORKERS = 6
+
+# Datasets each Profiler component reads; a component renders once all of them have resolved.
+COMPONENT_DATASETS: Dict[str, List[str]] = {
+    "value_metrics": ["balance_panel"],
+    "treemap": ["current_balance"],
+    "trends_metrics": ["balance_panel"],
+    "token_share": ["balance_panel"],
+    "volatility": ["balance_panel"],
+    "relations_metrics": ["counterparties", "related_wallets"],
+    "counterparty_network": ["counterparties"],
+    "related_wallet_network": ["related_wallets"],
+    "pnl_metrics": ["pnl_summary"],
+    "token_pnl_waterfall": ["pnl_summary"],
+    "roi_pnl_scatter": ["pnl_summary"],
+    "transactions_hist": ["transactions"],
+}
+
+
+def start_profiler_prefetch(dataset: ProfilerDataset, hide_spam: bool = True) -> Prefetcher:
+    """
+    Submit every Profiler fetch for the dataset's (wallet, chains, window). The pnl-summary,
+    counterparty and related-wallet endpoints are loaded into the dataset itself, which the
+    components then read; the others match the arguments the components pass to their
+    cached fetchers.
+    """
+    client, wallet = dataset.client, dataset.wallet
+    chain_all, chain_tx = dataset.chain_all, dataset.chain_tx
+    from_iso, to_iso = dataset.from_iso, dataset.to_iso
+    prefetch = Prefetcher(max_workers=MAX_WORKERS, name="profiler-prefetch")
+
+    # historical-balances (one panel for the value, trends, token-share and volatility components)
+    prefetch.submit("balance_panel", load_balance_panel,
+                    client, wallet, chain_all, from_iso, to_iso, hide_spam)
+
+    # current-balance
+    prefetch.submit("current_balance", pfl_portfolio_treemap._fetch_balances_df,
+                    client, wallet, chain_all, hide_spam)
+
+    # counterparties / related-wallets / pnl-summary (one call each, shared via the dataset)
+    prefetch.submit("counterparties", lambda: dataset.counterparties)
+    prefetch.submit("related_wallets", lambda: dataset.related_wallets)
+    prefetch.submit("pnl_summary", lambda: dataset.pnl_summary)
+
+    # transactions
+    prefetch.submit("transactions", pfl_transactions_log_hist.fetch_trade_size_distribution,
+                    wallet, chain_tx, from_iso, to_iso)
+
+    return prefetch
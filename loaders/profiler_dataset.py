@@ -0,0 +1,169 @@
+"""
+Per-wallet Profiler dataset: pnl-summary, counterparties and related wallets are each
+fetched once per page load and shared by every component that needs them, which reads a
+derived view (top-N, aggregates) instead of calling the endpoint again.
+"""
+import time
+from functools import cached_property
+from typing import Dict
+
+import pandas as pd
+import streamlit as st
+
+from nansen_client import NansenClient
+from dataframes import single_pnl_summary_to_dataframe, counterparties_to_dataframe, related_wallets_to_dataframe
+from analytics.counterparty_graph import CounterpartyGraph, build_counterparty_graph
+
+# Counterparty paging bounds: 100 pages of 100 cover 10k counterparties, largest first
+MAX_COUNTERPARTY_PAGES = 100
+COUNTERPARTY_TIME_BUDGET_S = 10.0
+
+
+@st.cache_data(ttl=300)
+def fetch_pnl_summary(_client, wallet, chain_all, from_iso, to_iso) -> Dict:
+    payload = {
+        "address": wallet,
+        "chain": chain_all,
+        "date": {
+            "from": from_iso,
+            "to": to_iso
+        },
+    }
+
+    return _client.profiler_address_pnl_summary(payload=payload) or {}
+
+@st.cache_data(ttl=300)
+def fetch_counterparties(_client, wallet, chain_all, from_iso, to_iso, max_pages=MAX_COUNTERPARTY_PAGES,
+                         time_budget_s=COUNTERPARTY_TIME_BUDGET_S) -> Dict:
+    """
+    Counterparties, largest volume first (the top-N network is a prefix of this), as
+    {"frame", "pages", "stopped"}. stopped is None when every page was read, otherwise
+    "max_pages" or "time_budget": the frame then misses the smallest counterparties.
+    """
+    deadline = time.perf_counter() + time_budget_s
+    payload = {
+        "address": wallet,
+        "chain": chain_all,
+        "source_input": "Combined",
+        "group_by": "wallet",
+        "date": {
+            "from": from_iso,
+            "to": to_iso
+        },
+        "order_by": [{"field": "total_volume_usd", "direction": "DESC"}],
+        "pagination": {
+            "page": 1,
+            "per_page": 100
+        },
+    }
+
+    items, pages, stopped = [], 0, None
+    for response in _client.profiler_address_counterparties_pages(payload, max_pages=max_pages):
+        items.extend(response.get("data", []))
+        pages += 1
+        if response["pagination"]["is_last_page"] is True:
+            break
+        if pages >= max_pages:
+            stopped = "max_pages"
+            break
+        if time.perf_counter() > deadline:
+            stopped = "time_budget"
+            break
+
+    return {"frame": counterparties_to_dataframe(items), "pages": pages, "stopped": stopped}
+
+@st.cache_data(ttl=300)
+def fetch_related_wallets(_client, wallet, chain_tx) -> pd.DataFrame:
+    # All related wallets in relation order: the top-N network is a prefix of this
+    payload = {
+        "address": wallet,
+        "chain": chain_tx,
+        "order_by": [{"field": "order", "direction": "ASC"}],
+        "pagination": {
+            "page": 1,
+            "per_page": 100
+        },
+    }
+
+    items = _client.profiler_address_related_wallets(payload=payload, fetch_all=True)
+    df = related_wallets_to_dataframe(items)
+
+    return df
+
+
+class ProfilerDataset:
+    """
+    Lazily fetched, memoized Profiler endpoints for one (wallet, chains, window).
+    Views return new frames, so components may modify them freely.
+    """
+
+    def __init__(self, client: NansenClient, wallet: str, chain_all: str, chain_tx: str,
+                 from_iso: str, to_iso: str):
+        self.client = client
+        self.wallet = wallet
+        self.chain_all = chain_all
+        self.chain_tx = chain_tx
+        self.from_iso = from_iso
+        self.to_iso = to_iso
+
+    # ---------- Endpoints (one call each) ----------
+
+    @cached_property
+    def pnl_summary(self) -> Dict:
+        return fetch_pnl_summary(self.client, self.wallet, self.chain_all, self.from_iso, self.to_iso)
+
+    @cached_property
+    def counterparties_fetch(self) -> Dict:
+        """The counterparties frame with the pages read and why paging stopped early, if it did."""
+        return fetch_counterparties(self.client, self.wallet, self.chain_all, self.from_iso, self.to_iso)
+
+    @property
+    def counterparties(self) -> pd.DataFrame:
+        return self.counterparties_fetch["frame"]
+
+    @cached_property
+    def related_wallets(self) -> pd.DataFrame:
+        return fetch_related_wallets(self.client, self.wallet, self.chain_tx)
+
+    # ---------- pnl-summary views ----------
+
+    def pnl_metrics(self) -> pd.DataFrame:
+        """One-row frame of wallet-level realized PnL, ROI and win rate."""
+        return single_pnl_summary_to_dataframe(self.pnl_summary)
+
+    def top_tokens_pnl(self) -> pd.DataFrame:
+        """Per-token realized PnL / ROI of the wallet's top tokens."""
+        return pd.DataFrame(self.pnl_summary.get("top5_tokens", []))
+
+    # ---------- Counterparty views ----------
+
+    def top_counterparties(self, n: int = 10) -> pd.DataFrame:
+        return self.counterparties.head(n).copy()
+
+    @cached_property
+    def counterparty_graph(self) -> CounterpartyGraph:
+        """Every counterparty as a sparse graph, with the long tail collapsed into per-label groups."""
+        return build_counterparty_graph(self.counterparties, self.wallet,
+                                        fetch_stopped=self.counterparties_fetch["stopped"])
+
+    def counterparty_stats(self) -> Dict:
+        df = self.counterparties
+        total_vol = df["total_volume_usd"].sum() if "total_volume_usd" in df.columns else 0
+        return {
+            "unique": int(df["counterparty_address"].nunique()) if not df.empty else 0,
+            "top_share_pct": float(df["total_volume_usd"].max() / total_vol * 100) if total_vol > 0 else 0.0,
+        }
+
+    # ---------- Related-wallet views ----------
+
+    def top_related_wallets(self, n: int = 10) -> pd.DataFrame:
+        return self.related_wallets.head(n).copy()
+
+    def related_wallet_stats(self) -> Dict:
+        df = self.related_wallets
+        # count interactions per wallet
+        counts = df.groupby("address").size() if not df.empty else pd.Series(dtype="int64")
+        return {
+            "unique": int(df["address"].nunique()) if not df.empty else 0,
+            "top_share_pct": float(counts.max() / counts.sum() * 100) if counts.sum() > 0 else 0.0,
+        }
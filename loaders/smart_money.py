@@ -0,0 +1,244 @@
+"""
+Shared smart-money snapshots for the Landing page.
+
+Rather than one /smart-money/netflow and /smart-money/dex-trades request per filter
+combination, each endpoint is fetched wide (all chains, no market-cap filter, every page)
+once per set of excluded smart-money labels. The snapshot is held once per process, sorted
+and indexed by (chain, market-cap decade), and every chain / market-cap selection is
+answered from it locally.
+
+Snapshots are refreshed stale-while-revalidate: after REFRESH_S a reader still gets the
+current snapshot immediately while a single background thread fetches the next one.
+Only the very first read of a label set waits for the network. When refresher.py is
+running it publishes the hot label sets on its own schedule and the store picks those
+copies up instead of fetching, so no Streamlit rerun pays for the fetch.
+
+    snapshot = get_snapshot("netflow", excl_labels)
+    df = snapshot.query(chains, min_mc, max_mc)
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from nansen_client import NansenClient
+from dataframes import net_flow_to_dataframe, dex_trades_to_dataframe
+from dataset_cache import read_published
+import warehouse
+
+
+REFRESH_S = 300        # snapshot age after which a background refresh starts
+MAX_AGE_S = 60 * 60    # older snapshots are not served; the reader waits for a fresh one
+NO_BUCKET = -999       # market-cap bucket of rows without a market cap
+
+ENDPOINTS = {
+    # kind: (market-cap column, chain column)
+    "netflow": ("market_cap_usd", "chain"),
+    "dex_trades": ("token_bought_market_cap", "chain"),
+}
+
+
+def _mc_bucket(mc: pd.Series) -> np.ndarray:
+    """floor(log10(market cap)); NO_BUCKET where missing or not positive."""
+    values = mc.to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        buckets = np.floor(np.log10(values))
+    return np.where(np.isfinite(buckets), buckets, NO_BUCKET).astype("int64")
+
+
+@dataclass(frozen=True)
+class SmartMoneySnapshot:
+    kind: str
+    frame: pd.DataFrame                           # sorted by (chain, _mc_bucket)
+    index: Dict[Tuple[str, int], Tuple[int, int]]  # (chain, bucket) -> row slice
+    fetched_at: float
+
+    @classmethod
+    def build(cls, kind: str, df: pd.DataFrame, fetched_at: Optional[float] = None) -> "SmartMoneySnapshot":
+        mc_col, chain_col = ENDPOINTS[kind]
+        if mc_col not in df.columns:
+            df = df.assign(**{mc_col: np.nan})
+        frame = (
+            df.assign(_mc_bucket=_mc_bucket(pd.to_numeric(df[mc_col], errors="coerce")))
+            .sort_values([chain_col, "_mc_bucket"], kind="stable")
+            .reset_index(drop=True)
+        )
+        index = {}
+        if not frame.empty:
+            keys = list(zip(frame[chain_col].astype(str), frame["_mc_bucket"]))
+            starts = np.flatnonzero([True] + [a != b for a, b in zip(keys, keys[1:])])
+            stops = np.append(starts[1:], len(keys))
+            index = {keys[s]: (int(s), int(e)) for s, e in zip(starts, stops)}
+        return cls(kind=kind, frame=frame, index=index, fetched_at=fetched_at or time.time())
+
+    @property
+    def age_s(self) -> float:
+        return time.time() - self.fetched_at
+
+    @property
+    def chains(self) -> Sequence[str]:
+        return sorted({chain for chain, _ in self.index})
+
+    def query(self, chains: Optional[Iterable[str]] = None, min_mc: Optional[float] = None,
+              max_mc: Optional[float] = None) -> pd.DataFrame:
+        """
+        Rows on the given chains ("all" or None = every chain) with min_mc <= market cap <= max_mc.
+        Without bounds, rows lacking a market cap are included. Returns a new frame.
+        """
+        mc_col, _ = ENDPOINTS[self.kind]
+        chains = None if chains is None or "all" in chains else set(chains)
+        bounded = min_mc is not None or max_mc is not None
+        lo = NO_BUCKET + 1 if bounded else NO_BUCKET
+        lo = max(lo, int(np.floor(np.log10(min_mc)))) if min_mc else lo
+        hi = int(np.floor(np.log10(max_mc))) if max_mc else None
+
+        slices = [
+            (start, stop) for (chain, bucket), (start, stop) in self.index.items()
+            if (chains is None or chain in chains) and bucket >= lo and (hi is None or bucket <= hi)
+        ]
+        if not slices:
+            return self.frame.iloc[0:0].drop(columns="_mc_bucket")
+        rows = np.concatenate([np.arange(start, stop) for start, stop in sorted(slices)])
+        out = self.frame.iloc[rows]
+        # Buckets are decades; the bounds themselves are applied exactly
+        if bounded:
+            mc = out[mc_col]
+            out = out[mc.between(min_mc if min_mc is not None else -np.inf,
+                                 max_mc if max_mc is not None else np.inf)]
+        return out.drop(columns="_mc_bucket").reset_index(drop=True)
+
+
+# ---------- Fetchers ----------
+
+def _fetch_netflow(client: NansenClient, excl_labels: Tuple[str, ...]) -> pd.DataFrame:
+    payload = {
+        "chains": ["all"],
+        "filters": {
+            "include_stablecoins": False,
+            "include_native_tokens": False,
+            "exclude_smart_money_labels": list(excl_labels),
+        },
+        "pagination": {"page": 1, "per_page": 100},
+        "order_by": [{"field": "net_flow_24h_usd", "direction": "DESC"}],
+    }
+    items = client.smart_money_netflow(payload=payload, fetch_all=True)
+    return net_flow_to_dataframe(items)
+
+def _fetch_dex_trades(client: NansenClient, excl_labels: Tuple[str, ...]) -> pd.DataFrame:
+    payload = {
+        "chains": ["all"],
+        "filters": {
+            "exclude_smart_money_labels": list(excl_labels),
+        },
+        "pagination": {"page": 1, "per_page": 100},
+        "order_by": [{"field": "trade_value_usd", "direction": "DESC"}],
+    }
+    items = client.smart_money_dex_trades(payload=payload, fetch_all=True)
+    return dex_trades_to_dataframe(items)
+
+FETCHERS = {"netflow": _fetch_netflow, "dex_trades": _fetch_dex_trades}
+
+def fetch_wide(kind: str, excl_labels: Iterable[str] = (), client: Optional[NansenClient] = None,
+               persist: bool = True) -> pd.DataFrame:
+    """
+    The full, unindexed frame behind a snapshot; what refresher.py publishes. The unfiltered
+    netflow is also appended to the warehouse unless persist is False.
+    """
+    labels = tuple(sorted(excl_labels))
+    df = FETCHERS[kind](client or NansenClient(), labels)
+    if persist and kind == "netflow" and not labels:
+        warehouse.persist("smart_money_netflow", df, chain="all")
+    return df
+
+def published_name(kind: str, excl_labels: Iterable[str] = ()) -> str:
+    labels = sorted(excl_labels)
+    suffix = "-excl-" + "-".join(l.lower().replace(" ", "_") for l in labels) if labels else ""
+    return f"smart_money.{kind}{suffix}"
+
+
+# ---------- Store ----------
+
+class SnapshotStore:
+    """Process-wide snapshots keyed by (kind, excluded labels), refreshed in the background."""
+
+    def __init__(self, client: Optional[NansenClient] = None):
+        self._client = client
+        self._snapshots: Dict[Tuple[str, Tuple[str, ...]], SmartMoneySnapshot] = {}
+        self._refreshing: Dict[Tuple[str, Tuple[str, ...]], threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[Tuple[str, Tuple[str, ...]], threading.Lock] = {}
+
+    def _fetch(self, key) -> SmartMoneySnapshot:
+        kind, excl_labels = key
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        # Single flight per key: concurrent first reads share one fetch
+        with fetch_lock:
+            current = self._snapshots.get(key)
+            if current is not None and current.age_s < REFRESH_S:
+                return current
+            published = read_published(published_name(kind, excl_labels), max_age_s=REFRESH_S)
+            if published is not None:
+                df, published_at = published
+                snapshot = SmartMoneySnapshot.build(kind, df, fetched_at=published_at)
+            else:
+                snapshot = SmartMoneySnapshot.build(kind, fetch_wide(kind, excl_labels, self._client))
+            with self._lock:
+                self._snapshots[key] = snapshot
+            return snapshot
+
+    def _refresh_in_background(self, key) -> None:
+        def run():
+            try:
+                self._fetch(key)
+            except Exception as e:
+                print(f"Smart money snapshot refresh {key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.pop(key, None)
+
+        with self._lock:
+            if key in self._refreshing:
+                return
+            thread = threading.Thread(target=run, name=f"sm-snapshot-{key[0]}", daemon=True)
+            self._refreshing[key] = thread
+        thread.start()
+
+    def get(self, kind: str, excl_labels: Iterable[str] = ()) -> SmartMoneySnapshot:
+        key = (kind, tuple(sorted(excl_labels)))
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+        if snapshot is None or snapshot.age_s > MAX_AGE_S:
+            return self._fetch(key)
+        if snapshot.age_s > REFRESH_S:
+            self._refresh_in_background(key)
+        return snapshot
+
+    def stats(self) -> pd.DataFrame:
+        with self._lock:
+            items = [(key, s, key in self._refreshing) for key, s in self._snapshots.items()]
+        return pd.DataFrame([{
+            "snapshot": kind,
+            "excluded_labels": ", ".join(labels),
+            "rows": len(s.frame),
+            "age_s": round(s.age_s, 1),
+            "refreshing": refreshing,
+        } for (kind, labels), s, refreshing in items])
+
+
+_instance: Optional[SnapshotStore] = None
+_instance_lock = threading.Lock()
+
+def get_snapshot_store() -> SnapshotStore:
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = SnapshotStore()
+        return _instance
+
+def get_snapshot(kind: str, excl_labels: Iterable[str] = ()) -> SmartMoneySnapshot:
+    """The current snapshot of kind ("netflow" or "dex_trades") for a label-exclusion set."""
+    return get_snapshot_store().get(kind, excl_labels)
@@ -0,0 +1,68 @@
+"""
+Prefetch stage for the TGM dashboard: starts every dataset the page needs for the selected
+token at once, so the time to a full dashboard is roughly the slowest single fetch.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from loaders.prefetch import Prefetcher
+from loaders.holders import fetch_holders
+from components import sm_gauge, tgm_token_metrics
+from components.tgm_dextrades_combo_chart import fetch_tgm_dex_trades
+from components.tgm_pnl_leaderboard_bubble_chart import fetch_leaderboard_with_pnl
+
+# Datasets each TGM component reads; a component renders once all of them have resolved.
+COMPONENT_DATASETS: Dict[str, List[str]] = {
+    "gauges": ["all_trade_counts", "smart_money_trade_counts"],
+    "token_metrics": ["token_screener"],
+    "holders": ["holders"],
+    "pnl_bubble": ["pnl_leaderboard"],
+    "dex_hourly": ["smart_money_dex_trades"],
+}
+
+
+@dataclass(frozen=True)
+class PeriodWindows:
+    """
+    Date ranges of the selected period, computed once per run and passed to both the
+    prefetch and the components, so they build the same cache keys. None when the period
+    does not apply to that component.
+    """
+    gauge_dates: Optional[Tuple[str, str]]      # sm_gauge.period_dates
+    metrics_window: Optional[Tuple[str, str]]   # tgm_token_metrics.period_window
+
+
+def period_windows(period: str) -> PeriodWindows:
+    return PeriodWindows(
+        gauge_dates=sm_gauge.period_dates(period) if period in sm_gauge.PERIODS else None,
+        metrics_window=tgm_token_metrics.period_window(period) if period in tgm_token_metrics.PERIODS else None,
+    )
+
+
+def start_tgm_prefetch(chain: str, token_address: str, windows: PeriodWindows, aggregate_by_entity: bool,
+                       max_workers: int = 8) -> Prefetcher:
+    """
+    Submit every TGM fetch for (chain, token, period windows). Arguments match what each
+    component passes to its cached fetcher, so components hit the cache once their data
+    has resolved.
+    """
+    prefetch = Prefetcher(max_workers=max_workers, name="tgm-prefetch")
+
+    if windows.gauge_dates is not None:
+        from_date, to_date = windows.gauge_dates
+        prefetch.submit("all_trade_counts", sm_gauge.fetch_trade_counts,
+                        chain, token_address, from_date, to_date, False, sm_gauge.MAX_COUNT_PAGES)
+        prefetch.submit("smart_money_trade_counts", sm_gauge.fetch_trade_counts,
+                        chain, token_address, from_date, to_date, True)
+
+    if windows.metrics_window is not None:
+        from_datetime, to_datetime = windows.metrics_window
+        prefetch.submit("token_screener", tgm_token_metrics.fetch_token_screener,
+                        chain, token_address, from_datetime, to_datetime)
+
+    prefetch.submit("holders", fetch_holders, chain, token_address, aggregate_by_entity)
+    prefetch.submit("pnl_leaderboard", fetch_leaderboard_with_pnl, chain, token_address)
+    prefetch.submit("smart_money_dex_trades", fetch_tgm_dex_trades, chain, token_address)
+
+    return prefetch
+
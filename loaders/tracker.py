@@ -0,0 +1,169 @@
+"""
+Staged pipeline for the starred-wallet token tracker.
+
+    1. transactions  - each wallet's last 48h from the wallet watcher's buffer (no request)
+    2. swaps         - swap rows parsed into (token, chain) -> (wallet, label) -> txs; tokens deduplicated
+    3. screener      - one request per distinct token         } submitted together, both only
+    4. balances      - one request per distinct (wallet, token) } depend on stage 2
+
+Transactions come from the background wallet watcher (loaders.wallet_watcher), which
+only polls for new activity. Requests run in one bounded pool and every fetcher is
+st.cache_data cached, so a rerun within the TTL only repeats the (cheap) parsing.
+Failed or empty wallets and tokens are skipped rather than aborting the whole tracker.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from nansen_client import NansenClient
+from dataframes import tgm_token_screener_to_dataframe
+from loaders.prefetch import Prefetcher
+from loaders.wallet_watcher import get_wallet_watcher
+
+# Kept small: the screener and current-balance endpoints are rate limited per API key.
+MAX_WORKERS = 8
+
+ETH_SWAP_IN_METHODS = [
+    "swapExactTokensForTokens", "swapTokensForExactTokens",
+    "swapExactETHForTokens", "swapETHForExactTokens",
+    "swapExactTokensForTokensSupportingFeeOnTransferTokens",
+    "swapExactETHForTokensSupportingFeeOnTransferTokens",
+]
+ETH_SWAP_OUT_METHODS = [
+    "swapTokensForExactETH", "swapExactTokensForETH",
+    "swapExactTokensForETHSupportingFeeOnTransferTokens",
+]
+
+TokenKey = Tuple[str, str]    # (token_address, chain)
+WalletKey = Tuple[str, str]   # (wallet, wallet_label)
+
+
+@st.cache_data(ttl=300)
+def fetch_token_screener(_client, chain, from_iso, to_iso, token_address):
+    token_payload = {
+        "chains": [chain],
+        "date": {"from": from_iso, "to":to_iso},
+        "filters": {"token_address": token_address},
+        "pagination": {"page": 1, "per_page": 1},
+    }
+    token_items = _client.tgm_token_screener(payload=token_payload)
+    token_df = tgm_token_screener_to_dataframe(token_items)
+
+    return token_df
+
+@st.cache_data(ttl=300)
+def fetch_current_balance(_client, chain, wallet, token_address):
+    balance_payload = {
+        "chain": chain,
+        "address": wallet,
+        "filters": {"token_address": token_address},
+        "pagination": {"page": 1, "recordsPerPage": 1},
+    }
+    balance_items = _client.profiler_address_current_balance(balance_payload)
+    balance_df = pd.DataFrame(balance_items)
+
+    return balance_df
+
+
+def swaps_by_token(wallet: str, transaction_df: pd.DataFrame,
+                   token_tx_map: Dict[TokenKey, Dict[WalletKey, List[Dict]]]) -> None:
+    """Add the wallet's swap legs (tokens received on swap-ins, sent on swap-outs) to token_tx_map."""
+    if transaction_df.empty:
+        return
+    methods = transaction_df["method"].astype(str).str.split("(").str[0]
+    legs = [
+        (transaction_df[methods.isin(ETH_SWAP_IN_METHODS)], "tokens_received", "to_address_label", "receive"),
+        (transaction_df[methods.isin(ETH_SWAP_OUT_METHODS)], "tokens_sent", "from_address_label", "sent"),
+    ]
+    for swaps, tokens_col, label_field, tx_type in legs:
+        for row in swaps.itertuples(index=False):
+            for token in getattr(row, tokens_col) or []:
+                token_address = token.get("token_address")
+                token_chain = token.get("chain")
+                if not token_address or not token_chain:
+                    continue
+                wallet_key = (wallet, token.get(label_field, ""))
+                token_tx_map.setdefault((token_address, token_chain), {}).setdefault(wallet_key, []).append({
+                    "token_symbol": token.get("token_symbol", ""),
+                    "token_amount": token.get("token_amount"),
+                    "block_timestamp": row.block_timestamp,
+                    "transaction_hash": row.transaction_hash,
+                    "transaction_type": tx_type,
+                })
+
+
+@dataclass
+class TrackerData:
+    token_tx_map: Dict[TokenKey, Dict[WalletKey, List[Dict]]] = field(default_factory=dict)
+    screener: Dict[TokenKey, pd.DataFrame] = field(default_factory=dict)
+    balances: Dict[Tuple[str, str, str], float] = field(default_factory=dict)  # (wallet, token_address, chain) -> value_usd
+    timings: List[Dict] = field(default_factory=list)
+
+    def balance_usd(self, wallet: str, token_address: str, chain: str) -> float:
+        return self.balances.get((wallet, token_address, chain), 0)
+
+    def timings_df(self) -> pd.DataFrame:
+        return pd.DataFrame(self.timings)
+
+
+def _collect(prefetch: Prefetcher, keys: Dict[str, tuple]) -> Dict[tuple, object]:
+    """Results of the given prefetch keys as {original key: result}; failed fetches are left out."""
+    results = {}
+    for key in prefetch.as_completed(list(keys)):
+        try:
+            results[keys[key]] = prefetch.result(key)
+        except Exception as e:
+            print(f"Tracker fetch {key} failed: {e}")
+    return results
+
+
+def load_tracker_data(client: NansenClient, wallets: List[str], from_iso: str, to_iso: str,
+                      max_workers: int = MAX_WORKERS) -> TrackerData:
+    """from_iso/to_iso is the screener window; transactions are the watcher's rolling 48h."""
+    data = TrackerData()
+    prefetch = Prefetcher(max_workers=max_workers, name="tracker")
+    try:
+        # 1. transactions for every wallet, from the watcher's buffers
+        started = time.perf_counter()
+        watcher = get_wallet_watcher()
+        wallets = list(dict.fromkeys(wallets))
+        watcher.watch(wallets)
+        transactions = {wallet: watcher.transactions(wallet) for wallet in wallets}
+        data.timings.append({"stage": "transactions", "requests": 0,
+                             "seconds": round(time.perf_counter() - started, 3)})
+
+        # 2. swap legs per distinct token
+        started = time.perf_counter()
+        for wallet, transaction_df in transactions.items():
+            swaps_by_token(wallet, transaction_df, data.token_tx_map)
+        data.timings.append({"stage": "swaps", "requests": 0,
+                             "seconds": round(time.perf_counter() - started, 3)})
+
+        # 3 + 4. screener per token and balance per (wallet, token), in the same pool
+        started = time.perf_counter()
+        screener_keys, balance_keys = {}, {}
+        for (token_address, chain), wallet_map in data.token_tx_map.items():
+            key = f"screener:{chain}:{token_address}"
+            prefetch.submit(key, fetch_token_screener, client, chain, from_iso, to_iso, token_address)
+            screener_keys[key] = (token_address, chain)
+            for wallet in {w for w, _ in wallet_map}:
+                key = f"balance:{chain}:{wallet}:{token_address}"
+                prefetch.submit(key, fetch_current_balance, client, chain, wallet, token_address)
+                balance_keys[key] = (wallet, token_address, chain)
+
+        data.screener = _collect(prefetch, screener_keys)
+        data.timings.append({"stage": "screener", "requests": len(screener_keys),
+                             "seconds": round(time.perf_counter() - started, 3)})
+        balances = _collect(prefetch, balance_keys)
+        data.balances = {
+            key: (df["value_usd"].iloc[0] if not df.empty and "value_usd" in df.columns else 0)
+            for key, df in balances.items()
+        }
+        data.timings.append({"stage": "balances", "requests": len(balance_keys),
+                             "seconds": round(time.perf_counter() - started, 3)})
+    finally:
+        prefetch.shutdown()
+    return data
@@ -0,0 +1,257 @@
+"""
+Background watcher for starred-wallet activity.
+
+Instead of re-pulling a fixed 48h window per wallet on every run, one process-wide
+watcher keeps, per wallet:
+
+    - a high-water mark (latest block_timestamp seen) and a bounded set of seen
+      transaction hashes, so each poll asks only for transactions from the mark onward
+      and drops the ones it already has;
+    - a rolling 48h buffer of transaction rows, which pages read without any request.
+
+Polls page newest-first and stop at the first page containing an already-seen
+transaction, so upstream traffic follows new activity rather than wallets x window.
+A poll cut short (a failed page, or MAX_PAGES) records the oldest row it reached; the
+next poll pages the rest of that range before the cursor moves again.
+Wallets with no new activity are polled progressively less often (up to
+MAX_POLL_INTERVAL_S); wallets no page has asked for in IDLE_TTL_S are dropped.
+
+    watcher = get_wallet_watcher()
+    watcher.watch(wallets)
+    df = watcher.transactions(wallet)      # buffered rows, waits up to timeout for a first poll
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from nansen_client import NansenClient
+from dataframes import pfl_transactions_to_dataframe
+import warehouse
+
+
+CHAIN = "ethereum"
+WINDOW = timedelta(hours=48)
+POLL_INTERVAL_S = 60
+MAX_POLL_INTERVAL_S = 15 * 60
+IDLE_TTL_S = 60 * 60
+SEEN_MAX = 5_000
+PER_PAGE = 20
+MAX_PAGES = 50        # per poll; a first poll of a very busy wallet is capped here
+MAX_WORKERS = 4
+
+
+def _to_iso(ts: datetime) -> str:
+    return ts.isoformat().replace("+00:00", "Z")
+
+def _parse_ts(value) -> Optional[pd.Timestamp]:
+    ts = pd.to_datetime(value, utc=True, errors="coerce")
+    return None if pd.isna(ts) else ts
+
+
+@dataclass(eq=False)
+class _WalletState:
+    wallet: str
+    cursor: Optional[pd.Timestamp] = None              # latest block_timestamp seen
+    gap_end: Optional[pd.Timestamp] = None             # rows from the cursor up to here are still missing
+    seen: "OrderedDict[str, None]" = field(default_factory=OrderedDict)  # bounded, oldest first
+    buffer: Deque[Dict] = field(default_factory=deque)  # rows, oldest first
+    primed: threading.Event = field(default_factory=threading.Event)
+    interval_s: float = POLL_INTERVAL_S
+    next_poll_at: float = 0.0
+    last_requested_at: float = field(default_factory=time.time)
+    polls: int = 0
+    requests: int = 0
+    rows_added: int = 0
+    last_error: Optional[str] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def remember(self, tx_hash: str) -> None:
+        self.seen[tx_hash] = None
+        while len(self.seen) > SEEN_MAX:
+            self.seen.popitem(last=False)
+
+
+class WalletWatcher:
+    """Polls the transactions of watched wallets from a daemon thread; see module docstring."""
+
+    def __init__(self, client: Optional[NansenClient] = None, tick_s: float = 5.0):
+        self._client = client or NansenClient()
+        self._states: Dict[str, _WalletState] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._tick_s = tick_s
+        self._executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="wallet-watcher")
+        self._thread = threading.Thread(target=self._loop, name="wallet-watcher", daemon=True)
+        self._thread.start()
+
+    # ---------- Public API ----------
+
+    def watch(self, wallets: Iterable[str]) -> None:
+        """Start (or keep) watching wallets; new wallets are polled right away."""
+        now = time.time()
+        added = False
+        with self._lock:
+            for wallet in wallets:
+                state = self._states.get(wallet)
+                if state is None:
+                    self._states[wallet] = _WalletState(wallet)
+                    added = True
+                else:
+                    state.last_requested_at = now
+        if added:
+            self._wake.set()
+
+    def transactions(self, wallet: str, timeout: float = 30.0) -> pd.DataFrame:
+        """
+        The wallet's buffered last-48h transactions, newest first (pfl_transactions_to_dataframe
+        columns). Blocks up to timeout for the first poll of a newly watched wallet.
+        """
+        self.watch([wallet])
+        with self._lock:
+            state = self._states[wallet]
+        state.primed.wait(timeout)
+        cutoff = pd.Timestamp(datetime.now(timezone.utc) - WINDOW)
+        with state.lock:
+            rows = [row for row in reversed(state.buffer) if row["_ts"] >= cutoff]
+        return pfl_transactions_to_dataframe([{k: v for k, v in row.items() if k != "_ts"} for row in rows])
+
+    def stats(self) -> pd.DataFrame:
+        """One row per watched wallet: buffer size, cursor, request and poll counts, backoff."""
+        with self._lock:
+            states = list(self._states.values())
+        return pd.DataFrame([{
+            "wallet": s.wallet,
+            "buffered": len(s.buffer),
+            "cursor": s.cursor,
+            "polls": s.polls,
+            "requests": s.requests,
+            "new_rows": s.rows_added,
+            "poll_interval_s": s.interval_s,
+            "last_error": s.last_error,
+        } for s in states])
+
+    # ---------- Polling ----------
+
+    def _loop(self) -> None:
+        while True:
+            self._wake.wait(self._tick_s)
+            self._wake.clear()
+            now = time.time()
+            with self._lock:
+                for wallet in [w for w, s in self._states.items() if now - s.last_requested_at > IDLE_TTL_S]:
+                    del self._states[wallet]
+                due = [s for s in self._states.values() if s.next_poll_at <= now]
+            for state in due:
+                state.next_poll_at = float("inf")  # not due again until this poll finishes
+                self._executor.submit(self._poll, state)
+
+    def _fetch_range(self, state: _WalletState, since: pd.Timestamp, until: datetime,
+                     window_start: pd.Timestamp, stop_at_seen: bool,
+                     new_rows: List[Dict]) -> Tuple[bool, Optional[pd.Timestamp]]:
+        """
+        Page [since, until] newest first, appending unseen rows to new_rows. Returns
+        (complete, oldest timestamp fetched): complete once the last page was reached or,
+        with stop_at_seen, a page held an already-seen hash. A failed page ends the range
+        incomplete (state.last_error is set).
+        """
+        payload = {
+            "address": state.wallet,
+            "chain": CHAIN,
+            "date": {"from": _to_iso(since.to_pydatetime()), "to": _to_iso(until)},
+            "hide_spam_token": True,
+            "order_by": [{"field": "block_timestamp", "direction": "DESC"}],
+            "pagination": {"page": 1, "per_page": PER_PAGE},
+        }
+        oldest = None
+        try:
+            for response in self._client.profiler_address_transactions_pages(payload, max_pages=MAX_PAGES):
+                state.requests += 1
+                items = response.get("data", [])
+                caught_up = False
+                for item in items:
+                    ts = _parse_ts(item.get("block_timestamp"))
+                    if ts is not None:
+                        oldest = ts if oldest is None else min(oldest, ts)
+                    tx_hash = item.get("transaction_hash")
+                    if tx_hash in state.seen:
+                        caught_up = True
+                        continue
+                    if ts is None or ts < window_start:
+                        continue
+                    new_rows.append({**item, "_ts": ts})
+                    if tx_hash:
+                        state.remember(tx_hash)
+                last_page = len(items) < PER_PAGE or response.get("pagination", {}).get("is_last_page") is True
+                if last_page or (caught_up and stop_at_seen):
+                    return True, oldest
+        except Exception as e:
+            state.last_error = f"{type(e).__name__}: {e}"
+            print(f"Wallet watcher poll for {state.wallet} failed: {e}")
+        # A failed page or MAX_PAGES
+        return False, oldest
+
+    def _poll(self, state: _WalletState) -> None:
+        now = datetime.now(timezone.utc)
+        window_start = pd.Timestamp(now - WINDOW)
+        since = max(state.cursor, window_start) if state.cursor is not None else window_start
+        new_rows: List[Dict] = []
+        state.last_error = None
+
+        # New activity: stop at the first page holding a seen hash
+        complete, oldest = self._fetch_range(state, since, now, window_start, True, new_rows)
+        if not complete:
+            # Everything between since and the oldest row fetched is still missing
+            if oldest is not None:
+                state.gap_end = oldest if state.gap_end is None else max(state.gap_end, oldest)
+        elif state.gap_end is not None:
+            # An earlier poll stopped short: fetch the rest of its range. Seen hashes are
+            # expected there, so only the last page (or another interruption) ends it.
+            complete, oldest = self._fetch_range(state, since, state.gap_end.to_pydatetime(),
+                                                 window_start, False, new_rows)
+            state.gap_end = None if complete else (oldest if oldest is not None else state.gap_end)
+
+        with state.lock:
+            # The buffer is kept oldest first; gap rows are older than what it holds
+            rows = sorted(new_rows, key=lambda r: r["_ts"])
+            if rows and state.buffer and rows[0]["_ts"] < state.buffer[-1]["_ts"]:
+                state.buffer = deque(sorted(list(state.buffer) + rows, key=lambda r: r["_ts"]))
+            else:
+                state.buffer.extend(rows)
+            while state.buffer and state.buffer[0]["_ts"] < window_start:
+                state.buffer.popleft()
+            # The cursor only moves once nothing between it and the newest row is missing
+            if state.gap_end is None and state.buffer:
+                state.cursor = max(state.cursor or window_start, state.buffer[-1]["_ts"])
+        state.polls += 1
+        state.rows_added += len(new_rows)
+
+        if new_rows:
+            warehouse.persist("transactions",
+                              pd.DataFrame([{k: v for k, v in r.items() if k != "_ts"} for r in new_rows]),
+                              chain=CHAIN, address=state.wallet)
+
+        # Back off on quiet wallets, reset as soon as there is activity (or a gap or error to retry)
+        if new_rows or state.last_error or state.gap_end is not None:
+            state.interval_s = POLL_INTERVAL_S
+        else:
+            state.interval_s = min(state.interval_s * 2, MAX_POLL_INTERVAL_S)
+        state.next_poll_at = time.time() + state.interval_s
+        state.primed.set()
+
+
+_instance: Optional[WalletWatcher] = None
+_instance_lock = threading.Lock()
+
+def get_wallet_watcher() -> WalletWatcher:
+    """Process-wide WalletWatcher, started on first use."""
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = WalletWatcher()
+        return _instance
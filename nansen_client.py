@@ -1,12 +1,20 @@
+import copy
+import json
+import threading
+from concurrent.futures import Future
 import requests
 import streamlit as st
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Sequence
 
 API_BASE = st.secrets.get("nansen_api_url", "")
 API_KEY = st.secrets.get("nansen_api_key", "")
 
 class NansenClient:
-    def __init__(self):
+    def __init__(self, coalesce: bool = False):
+        """
+        coalesce: identical POSTs made through this client while one is in flight share that
+        request and its response. Nothing is kept once it completes.
+        """
         self.base_url = API_BASE
         self.headers = {
             "apiKey": API_KEY,
@@ -14,38 +22,99 @@ class NansenClient:
         }
         if not self.headers["apiKey"]:
             raise ValueError("Missing apiKey. Add it to .streamlit/secrets.toml.")
+        self._coalesce = coalesce
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
 
 
     # ---------- Helper functions ----------
 
     def _post(self, path: str, json_body: Dict, timeout: int = 45):
+        if not self._coalesce:
+            return self._send(path, json_body, timeout)
+
+        key = path + "\n" + json.dumps(json_body, sort_keys=True, default=str)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if owner:
+            try:
+                future.set_result(self._send(path, json_body, timeout))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                # Waiters already hold the future; later calls make a fresh request
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+        # Callers (e.g. the *_to_dataframe helpers) may mutate the items they get back
+        return copy.deepcopy(future.result())
+
+    def _send(self, path: str, json_body: Dict, timeout: int = 45):
         url = f"{self.base_url}{path}"
         resp = requests.post(url, headers=self.headers, json=json_body, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
         return data
     
-    def _post_all_pages(self, payload: Dict, path: str):
-        all_items = []
+    def _iter_pages(self, payload: Dict, path: str, max_pages: Optional[int] = None) -> Iterator[Dict]:
+        """Yield each page's response, following pagination until the last page or max_pages."""
+        pages = 0
         while True:
             response = self._post(path, payload)
-            items = response.get("data", [])
-            all_items.extend(items)
+            yield response
+            pages += 1
             if response["pagination"]["is_last_page"] is True:
                 break
+            if max_pages is not None and pages >= max_pages:
+                break
             payload["pagination"]["page"] += 1
+
+    def _post_all_pages(self, payload: Dict, path: str):
+        all_items = []
+        for response in self._iter_pages(payload, path):
+            all_items.extend(response.get("data", []))
         return all_items
 
     def _post_n_pages(self, payload: Dict, path: str, n: int):
         all_items = []
-        for _ in range(n):
-            response = self._post(path, payload)
-            items = response.get("data", [])
-            all_items.extend(items)
-            if response["pagination"]["is_last_page"] is True:
-                break
-            payload["pagination"]["page"] += 1
+        for response in self._iter_pages(payload, path, max_pages=n):
+            all_items.extend(response.get("data", []))
         return all_items
+
+    def _aggregate_pages(self, payload: Dict, path: str, distinct: Sequence[str] = (),
+                         time_field: Optional[str] = None, max_pages: Optional[int] = None) -> Dict:
+        """
+        Stream pages and keep only running aggregates; rows are dropped as they arrive.
+        Returns row count, distinct counts per field in `distinct`, pages read, whether the
+        last page was reached (`complete`) and the first/last value of `time_field` seen.
+        """
+        count = 0
+        pages = 0
+        complete = False
+        seen = {field: set() for field in distinct}
+        first_time = last_time = None
+        for response in self._iter_pages(payload, path, max_pages=max_pages):
+            items = response.get("data", [])
+            pages += 1
+            count += len(items)
+            for field, values in seen.items():
+                values.update(item.get(field) for item in items if item.get(field) is not None)
+            if time_field and items:
+                if first_time is None:
+                    first_time = items[0].get(time_field)
+                last_time = items[-1].get(time_field)
+            complete = response["pagination"]["is_last_page"] is True
+        return {
+            "count": count,
+            "distinct": {field: len(values) for field, values in seen.items()},
+            "pages": pages,
+            "complete": complete,
+            "first_time": first_time,
+            "last_time": last_time,
+        }
         
 
     # ---------- Smart Money endpoints ----------
@@ -77,6 +146,12 @@ class NansenClient:
         else:
             return self._post("/tgm/dex-trades", payload).get("data", [])
     
+    def tgm_dex_trades_stats(self, payload: Dict, distinct: Sequence[str] = ("trader_address",),
+                             max_pages: Optional[int] = None) -> Dict:
+        """Count-only variant of tgm_dex_trades; see _aggregate_pages. Order payload by block_timestamp."""
+        return self._aggregate_pages(payload, "/tgm/dex-trades", distinct=distinct,
+                                     time_field="block_timestamp", max_pages=max_pages)
+
     def tgm_token_screener(self, payload: Dict):
         return self._post("/token-screener", payload).get("data", [])
 
@@ -129,6 +204,10 @@ class NansenClient:
         else:
             return self._post(path, payload).get("data", [])
 
+    def profiler_address_counterparties_pages(self, payload: Dict, max_pages: Optional[int] = None) -> Iterator[Dict]:
+        """Streaming variant of profiler_address_counterparties: yields each page's response."""
+        return self._iter_pages(payload, f"{self._P}/address/counterparties", max_pages=max_pages)
+
     def profiler_address_related_wallets(self, payload: Dict, fetch_all: bool = False, n: int = 1):
         path = f"{self._P}/address/related-wallets"
         if fetch_all:
@@ -147,6 +226,10 @@ class NansenClient:
         else:
             return self._post(path, payload).get("data", [])
 
+    def profiler_address_transactions_pages(self, payload: Dict, max_pages: Optional[int] = None) -> Iterator[Dict]:
+        """Streaming variant of profiler_address_transactions: yields each page's response."""
+        return self._iter_pages(payload, f"{self._P}/address/transactions", max_pages=max_pages)
+
     def profiler_address_pnl_summary(self, payload: Dict):
         """
         NOTE: This endpoint returns a single summary object (not a list under 'data').
@@ -8,6 +8,8 @@ from components.tgm_token_metrics import render_token_metrics
 from components.sm_gauge import render_gauge_charts
 from components.llamaswap_iframe import render_llamaswap_iframe
 from components.tgm_dashboard_summary import render_dashboard_summary
+from loaders.tgm import period_windows, start_tgm_prefetch, COMPONENT_DATASETS as TGM_DATASETS
+import dataset_cache
 
 st.set_page_config(page_title="TGM Dashboard", layout="wide")
 st.title("Token Dashboard")
@@ -94,14 +96,23 @@ with summary_placeholder.container():
     with st.expander("**AI Summary**", expanded=False):
         st.text("Preparing summary…")
 
+# --- Data loading: start every fetch for the selected token at once ---
+# Components are laid out as placeholders first and filled in as their data resolves.
+# The period's date ranges are computed once so the prefetch and the components share cache keys
+windows = period_windows(st.session_state.period)
+prefetch = None
+if st.session_state.token and st.session_state.chain:
+    prefetch = start_tgm_prefetch(
+        st.session_state.chain, st.session_state.token, windows, st.session_state.aggregate_by_entity
+    )
+
 # --- Top layout: Smart Money Gauges on left, Token metrics on right ---
 
 left_col, right_col = st.columns(2, gap="large")
-with left_col:
-    render_gauge_charts(st.session_state.token, st.session_state.chain, st.session_state.period)
-
-with right_col:
-    render_token_metrics(st.session_state.token, st.session_state.chain, st.session_state.period)
+slots = {
+    "gauges": left_col.empty(),
+    "token_metrics": right_col.empty(),
+}
 
 # --- Bottom layout: Holder Distributions ---
 
@@ -109,19 +120,52 @@ st.subheader('Holder Distribution & Flows')
 col1, col2 = st.columns([1, 4])
 with col1:
     aggregate_by_entity = st.selectbox('Aggregate by Entity', [False, True], key='aggregate_by_entity')
-render_holders_donut_chart(st.session_state.chain, st.session_state.token, st.session_state.aggregate_by_entity)
-render_holder_flows_horizontal_bar_chart(st.session_state.chain, st.session_state.token, st.session_state.aggregate_by_entity)
+slots["holders"] = st.empty()
 
 st.subheader('Holder Trailing 7d PnL Bubble Chart', help = "Top 100 holders holding ≥ US$1000 and a rPnL ≥ US$1000")
-render_pnl_leaderboard_bubble_chart(st.session_state.chain, st.session_state.token)
+slots["pnl_bubble"] = st.empty()
 
 st.subheader(body = 'Smart Money DEX Trades Hourly Breakdown', help="Shows both buy and sell trades by Smart Money labelled wallets only in the last 24 hours.")
-render_dex_trades_hourly(st.session_state.chain, st.session_state.token)
+slots["dex_hourly"] = st.empty()
 
 # --- Bottom layout: LlamaSwap Widget ---
 st.subheader('Swap via LlamaSwap')
 render_llamaswap_iframe(st.session_state.chain, st.session_state.token)
 
+def render_holders():
+    render_holders_donut_chart(st.session_state.chain, st.session_state.token, st.session_state.aggregate_by_entity)
+    render_holder_flows_horizontal_bar_chart(st.session_state.chain, st.session_state.token, st.session_state.aggregate_by_entity)
+
+renderers = {
+    "gauges": lambda: render_gauge_charts(st.session_state.token, st.session_state.chain, st.session_state.period,
+                                          windows.gauge_dates),
+    "token_metrics": lambda: render_token_metrics(st.session_state.token, st.session_state.chain, st.session_state.period,
+                                                  windows.metrics_window),
+    "holders": render_holders,
+    "pnl_bubble": lambda: render_pnl_leaderboard_bubble_chart(st.session_state.chain, st.session_state.token),
+    "dex_hourly": lambda: render_dex_trades_hourly(st.session_state.chain, st.session_state.token),
+}
+
+if prefetch is None:
+    ready = iter(renderers)
+else:
+    for slot in slots.values():
+        slot.caption("Loading…")
+    ready = prefetch.as_ready(TGM_DATASETS)
+
+for name in ready:
+    with slots[name].container():
+        renderers[name]()
+
+# --- Debug: per-dataset load timings ---
+if prefetch is not None:
+    prefetch.shutdown()
+    with st.expander("Data loading timings", expanded=False):
+        st.dataframe(prefetch.timings(), hide_index=True, width='stretch')
+        if dataset_cache.pa is not None:
+            st.caption("Shared dataset cache")
+            st.dataframe(dataset_cache.get_shared_cache().stats(), hide_index=True, width='stretch')
+
 # Update summary in the placeholder after all components have stored their data
 with summary_placeholder.container():
     with st.expander("**AI Summary**", expanded=False):
@@ -17,6 +17,8 @@ from components.pfl_token_pnl_waterfall import render_token_pnl_waterfall
 from components.pfl_roi_pnl_scatter import render_roi_pnl_scatter
 from components.pfl_transactions_log_hist import render_transactions_log_hist
 from components.pfl_portfolio_trends_metrics import render_portfolio_trends_metrics
+from loaders.profiler import start_profiler_prefetch, COMPONENT_DATASETS as PROFILER_DATASETS
+from loaders.profiler_dataset import ProfilerDataset
 
 
 CHAINS = ["all", "ethereum", "solana", "arbitrum", "optimism", "base", "bnb", "polygon"]
@@ -133,42 +135,73 @@ date_to = now_date
 from_iso = iso_from_date(date_from, end_of_day=False)
 to_iso = iso_from_date(date_to, end_of_day=True)
 
-client = NansenClient()
+# One coalescing client per run: concurrent identical requests from different components share a call
+client = NansenClient(coalesce=True)
+wallet = st.session_state.wallet
+chain_all = st.session_state.port_pnl_chains
+chain_tx = st.session_state.tx_related_chains
+
+# --- Data loading: launch every Profiler request for this wallet at once ---
+# Components are laid out as placeholders first and filled in as their data resolves.
+# pnl-summary, counterparties and related wallets are fetched once and shared by their components
+dataset = ProfilerDataset(client, wallet, chain_all, chain_tx, from_iso, to_iso)
+prefetch = start_profiler_prefetch(dataset)
+slots = {}
 
 # ------------- Section 1 -------------
 st.header("Section 1: Identity & Portfolio Snapshot")
-render_portfolio_value_metrics(client, st.session_state.wallet, st.session_state.port_pnl_chains, from_iso, to_iso)
-render_portfolio_treemap(client, st.session_state.wallet, st.session_state.port_pnl_chains)
+slots["value_metrics"] = st.empty()
+slots["treemap"] = st.empty()
 
 # ------------- Section 2 -------------
 st.header("Section 2: Portfolio Trends & Stability (30 Days)")
-render_portfolio_trends_metrics(client, st.session_state.wallet, st.session_state.port_pnl_chains, from_iso, to_iso)
+slots["trends_metrics"] = st.empty()
 
 c1, c2 = st.columns(2)
-with c1:
-    render_token_share_stacked(client, st.session_state.wallet, st.session_state.port_pnl_chains, from_iso, to_iso)
-with c2:
-    render_volatility_heat_strip(client, st.session_state.wallet, st.session_state.port_pnl_chains, from_iso, to_iso)
+slots["token_share"] = c1.empty()
+slots["volatility"] = c2.empty()
 
 # ------------- Section 3 -------------
 st.header("Section 3: Interactions & Influence")
-render_portfolio_relations_metrics(client, st.session_state.wallet, st.session_state.port_pnl_chains, st.session_state.tx_related_chains, from_iso, to_iso)
+slots["relations_metrics"] = st.empty()
 d1, d2 = st.columns(2)
-with d1:
-    render_counterparty_network(client, st.session_state.wallet, st.session_state.port_pnl_chains, from_iso, to_iso)
-with d2:
-    render_related_wallet_network(client, st.session_state.wallet, st.session_state.tx_related_chains)
+slots["counterparty_network"] = d1.empty()
+slots["related_wallet_network"] = d2.empty()
 
 # ------------- Section 4 -------------
 st.header("Section 4: Tactical Trading Behaviour (30 Days)")
-render_portfolio_pnl_metrics(client, st.session_state.wallet, st.session_state.port_pnl_chains, from_iso, to_iso)
+slots["pnl_metrics"] = st.empty()
 e1, e2 = st.columns(2)
-with e1:
-    render_token_pnl_waterfall(client, st.session_state.wallet, st.session_state.port_pnl_chains, from_iso, to_iso)
-with e2:
-    render_roi_pnl_scatter(client, st.session_state.wallet, st.session_state.port_pnl_chains, from_iso, to_iso)
-
-st.subheader("Trade Sizes (Last 100 transactions)")
-render_transactions_log_hist(client, st.session_state.wallet, st.session_state.tx_related_chains, from_iso, to_iso)
+slots["token_pnl_waterfall"] = e1.empty()
+slots["roi_pnl_scatter"] = e2.empty()
+
+st.subheader("Trade Sizes (last 30 days)")
+slots["transactions_hist"] = st.empty()
+
+renderers = {
+    "value_metrics": lambda: render_portfolio_value_metrics(client, wallet, chain_all, from_iso, to_iso),
+    "treemap": lambda: render_portfolio_treemap(client, wallet, chain_all),
+    "trends_metrics": lambda: render_portfolio_trends_metrics(client, wallet, chain_all, from_iso, to_iso),
+    "token_share": lambda: render_token_share_stacked(client, wallet, chain_all, from_iso, to_iso),
+    "volatility": lambda: render_volatility_heat_strip(client, wallet, chain_all, from_iso, to_iso),
+    "relations_metrics": lambda: render_portfolio_relations_metrics(dataset),
+    "counterparty_network": lambda: render_counterparty_network(dataset),
+    "related_wallet_network": lambda: render_related_wallet_network(dataset),
+    "pnl_metrics": lambda: render_portfolio_pnl_metrics(dataset),
+    "token_pnl_waterfall": lambda: render_token_pnl_waterfall(dataset),
+    "roi_pnl_scatter": lambda: render_roi_pnl_scatter(dataset),
+    "transactions_hist": lambda: render_transactions_log_hist(wallet, chain_tx, from_iso, to_iso),
+}
+
+for slot in slots.values():
+    slot.caption("Loading…")
+
+for name in prefetch.as_ready(PROFILER_DATASETS):
+    with slots[name].container():
+        renderers[name]()
+
+prefetch.shutdown()
+with st.expander("Data loading timings", expanded=False):
+    st.dataframe(prefetch.timings(), hide_index=True, width='stretch')
 
 st.caption("Data source: Nansen Profiler APIs • All timestamps in UTC")
@@ -1,6 +1,8 @@
 import streamlit as st
 
-from components.chat_interface import initialize_chat, run_chat
+from components.chat_interface import (
+    initialize_chat, run_chat, render_connection_metrics, render_tool_cache_metrics, render_prompt_size,
+)
 from components.chat_network_indicator import render_network_indicator
 
 # Get secrets
@@ -16,6 +18,10 @@ render_network_indicator()
 
 # Initialize chat
 if initialize_chat(OPENAI_API_KEY, NANSEN_MCP_URL, NANSEN_API_KEY):
+    with st.sidebar:
+        render_connection_metrics()
+        render_tool_cache_metrics()
+        render_prompt_size()
     # Run the chat interface
     run_chat()
 else:
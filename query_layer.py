@@ -0,0 +1,129 @@
+"""
+Embedded DuckDB query layer.
+
+Cached endpoint frames (pandas or Arrow) and warehouse Parquet partitions are exposed as
+tables so components can run SQL aggregations and joins instead of hand-rolled pandas
+groupbys. DuckDB scans registered frames in place and executes queries vectorized and
+multi-threaded; results come back as pyarrow Tables.
+
+    ql = get_query_layer()
+    ql.register_parquet("trades", "tgm_dex_trades")
+    hourly = ql.query("SELECT hour(block_timestamp) AS hour, count(*) AS n FROM trades GROUP BY 1")
+
+duckdb is optional; is_enabled() is False without it and callers keep their pandas path.
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+import pandas as pd
+
+try:
+    import duckdb
+    import pyarrow as pa
+except ImportError:  # duckdb (and pyarrow, which it uses for Arrow results) are optional
+    duckdb = pa = None
+
+import warehouse
+
+
+def is_enabled() -> bool:
+    return duckdb is not None
+
+
+def naive_utc(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of df with tz-aware datetime columns converted to naive UTC. DuckDB maps those to
+    TIMESTAMP WITH TIME ZONE, whose date functions depend on the session time zone.
+    """
+    converted = {
+        col: df[col].dt.tz_convert("UTC").dt.tz_localize(None)
+        for col in df.columns
+        if isinstance(df[col].dtype, pd.DatetimeTZDtype)
+    }
+    return df.assign(**converted) if converted else df
+
+
+def restore_tz(result: pd.DataFrame, like: pd.DataFrame) -> pd.DataFrame:
+    """Re-apply the time zones of like's datetime columns to same-named naive columns of result."""
+    for col in result.columns:
+        if col in like.columns and isinstance(like[col].dtype, pd.DatetimeTZDtype) \
+                and pd.api.types.is_datetime64_dtype(result[col].dtype):
+            result[col] = result[col].dt.tz_localize("UTC").dt.tz_convert(like[col].dt.tz)
+    return result
+
+
+class QueryLayer:
+    """One in-process DuckDB database shared by every session of this process."""
+
+    def __init__(self, threads: Optional[int] = None):
+        self._con = duckdb.connect(database=":memory:")
+        if threads:
+            self._con.execute(f"SET threads TO {int(threads)}")
+        # Registered frames are connection-local in DuckDB, so they are kept here and
+        # registered on each query cursor; Parquet views live in the shared catalog.
+        self._frames: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, frame) -> None:
+        """Expose a pandas DataFrame or pyarrow Table as table `name` (no copy is made)."""
+        if isinstance(frame, pd.DataFrame):
+            frame = naive_utc(frame)
+        with self._lock:
+            self._frames[name] = frame
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._frames.pop(name, None)
+
+    def register_parquet(self, name: str, endpoint: str, root: Optional[str] = None) -> bool:
+        """
+        Expose a warehouse endpoint as view `name`, with chain/date partition columns.
+        Filters on chain/date prune partitions. Returns False when nothing is stored yet.
+        """
+        base = os.path.join(root or warehouse.WAREHOUSE_DIR, f"endpoint={endpoint}")
+        if not warehouse._files(endpoint, root):
+            return False
+        pattern = os.path.join(base, "chain=*", "date=*", "part-*.parquet").replace("'", "''")
+        with self._lock:
+            self._con.execute(
+                f'CREATE OR REPLACE VIEW "{name}" AS '
+                f"SELECT * FROM read_parquet('{pattern}', hive_partitioning = true, union_by_name = true)"
+            )
+        return True
+
+    def query(self, sql: str, params=None, **frames):
+        """
+        Run sql and return a pyarrow.Table. Keyword frames are registered for this query only,
+        e.g. query("SELECT ... FROM t JOIN h USING (address)", t=trades_df, h=holders_df).
+        """
+        with self._lock:
+            cursor = self._con.cursor()
+            scoped = dict(self._frames)
+        try:
+            for name, frame in frames.items():
+                scoped[name] = naive_utc(frame) if isinstance(frame, pd.DataFrame) else frame
+            for name, frame in scoped.items():
+                cursor.register(name, frame)
+            return cursor.execute(sql, params or []).fetch_arrow_table()
+        finally:
+            cursor.close()
+
+    def query_df(self, sql: str, params=None, **frames) -> pd.DataFrame:
+        return self.query(sql, params, **frames).to_pandas()
+
+
+_instance: Optional[QueryLayer] = None
+_instance_lock = threading.Lock()
+
+
+def get_query_layer() -> QueryLayer:
+    """Process-wide QueryLayer. Raises RuntimeError when duckdb is not installed."""
+    global _instance
+    if duckdb is None:
+        raise RuntimeError("duckdb is not installed: pip install duckdb")
+    with _instance_lock:
+        if _instance is None:
+            threads = os.environ.get("DUCKDB_THREADS")
+            _instance = QueryLayer(threads=int(threads) if threads else None)
+        return _instance
@@ -0,0 +1,224 @@
+"""
+Headless refresher for hot datasets.
+
+Run next to Streamlit so that no user rerun pays for an expired dataset:
+
+    python refresher.py &
+    streamlit run Landing_Page.py --server.port 8501
+
+Every configured dataset is refetched on its own schedule and published atomically into
+the directory shared with the Streamlit processes (dataset_cache.publish). Readers pick
+the published copy up instead of fetching (see loaders.smart_money).
+
+Refresh durations, staleness and failures are written to <published dir>/metrics.json
+after every run and, with --metrics-port, served in the Prometheus text format on
+/metrics.
+"""
+import json
+import os
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from dataset_cache import PUBLISHED_DIR, publish
+from loaders import smart_money
+
+
+REFRESH_INTERVAL_S = 120   # well inside smart_money.REFRESH_S, so readers always find a fresh copy
+PERSIST_INTERVAL_S = smart_money.REFRESH_S   # warehouse writes at the cadence the app itself would fetch
+RETRY_S = 30               # after a failed run
+MAX_WORKERS = 4
+
+
+@dataclass(eq=False)
+class Job:
+    name: str
+    fetch: Callable[[bool], pd.DataFrame]   # fetch(persist): persist=False skips the warehouse write
+    interval_s: float = REFRESH_INTERVAL_S
+    persist_interval_s: float = PERSIST_INTERVAL_S
+    next_run_at: float = 0.0
+    last_persisted_at: float = 0.0
+    runs: int = 0
+    failures: int = 0
+    rows: int = 0
+    last_duration_s: Optional[float] = None
+    last_success_at: Optional[float] = None
+    last_error: Optional[str] = None
+    running: bool = False
+
+    def snapshot(self, now: float) -> Dict:
+        return {
+            "dataset": self.name,
+            "interval_s": self.interval_s,
+            "runs": self.runs,
+            "failures": self.failures,
+            "rows": self.rows,
+            "last_duration_s": self.last_duration_s,
+            "last_success_at": self.last_success_at,
+            "staleness_s": round(now - self.last_success_at, 1) if self.last_success_at else None,
+            "last_error": self.last_error,
+        }
+
+
+def hot_datasets(label_sets: List[Tuple[str, ...]], interval_s: float = REFRESH_INTERVAL_S) -> List[Job]:
+    """The Landing page's smart-money snapshots, once per label-exclusion set."""
+    jobs = []
+    for kind in smart_money.ENDPOINTS:
+        for labels in label_sets:
+            jobs.append(Job(
+                name=smart_money.published_name(kind, labels),
+                fetch=lambda persist, kind=kind, labels=labels: smart_money.fetch_wide(kind, labels, persist=persist),
+                interval_s=interval_s,
+            ))
+    return jobs
+
+
+class Refresher:
+    """Runs due jobs in a small pool; a job is never run twice concurrently."""
+
+    def __init__(self, jobs: List[Job], root: Optional[str] = None, max_workers: int = MAX_WORKERS):
+        self.jobs = jobs
+        self.root = root or PUBLISHED_DIR
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresher")
+
+    # ---------- Scheduling ----------
+
+    def run_forever(self, tick_s: float = 1.0) -> None:
+        while not self._stop.is_set():
+            now = time.time()
+            with self._lock:
+                due = [j for j in self.jobs if not j.running and j.next_run_at <= now]
+                for job in due:
+                    job.running = True
+            for job in due:
+                self._executor.submit(self._run, job)
+            self._stop.wait(tick_s)
+        self._executor.shutdown(wait=True)
+
+    def run_once(self) -> bool:
+        """Refresh every job once; True when all of them succeeded."""
+        for job in self.jobs:
+            job.running = True
+        list(self._executor.map(self._run, self.jobs))
+        self._executor.shutdown(wait=True)
+        return all(j.last_error is None for j in self.jobs)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, job: Job) -> None:
+        started = time.perf_counter()
+        persist = time.time() - job.last_persisted_at >= job.persist_interval_s
+        try:
+            df = job.fetch(persist)
+            publish(job.name, df, root=self.root)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Refresher: {job.name} failed: {e}")
+        duration = round(time.perf_counter() - started, 3)
+
+        with self._lock:
+            job.runs += 1
+            job.last_duration_s = duration
+            job.last_error = error
+            if error is None:
+                job.rows = len(df)
+                job.last_success_at = time.time()
+                if persist:
+                    job.last_persisted_at = job.last_success_at
+                job.next_run_at = time.time() + job.interval_s
+            else:
+                job.failures += 1
+                job.next_run_at = time.time() + min(RETRY_S, job.interval_s)
+            job.running = False
+        self.write_metrics()
+
+    # ---------- Metrics ----------
+
+    def metrics(self) -> List[Dict]:
+        now = time.time()
+        with self._lock:
+            return [job.snapshot(now) for job in self.jobs]
+
+    def write_metrics(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, "metrics.json")
+        tmp = os.path.join(self.root, f".metrics-{uuid.uuid4().hex}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"written_at": time.time(), "datasets": self.metrics()}, f, indent=2)
+        os.replace(tmp, path)
+
+    def prometheus(self) -> str:
+        series = [
+            ("refresher_runs_total", "counter", "Refresh runs", "runs"),
+            ("refresher_failures_total", "counter", "Failed refresh runs", "failures"),
+            ("refresher_last_duration_seconds", "gauge", "Duration of the last refresh", "last_duration_s"),
+            ("refresher_staleness_seconds", "gauge", "Seconds since the last successful refresh", "staleness_s"),
+            ("refresher_rows", "gauge", "Rows in the last published copy", "rows"),
+        ]
+        rows = self.metrics()
+        lines = []
+        for metric, kind, help_text, column in series:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            for row in rows:
+                if row[column] is not None:
+                    lines.append(f'{metric}{{dataset="{row["dataset"]}"}} {row[column]}')
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port: int) -> ThreadingHTTPServer:
+        refresher = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = refresher.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("", port), Handler)
+        threading.Thread(target=server.serve_forever, name="refresher-metrics", daemon=True).start()
+        return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Refresh hot datasets into the shared published cache.")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL_S, help="seconds between refreshes")
+    parser.add_argument("--exclude-labels", action="append", default=[], metavar="LABELS",
+                        help='extra comma-separated label-exclusion set to keep warm, e.g. "Fund,Smart Trader"')
+    parser.add_argument("--metrics-port", type=int, default=0, help="serve Prometheus metrics on this port")
+    parser.add_argument("--once", action="store_true", help="refresh everything once and exit (for cron)")
+    args = parser.parse_args()
+
+    label_sets = [()] + [tuple(sorted(l.strip() for l in s.split(",") if l.strip())) for s in args.exclude_labels]
+    refresher = Refresher(hot_datasets(list(dict.fromkeys(label_sets)), args.interval))
+    if args.once:
+        raise SystemExit(0 if refresher.run_once() else 1)
+
+    if args.metrics_port:
+        refresher.serve_metrics(args.metrics_port)
+    signal.signal(signal.SIGTERM, lambda *_: refresher.stop())
+    print(f"Refresher: {len(refresher.jobs)} datasets every {args.interval:g}s into {refresher.root}")
+    try:
+        refresher.run_forever()
+    except KeyboardInterrupt:
+        refresher.stop()
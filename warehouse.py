@@ -0,0 +1,247 @@
+"""
+Local Parquet warehouse for fetched endpoint data.
+
+Typed frames are appended under
+    <root>/endpoint=<name>/chain=<chain>/date=<YYYY-MM-DD>/part-*.parquet
+so history survives cache TTLs. Reads prune partitions by chain/date, push row filters
+down to the Parquet scan and only read the requested columns. compact() merges the small
+files each fetch leaves behind into one deduplicated file per partition.
+
+The root defaults to ./.warehouse and can be set with NANSEN_WAREHOUSE_DIR.
+pyarrow is optional; without it persist() is a no-op and load() returns an empty frame.
+"""
+import glob
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Sequence, Union
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional
+    pa = ds = pq = None
+
+
+WAREHOUSE_DIR = os.environ.get("NANSEN_WAREHOUSE_DIR", ".warehouse")
+
+PARTITION_KEYS = ("chain", "date")
+
+
+@dataclass(frozen=True)
+class EndpointSpec:
+    # Column used for the date partition; None for snapshot endpoints (partitioned by fetch date).
+    time_col: Optional[str]
+    # Columns identifying a row; used to deduplicate overlapping fetches.
+    keys: Sequence[str]
+
+
+ENDPOINTS: Dict[str, EndpointSpec] = {
+    "tgm_dex_trades": EndpointSpec("block_timestamp", ("transaction_hash", "trader_address", "token_address", "action")),
+    "tgm_holders": EndpointSpec(None, ("token_address", "aggregate_by_entity", "address", "snapshot_at")),
+    "smart_money_netflow": EndpointSpec(None, ("chain", "token_address", "snapshot_at")),
+    "historical_balances": EndpointSpec("block_timestamp", ("address", "chain", "token_address", "block_timestamp")),
+    "transactions": EndpointSpec("block_timestamp", ("address", "transaction_hash")),
+}
+
+
+def is_enabled() -> bool:
+    return pa is not None
+
+
+def _endpoint_dir(endpoint: str, root: Optional[str] = None) -> str:
+    if endpoint not in ENDPOINTS:
+        raise ValueError(f"Unknown warehouse endpoint: {endpoint}")
+    return os.path.join(root or WAREHOUSE_DIR, f"endpoint={endpoint}")
+
+
+def _partition_schema():
+    return pa.schema([(name, pa.string()) for name in PARTITION_KEYS])
+
+
+def _as_date_str(d: Union[str, date, datetime, None]) -> Optional[str]:
+    if d is None:
+        return None
+    return pd.Timestamp(d).strftime("%Y-%m-%d")
+
+
+# ---------- Write ----------
+
+def persist(endpoint: str, df: pd.DataFrame, chain: str, root: Optional[str] = None, **context) -> int:
+    """
+    Append df to the endpoint's partitions. context values (e.g. token_address=..., address=...)
+    are stored as constant columns since the API rows don't carry the request parameters.
+    Returns the number of rows written. Never raises: persistence is best-effort.
+    """
+    if pa is None or df is None or df.empty:
+        return 0
+    try:
+        spec = ENDPOINTS[endpoint]
+        frame = df.copy()
+        for name, value in context.items():
+            frame[name] = value
+        # "date" is a partition key; a data column with that name would shadow it on read.
+        frame = frame.drop(columns=["date"], errors="ignore")
+
+        now = datetime.now(timezone.utc)
+        if spec.time_col is None:
+            frame["snapshot_at"] = pd.Timestamp(now)
+            dates = pd.Series(now.strftime("%Y-%m-%d"), index=frame.index)
+        else:
+            ts = pd.to_datetime(frame[spec.time_col], errors="coerce", utc=True)
+            frame[spec.time_col] = ts
+            dates = ts.dt.strftime("%Y-%m-%d").fillna(now.strftime("%Y-%m-%d"))
+
+        # Partition by the row's own chain when present (e.g. chain="all" requests).
+        chains = frame["chain"].astype(str) if "chain" in frame.columns else pd.Series(chain, index=frame.index)
+        frame = frame.drop(columns=["chain"], errors="ignore")
+
+        base = _endpoint_dir(endpoint, root)
+        written = 0
+        for (part_chain, part_date), part in frame.groupby([chains, dates], sort=False):
+            part_dir = os.path.join(base, f"chain={part_chain}", f"date={part_date}")
+            os.makedirs(part_dir, exist_ok=True)
+            table = pa.Table.from_pandas(part.reset_index(drop=True), preserve_index=False)
+            tmp = os.path.join(part_dir, f".part-{uuid.uuid4().hex}.tmp")
+            pq.write_table(table, tmp)
+            os.replace(tmp, os.path.join(part_dir, f"part-{uuid.uuid4().hex}.parquet"))
+            written += len(part)
+        return written
+    except Exception as e:
+        print(f"Warehouse: failed to persist {endpoint} ({chain}): {e}")
+        return 0
+
+
+# ---------- Read ----------
+
+def _files(endpoint: str, root: Optional[str] = None) -> List[str]:
+    """Part files oldest write first, so deduplicating with keep="last" keeps the newest copy."""
+    files = glob.glob(os.path.join(_endpoint_dir(endpoint, root), "chain=*", "date=*", "part-*.parquet"))
+    return sorted(files, key=lambda f: (os.path.getmtime(f), f))
+
+
+def _dataset(files: List[str], endpoint: str, root: Optional[str] = None):
+    # Schemas drift between fetches (new fields, all-null columns); unify across file footers.
+    schemas = [pq.read_schema(f) for f in files]
+    schema = pa.unify_schemas(schemas, promote_options="permissive")
+    for name in PARTITION_KEYS:
+        if schema.get_field_index(name) < 0:
+            schema = schema.append(pa.field(name, pa.string()))
+    partitioning = ds.partitioning(_partition_schema(), flavor="hive")
+    return ds.dataset(files, schema=schema, format="parquet", partitioning=partitioning,
+                      partition_base_dir=_endpoint_dir(endpoint, root))
+
+
+def load(
+    endpoint: str,
+    chain: Optional[str] = None,
+    date_from: Union[str, date, datetime, None] = None,
+    date_to: Union[str, date, datetime, None] = None,
+    columns: Optional[List[str]] = None,
+    where: Optional[Dict[str, object]] = None,
+    filters=None,
+    dedupe: bool = True,
+    root: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Read an endpoint's history. chain/date bounds prune partitions; where ({column: value}
+    equality) and filters (a pyarrow.dataset expression) are pushed down to the Parquet scan;
+    columns limits the columns read from disk.
+    """
+    if pa is None:
+        return pd.DataFrame(columns=columns or [])
+    files = _files(endpoint, root)
+    if not files:
+        return pd.DataFrame(columns=columns or [])
+
+    dataset = _dataset(files, endpoint, root)
+    expr = None
+    conditions = []
+    if chain and chain != "all":
+        conditions.append(ds.field("chain") == chain)
+    if date_from is not None:
+        conditions.append(ds.field("date") >= _as_date_str(date_from))
+    if date_to is not None:
+        conditions.append(ds.field("date") <= _as_date_str(date_to))
+    for name, value in (where or {}).items():
+        if name in dataset.schema.names:
+            conditions.append(ds.field(name) == value)
+        else:
+            return pd.DataFrame(columns=columns or [])
+    if filters is not None:
+        conditions.append(filters)
+    for cond in conditions:
+        expr = cond if expr is None else (expr & cond)
+
+    keys = list(ENDPOINTS[endpoint].keys)
+    read_cols = None
+    if columns is not None:
+        available = set(dataset.schema.names)
+        extra = [k for k in keys if dedupe and k in available and k not in columns]
+        read_cols = [c for c in columns if c in available] + extra
+
+    # Rows come back in file order (see _files), newest write last
+    df = dataset.to_table(columns=read_cols, filter=expr).to_pandas()
+    if dedupe and not df.empty:
+        subset = [k for k in keys if k in df.columns]
+        if subset:
+            df = df.drop_duplicates(subset=subset, keep="last")
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df.reset_index(drop=True)
+
+
+def load_latest_snapshot(endpoint: str, chain: Optional[str] = None,
+                         where: Optional[Dict[str, object]] = None, root: Optional[str] = None) -> pd.DataFrame:
+    """Rows of the most recent snapshot of a snapshot endpoint (e.g. holders of one token)."""
+    df = load(endpoint, chain=chain, where=where, root=root)
+    if df.empty or "snapshot_at" not in df.columns:
+        return df
+    latest = df[df["snapshot_at"] == df["snapshot_at"].max()]
+    return latest.drop(columns=["date", "snapshot_at"] + list((where or {}).keys()), errors="ignore").reset_index(drop=True)
+
+
+# ---------- Maintenance ----------
+
+def compact(endpoint: Optional[str] = None, min_files: int = 4, root: Optional[str] = None) -> Dict[str, int]:
+    """
+    Merge partitions holding at least min_files files into one deduplicated file.
+    Returns {partition_dir: files_merged}.
+    """
+    if pa is None:
+        return {}
+    merged: Dict[str, int] = {}
+    endpoints = [endpoint] if endpoint else list(ENDPOINTS)
+    for name in endpoints:
+        base = _endpoint_dir(name, root)
+        for part_dir in sorted(glob.glob(os.path.join(base, "chain=*", "date=*"))):
+            files = sorted(glob.glob(os.path.join(part_dir, "part-*.parquet")), key=lambda f: (os.path.getmtime(f), f))
+            if len(files) < min_files:
+                continue
+            tables = [pq.read_table(f, partitioning=None) for f in files]
+            df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+            subset = [k for k in ENDPOINTS[name].keys if k in df.columns]
+            if subset:
+                df = df.drop_duplicates(subset=subset, keep="last")
+            tmp = os.path.join(part_dir, f".compact-{uuid.uuid4().hex}.tmp")
+            pq.write_table(pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False), tmp)
+            os.replace(tmp, os.path.join(part_dir, f"part-{uuid.uuid4().hex}.parquet"))
+            for f in files:
+                os.remove(f)
+            merged[part_dir] = len(files)
+    return merged
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compact the local Parquet warehouse.")
+    parser.add_argument("--endpoint", choices=list(ENDPOINTS), default=None)
+    parser.add_argument("--min-files", type=int, default=4)
+    args = parser.parse_args()
+    for part, n in compact(args.endpoint, args.min_files).items():
+        print(f"compacted {n} files in {part}")